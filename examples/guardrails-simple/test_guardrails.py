@@ -17,9 +17,10 @@ import json
 import os
 import sys
 
-import httpx
 from llama_stack_client import LlamaStackClient
 
+from http_pool import get_http_client
+
 
 TEST_CASES = {
     "safe": {
@@ -272,7 +273,7 @@ def main():
         os.environ["SSL_CERT_FILE"] = ""
         os.environ["CURL_CA_BUNDLE"] = ""
 
-    http_client = httpx.Client(verify=args.verify_ssl, timeout=300)
+    http_client = get_http_client(timeout=300, verify_ssl=args.verify_ssl)
     client = LlamaStackClient(base_url=args.url, http_client=http_client)
 
     tests_to_run = {}
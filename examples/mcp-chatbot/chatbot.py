@@ -17,11 +17,12 @@ and ARGOCD_API_TOKEN in your environment or .env file.
 """
 
 import os
-import httpx
 import logging
 from dotenv import load_dotenv
 from llama_stack_client import LlamaStackClient
 
+from http_pool import get_http_client
+
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
 load_dotenv()
@@ -52,7 +53,7 @@ RULES:
         skip_ssl = os.getenv("SKIP_SSL_VERIFY", "False").lower() == "true"
         timeout = int(os.getenv("LLAMA_STACK_TIMEOUT", "300"))
 
-        http_client = httpx.Client(verify=not skip_ssl, timeout=timeout)
+        http_client = get_http_client(timeout=timeout, verify_ssl=not skip_ssl)
         self.client = LlamaStackClient(
             base_url=self.base_url,
             http_client=http_client
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+A/B throughput harness: server-side vs local chunking.
+
+Ingests the same corpus through both upload modes against an in-process stub
+of the Llama Stack endpoints they use, and reports per mode the wall time, the
+number of requests, the bytes sent to the server and the time to the first
+searchable chunk:
+
+    python bench_ab.py --size-mb 5 --files 200
+    python bench_ab.py --documents-dir ../rag-mcp-chatbot/documents --output ab.json
+
+The stub does no real embedding. Its cost model is a fixed latency per request
+(--request-latency-ms) plus a fixed embedding time per chunk
+(--embed-ms-per-chunk), paid by file batch processing in server-side mode and
+by vector_io.insert (or /v1/embeddings with --embedding-cache) in local mode.
+Server-side chunking uses the OpenAI "auto" strategy defaults (800 tokens,
+400 overlap), converted to characters at CHARS_PER_TOKEN_ESTIMATE.
+
+A chunk counts as searchable when the stub adds it to its index, i.e. as soon
+as a vector_io.query could return it.
+"""
+
+import io
+import gzip
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    pass  # Only needed to decode --insert-compression zstd (ZSTD_AVAILABLE)
+
+from bench_chunker import generate_corpus
+from bench_ingest import split_documents
+from milvus_upload import (
+    SpanTextChunker,
+    MilvusUploadConfig,
+    MilvusLocalChunkingConfig,
+    upload_documents_to_milvus,
+    upload_documents_with_local_chunking,
+    LLAMA_STACK_CLIENT_AVAILABLE,
+    ZSTD_AVAILABLE,
+    INSERT_TRANSPORTS,
+    INSERT_COMPRESSION_LEVELS,
+    CHARS_PER_TOKEN_ESTIMATE,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_MAX_CHUNK_CHARS,
+)
+
+
+MODES = ["server", "local"]
+
+# OpenAI "auto" chunking strategy, used by file batches without chunking_strategy
+SERVER_CHUNK_TOKENS = 800
+SERVER_CHUNK_OVERLAP_TOKENS = 400
+
+
+# =============================================================================
+# STUB SERVER
+# =============================================================================
+
+class StubLlamaStack:
+    """
+    Threaded HTTP stub of the Llama Stack endpoints used by both upload modes.
+
+    Serves /v1/models, /v1/files, /v1/vector_stores (with file batches),
+    /v1/embeddings and /v1/vector-io/insert|query, and counts every request
+    and the bytes it carried (as sent, i.e. compressed when the request has
+    a gzip or zstd Content-Encoding). Chunks are kept in a plain list per vector store;
+    query returns the first chunks containing any query word.
+    """
+
+    def __init__(
+        self,
+        embedding_model: str,
+        embedding_dimension: int,
+        request_latency: float = 0.005,
+        embed_seconds_per_chunk: float = 0.002,
+        server_chunk_tokens: int = SERVER_CHUNK_TOKENS,
+        server_chunk_overlap_tokens: int = SERVER_CHUNK_OVERLAP_TOKENS,
+        poll_after_ms: int = 50
+    ):
+        self.embedding_model = embedding_model
+        self.embedding_dimension = embedding_dimension
+        self.request_latency = request_latency
+        self.embed_seconds_per_chunk = embed_seconds_per_chunk
+        self.poll_after_ms = poll_after_ms
+        self.chunker = SpanTextChunker(
+            chunk_size=server_chunk_tokens * CHARS_PER_TOKEN_ESTIMATE,
+            chunk_overlap=server_chunk_overlap_tokens * CHARS_PER_TOKEN_ESTIMATE
+        )
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+        self.reset()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubLlamaStack":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        """Forget all state and counters (between runs)."""
+        with self._lock:
+            self.files: Dict[str, str] = {}
+            self.stores: Dict[str, List[Dict[str, Any]]] = {}
+            self.batches: Dict[str, Dict[str, Any]] = {}
+            self.requests: Dict[str, int] = {}
+            self.bytes_received = 0
+            self.bytes_sent = 0
+            self.first_searchable_at: Optional[float] = None
+            self.ids = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters since the last reset."""
+        with self._lock:
+            return {
+                "requests": sum(self.requests.values()),
+                "requests_by_endpoint": dict(sorted(self.requests.items())),
+                "bytes_received": self.bytes_received,
+                "bytes_sent": self.bytes_sent,
+                "indexed_chunks": sum(len(chunks) for chunks in self.stores.values()),
+                "first_searchable_at": self.first_searchable_at,
+            }
+
+    def _new_id(self, prefix: str) -> str:
+        with self._lock:
+            self.ids += 1
+            return f"{prefix}_{self.ids}"
+
+    def _index(self, vector_store_id: str, chunks: List[Dict[str, Any]]):
+        """Make chunks searchable, after paying the embedding cost of those without a vector."""
+        unembedded = sum(1 for chunk in chunks if "embedding" not in chunk)
+        time.sleep(unembedded * self.embed_seconds_per_chunk)
+        with self._lock:
+            self.stores.setdefault(vector_store_id, []).extend(chunks)
+            if chunks and self.first_searchable_at is None:
+                self.first_searchable_at = time.perf_counter()
+
+    def _process_batch(self, batch: Dict[str, Any]):
+        """Chunk and index the files of a file batch, one file after another."""
+        for file_id in batch["file_ids"]:
+            text = self.files.get(file_id, "")
+            chunks = [
+                {"content": content, "metadata": {"document_id": file_id}}
+                for content in self.chunker.split_text(text)
+            ]
+            self._index(batch["vector_store_id"], chunks)
+            with self._lock:
+                batch["file_counts"]["in_progress"] -= 1
+                batch["file_counts"]["completed"] += 1
+        batch["status"] = "completed"
+
+    def _batch_response(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": batch["id"],
+            "object": "vector_store.files_batch",
+            "created_at": batch["created_at"],
+            "vector_store_id": batch["vector_store_id"],
+            "status": batch["status"],
+            "file_counts": dict(batch["file_counts"]),
+        }
+
+    def handle(self, method: str, path: str, content_type: str, body: bytes) -> Tuple[str, Any]:
+        """Route one request; returns (endpoint name for the counters, JSON response)."""
+        parts = path.split("?")[0].strip("/").split("/")
+        now = int(time.time())
+
+        if method == "GET" and parts == ["v1", "models"]:
+            return "models.list", {"object": "list", "data": [{
+                "id": self.embedding_model,
+                "identifier": self.embedding_model,
+                "object": "model",
+                "created": now,
+                "owned_by": "stub",
+                "model_type": "embedding",
+                "metadata": {"embedding_dimension": self.embedding_dimension},
+            }]}
+
+        if method == "POST" and parts == ["v1", "files"]:
+            message = BytesParser(policy=email_policy).parsebytes(
+                b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body
+            )
+            upload = next(
+                part for part in message.iter_parts()
+                if part.get_param("name", header="content-disposition") == "file"
+            )
+            content = upload.get_payload(decode=True)
+            file_id = self._new_id("file")
+            with self._lock:
+                self.files[file_id] = content.decode("utf-8", errors="replace")
+            return "files.create", {
+                "id": file_id, "object": "file", "bytes": len(content), "created_at": now,
+                "filename": upload.get_filename(), "purpose": "assistants", "status": "processed",
+            }
+
+        if method == "POST" and parts == ["v1", "vector_stores"]:
+            request = json.loads(body)
+            vector_store_id = self._new_id("vs")
+            with self._lock:
+                self.stores[vector_store_id] = []
+            return "vector_stores.create", {
+                "id": vector_store_id, "object": "vector_store", "name": request.get("name"),
+                "created_at": now, "status": "completed", "usage_bytes": 0,
+                "file_counts": {"in_progress": 0, "completed": 0, "failed": 0, "cancelled": 0, "total": 0},
+            }
+
+        if method == "POST" and parts[:2] == ["v1", "vector_stores"] and parts[3:] == ["file_batches"]:
+            request = json.loads(body)
+            file_ids = request.get("file_ids", [])
+            batch = {
+                "id": self._new_id("vsfb"),
+                "created_at": now,
+                "vector_store_id": parts[2],
+                "file_ids": file_ids,
+                "status": "in_progress",
+                "file_counts": {
+                    "in_progress": len(file_ids), "completed": 0, "failed": 0, "cancelled": 0, "total": len(file_ids)
+                },
+            }
+            with self._lock:
+                self.batches[batch["id"]] = batch
+            threading.Thread(target=self._process_batch, args=(batch,), daemon=True).start()
+            return "file_batches.create", self._batch_response(batch)
+
+        if method == "GET" and parts[:2] == ["v1", "vector_stores"] and parts[3:4] == ["file_batches"]:
+            return "file_batches.retrieve", self._batch_response(self.batches[parts[4]])
+
+        if method == "POST" and parts == ["v1", "embeddings"]:
+            request = json.loads(body)
+            texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+            time.sleep(len(texts) * self.embed_seconds_per_chunk)
+            return "embeddings.create", {
+                "object": "list",
+                "model": request["model"],
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": [(len(text) % 7) / 7.0] * self.embedding_dimension}
+                    for i, text in enumerate(texts)
+                ],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            }
+
+        if method == "POST" and parts == ["v1", "vector-io", "insert"]:
+            request = json.loads(body)
+            self._index(request["vector_db_id"], request["chunks"])
+            return "vector_io.insert", None
+
+        if method == "POST" and parts == ["v1", "vector-io", "query"]:
+            request = json.loads(body)
+            max_chunks = (request.get("params") or {}).get("max_chunks", 5)
+            words = str(request.get("query", "")).lower().split()
+            with self._lock:
+                chunks = list(self.stores.get(request["vector_db_id"], []))
+            matches = [
+                {"content": chunk["content"], "metadata": chunk.get("metadata", {})}
+                for chunk in chunks
+                if any(word in chunk["content"].lower() for word in words)
+            ][:max_chunks]
+            return "vector_io.query", {"chunks": matches, "scores": [1.0] * len(matches)}
+
+        raise KeyError(f"{method} {path}")
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real server
+            disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                received = len(self.raw_requestline) + len(str(self.headers).encode("latin-1")) + len(body)
+                encoding = self.headers.get("Content-Encoding")
+                if encoding == "gzip":
+                    body = gzip.decompress(body)
+                elif encoding == "zstd":
+                    body = zstandard.ZstdDecompressor().decompress(body)
+                time.sleep(stub.request_latency)
+
+                try:
+                    endpoint, response = stub.handle(
+                        self.command, self.path, self.headers.get("Content-Type", ""), body
+                    )
+                    status = 200
+                except KeyError:
+                    endpoint, response, status = "unknown", {"detail": f"Not found: {self.path}"}, 404
+
+                payload = json.dumps(response).encode("utf-8")
+                with stub._lock:
+                    stub.requests[endpoint] = stub.requests.get(endpoint, 0) + 1
+                    stub.bytes_received += received
+                    stub.bytes_sent += len(payload)
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.send_header("openai-poll-after-ms", str(stub.poll_after_ms))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _serve
+            do_POST = _serve
+            do_DELETE = _serve
+
+            def do_OPTIONS(self):
+                # Request body encodings the stub decodes (checked before compressed inserts)
+                self.send_response(204)
+                self.send_header("Accept-Encoding", "gzip, zstd" if ZSTD_AVAILABLE else "gzip")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass  # Keep the benchmark output readable
+
+        return Handler
+
+
+# =============================================================================
+# A/B RUNS
+# =============================================================================
+
+def write_corpus(directory: Path, text: str, files: int):
+    """Cut a corpus into `files` Markdown documents (read by both modes)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for i, content in enumerate(split_documents(text, files)):
+        (directory / f"doc_{i:05d}.md").write_text(content, encoding="utf-8")
+
+
+def run_mode(mode: str, stub: StubLlamaStack, documents_dir: Path, args: argparse.Namespace) -> Dict[str, Any]:
+    """Ingest documents_dir through one upload mode and measure it on the stub."""
+    common = {
+        "llama_stack_url": stub.url,
+        "documents_dir": str(documents_dir),
+        "embedding_model": stub.embedding_model,
+        "embedding_dimension": stub.embedding_dimension,
+        "vector_store_name": f"ab_{mode}",
+        "model_registry_path": None,  # Don't cache the stub's models
+        "verbose": args.verbose,
+    }
+
+    stub.reset()
+    output = io.StringIO()
+    redirect = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(output)
+    with tempfile.TemporaryDirectory(prefix="bench_ab_") as workdir, redirect:
+        start = time.perf_counter()
+        if mode == "server":
+            upload_documents_to_milvus(MilvusUploadConfig(upload_workers=args.upload_workers, **common))
+        else:
+            upload_documents_with_local_chunking(MilvusLocalChunkingConfig(
+                chunk_size=args.chunk_size,
+                chunk_overlap=args.chunk_overlap,
+                max_chunk_chars=args.max_chunk_chars,
+                structure_aware=args.structure_aware,
+                batch_size=args.batch_size,
+                insert_concurrency=args.insert_concurrency,
+                max_batch_bytes=args.max_batch_bytes,
+                embedding_cache_path=str(Path(workdir) / "embeddings.sqlite") if args.embedding_cache else None,
+                pipeline=args.pipeline,
+                pipeline_report_interval=None,
+                insert_transport=args.insert_transport,
+                insert_compression=args.insert_compression,
+                **common
+            ))
+        wall = time.perf_counter() - start
+
+    stats = stub.snapshot()
+    first = stats.pop("first_searchable_at")
+    return {
+        "mode": mode,
+        "wall_seconds": round(wall, 4),
+        "first_searchable_seconds": round(first - start, 4) if first is not None else None,
+        **stats,
+    }
+
+
+def print_comparison(results: List[Dict[str, Any]]):
+    """Print one row per mode, and the local/server ratios when both ran."""
+    print(
+        f"{'mode':<8} {'wall (s)':>9} {'first (s)':>10} {'requests':>9} {'MB sent':>9} {'chunks':>8}  requests by endpoint"
+    )
+    for result in results:
+        first = result["first_searchable_seconds"]
+        endpoints = ", ".join(f"{name} {count}" for name, count in result["requests_by_endpoint"].items())
+        print(
+            f"{result['mode']:<8} {result['wall_seconds']:>9.2f} "
+            f"{first if first is not None else float('nan'):>10.2f} {result['requests']:>9} "
+            f"{result['bytes_received'] / (1024 * 1024):>9.2f} {result['indexed_chunks']:>8}  {endpoints}"
+        )
+
+    by_mode = {result["mode"]: result for result in results}
+    if "server" in by_mode and "local" in by_mode:
+        server, local = by_mode["server"], by_mode["local"]
+
+        def ratio(key: str) -> str:
+            return f"{local[key] / server[key]:.2f}x" if server[key] and local[key] is not None else "n/a"
+
+        print(
+            f"local/server: wall {ratio('wall_seconds')}, first searchable {ratio('first_searchable_seconds')}, "
+            f"requests {ratio('requests')}, bytes sent {ratio('bytes_received')}"
+        )
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="A/B harness: server-side vs local chunking against a local stub server"
+    )
+    source = parser.add_argument_group("corpus")
+    source.add_argument("--documents-dir", help="Ingest this directory instead of a synthetic corpus")
+    source.add_argument("--size-mb", type=float, default=2.0, help="Synthetic corpus size in MB (default: 2)")
+    source.add_argument("--kind", default="markdown", help="Synthetic corpus kind, see bench_chunker (default: markdown)")
+    source.add_argument("--files", type=int, default=100, help="Documents the corpus is cut into (default: 100)")
+    source.add_argument("--seed", type=int, default=42, help="Corpus generator seed (default: 42)")
+
+    stub_options = parser.add_argument_group("stub server cost model")
+    stub_options.add_argument("--request-latency-ms", type=float, default=5.0, help="Latency of every request (default: 5)")
+    stub_options.add_argument("--embed-ms-per-chunk", type=float, default=2.0, help="Embedding time per chunk (default: 2)")
+    stub_options.add_argument("--embedding-dimension", type=int, default=768)
+
+    modes = parser.add_argument_group("upload modes")
+    modes.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes to run (default: server,local)")
+    modes.add_argument("--upload-workers", type=int, default=4, help="Server-side mode: concurrent file uploads (default: 4)")
+    modes.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    modes.add_argument("--chunk-overlap", type=int, default=DEFAULT_CHUNK_OVERLAP)
+    modes.add_argument("--max-chunk-chars", type=int, default=DEFAULT_MAX_CHUNK_CHARS)
+    modes.add_argument("--structure-aware", action="store_true")
+    modes.add_argument("--batch-size", type=int, default=50, help="Local mode: chunks per insert (default: 50)")
+    modes.add_argument("--insert-concurrency", type=int, default=4, help="Local mode: inserts in flight (default: 4)")
+    modes.add_argument("--max-batch-bytes", type=int, help="Local mode: payload budget per insert")
+    modes.add_argument("--embedding-cache", action="store_true", help="Local mode: embed client-side through /v1/embeddings")
+    modes.add_argument("--pipeline", action="store_true", help="Local mode: run the async pipeline")
+    modes.add_argument(
+        "--insert-transport", choices=INSERT_TRANSPORTS, default="sdk", help="Local mode: insert request encoding (default: sdk)"
+    )
+    modes.add_argument(
+        "--insert-compression",
+        choices=list(INSERT_COMPRESSION_LEVELS),
+        default="identity",
+        help="Local mode: compress bulk insert bodies (default: identity)"
+    )
+
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the upload functions")
+    args = parser.parse_args(argv)
+
+    selected = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in selected if mode not in MODES]
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(unknown)}")
+    if "local" in selected and not LLAMA_STACK_CLIENT_AVAILABLE:
+        parser.error("local mode requires llama_stack_client. Install with: pip install llama-stack-client")
+
+    if args.insert_compression != "identity" and args.insert_transport != "bulk":
+        parser.error("--insert-compression requires --insert-transport bulk")
+    if args.insert_compression == "zstd" and not ZSTD_AVAILABLE:
+        parser.error("zstd compression requires zstandard. Install with: pip install zstandard")
+
+    if not args.verbose:
+        logging.getLogger("httpx").setLevel(logging.WARNING)  # One INFO line per request otherwise
+
+    stub = StubLlamaStack(
+        embedding_model="stub-embedding",
+        embedding_dimension=args.embedding_dimension,
+        request_latency=args.request_latency_ms / 1000,
+        embed_seconds_per_chunk=args.embed_ms_per_chunk / 1000
+    ).start()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_ab_corpus_"))
+    try:
+        if args.documents_dir:
+            documents_dir = Path(args.documents_dir)
+            print(f"📁 Corpus: {documents_dir}")
+        else:
+            documents_dir = workdir / "documents"
+            write_corpus(documents_dir, generate_corpus(args.kind, int(args.size_mb * 1024 * 1024), seed=args.seed), args.files)
+            print(f"📏 Corpus: {args.size_mb} MB of '{args.kind}' in {args.files} files")
+        print(
+            f"🧪 Stub at {stub.url}: {args.request_latency_ms} ms/request, "
+            f"{args.embed_ms_per_chunk} ms/chunk embedding"
+        )
+
+        results = [run_mode(mode, stub, documents_dir, args) for mode in selected]
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_comparison(results)
+
+    if args.output:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": vars(args),
+            "results": results
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"💾 Results saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
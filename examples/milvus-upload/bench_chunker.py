@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: TextChunker vs SpanTextChunker.
+
+Generates large synthetic corpora, checks that both chunkers produce identical
+chunks and reports the time and peak memory taken by each one.
+"""
+
+import gc
+import sys
+import time
+import random
+import tracemalloc
+import argparse
+
+from milvus_upload import TextChunker, SpanTextChunker, DEFAULT_CHUNK_SIZE, DEFAULT_CHUNK_OVERLAP
+
+
+WORDS = [
+    "milvus", "vector", "store", "embedding", "chunk", "overlap", "pod", "namespace",
+    "deployment", "route", "llama", "stack", "inference", "the", "a", "of", "and",
+    "configuration", "troubleshooting", "CrashLoopBackOff", "OpenShift", "cluster",
+]
+
+# CJK text has no spaces between words, only sentence punctuation
+CJK_WORDS = [
+    "向量", "数据库", "嵌入", "分块", "重叠", "集群", "部署", "路由", "推理", "配置",
+    "故障排除", "命名空间", "ベクトル", "データベース", "検索", "문서", "검색", "모델",
+]
+
+
+def generate_corpus(kind: str, size: int, seed: int = 42) -> str:
+    """
+    Generate a synthetic corpus of roughly `size` characters.
+
+    Kinds:
+        markdown: headings, paragraphs and lists (splits on "\\n\\n")
+        lines: long single-newline separated lines
+        words: one huge paragraph of words (splits on " ")
+        noseps: no separators at all (character splitting)
+        cjk: CJK paragraphs without spaces (line, then character splitting)
+    """
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    sep = ""
+
+    while length < size:
+        if kind == "markdown":
+            heading = f"## {' '.join(rng.choices(WORDS, k=rng.randint(2, 5))).title()}"
+            sentences = [
+                " ".join(rng.choices(WORDS, k=rng.randint(6, 20))).capitalize() + "."
+                for _ in range(rng.randint(2, 8))
+            ]
+            items = "\n".join(f"- {' '.join(rng.choices(WORDS, k=4))}" for _ in range(rng.randint(0, 4)))
+            part = "\n\n".join(p for p in (heading, " ".join(sentences), items) if p)
+            sep = "\n\n"
+        elif kind == "lines":
+            part = " ".join(rng.choices(WORDS, k=rng.randint(50, 400)))
+            sep = "\n"
+        elif kind == "words":
+            part = rng.choice(WORDS)
+            sep = " "
+        elif kind == "noseps":
+            part = "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789", k=1000))
+            sep = ""
+        elif kind == "cjk":
+            sentences = [
+                "".join(rng.choices(CJK_WORDS, k=rng.randint(5, 30))) + rng.choice("。！？")
+                for _ in range(rng.randint(3, 40))
+            ]
+            # Mostly single-newline lines, with an occasional paragraph break
+            part = ("\n" if rng.random() < 0.3 else "") + "".join(sentences)
+            sep = "\n"
+        else:
+            raise ValueError(f"Unknown corpus kind: {kind}")
+
+        parts.append(part)
+        length += len(part) + len(sep)
+
+    return sep.join(parts)[:size]
+
+
+def time_split(chunker: TextChunker, text: str, repeat: int):
+    """Return (best time in seconds, chunks) over `repeat` runs."""
+    best = float("inf")
+    chunks = []
+    gc.disable()  # Keep collector pauses out of the measurement, like timeit
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chunks = chunker.split_text(text)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, chunks
+
+
+def peak_memory_mb(chunker: TextChunker, text: str) -> float:
+    """Peak memory allocated by one split_text call, in MB."""
+    tracemalloc.start()
+    try:
+        chunker.split_text(text)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TextChunker and SpanTextChunker")
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Corpus size in MB (default: 5)")
+    parser.add_argument(
+        "--kinds",
+        default="markdown,lines,words,noseps,cjk",
+        help="Comma-separated corpus kinds (default: markdown,lines,words,noseps,cjk)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per chunker, best is reported (default: 3)")
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    legacy = TextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    linear = SpanTextChunker(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    print(f"📏 Corpus size: {args.size_mb} MB, chunk size {args.chunk_size}, overlap {args.chunk_overlap}")
+    print(
+        f"{'corpus':<10} {'chunks':>9} {'legacy (s)':>11} {'span (s)':>9} {'MB/s':>8} {'speedup':>8} "
+        f"{'legacy MB':>10} {'span MB':>8}"
+    )
+
+    mismatches = 0
+    for kind in args.kinds.split(","):
+        text = generate_corpus(kind, size)
+        legacy_time, legacy_chunks = time_split(legacy, text, args.repeat)
+        linear_time, linear_chunks = time_split(linear, text, args.repeat)
+
+        identical = legacy_chunks == linear_chunks
+        if not identical:
+            mismatches += 1
+
+        mb_per_s = (len(text) / (1024 * 1024)) / linear_time if linear_time else float("inf")
+        speedup = legacy_time / linear_time if linear_time else float("inf")
+        print(
+            f"{kind:<10} {len(linear_chunks):>9} {legacy_time:>11.3f} {linear_time:>9.3f} "
+            f"{mb_per_s:>8.1f} {speedup:>7.1f}x "
+            f"{peak_memory_mb(legacy, text):>10.1f} {peak_memory_mb(linear, text):>8.1f} "
+            f"{'✅' if identical else '❌ output differs'}"
+        )
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
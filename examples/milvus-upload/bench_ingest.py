@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the chunkers and document loaders.
+
+Runs every benchmark on synthetic corpora (see bench_chunker.generate_corpus)
+without any network access and reports, per benchmark and corpus, the
+throughput (MB/s of source text), peak memory and a histogram of the sizes of
+what was produced (chunks, or documents for the loaders). Results are saved as
+JSON; pass a previous results file as --baseline to fail on regressions:
+
+    python bench_ingest.py --output bench.json
+    python bench_ingest.py --baseline bench.json --max-regression 0.2
+
+Baselines are only comparable when measured on the same kind of machine.
+"""
+
+import gc
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import tracemalloc
+from pathlib import Path
+from functools import partial
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from bench_chunker import generate_corpus
+from milvus_upload import (
+    TextChunker,
+    SpanTextChunker,
+    MarkdownStructureChunker,
+    chunk_document,
+    load_documents_from_directory,
+    load_documents_from_json,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_MAX_CHUNK_CHARS,
+)
+
+
+BENCHMARKS = [
+    "split_text_legacy",
+    "split_text_span",
+    "structure_chunker",
+    "merge_small_chunks",
+    "chunk_document",
+    "load_directory",
+    "load_json",
+]
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def time_call(func: Callable[[], Any], repeat: int):
+    """Return (best time in seconds, result of the last call) over `repeat` runs."""
+    best = float("inf")
+    result = None
+    gc.disable()  # Keep collector pauses out of the measurement, like timeit
+    try:
+        for _ in range(repeat):
+            result = None  # Don't keep the previous result alive during the run
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, result
+
+
+def peak_memory_mb(func: Callable[[], Any]) -> float:
+    """Peak memory allocated by one call, in MB."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def size_summary(sizes: Sequence[int]) -> Dict[str, Any]:
+    """Percentiles and a power-of-two histogram of item sizes (in characters)."""
+    if not sizes:
+        return {"count": 0, "histogram": {}}
+
+    ordered = sorted(sizes)
+
+    def percentile(p: float) -> int:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    histogram = {}
+    for size in ordered:
+        upper = 1 << max(0, size - 1).bit_length()
+        lower = upper // 2 + 1 if upper > 1 else 0
+        label = f"{lower}-{upper}" if lower < upper else str(upper)
+        histogram[label] = histogram.get(label, 0) + 1
+
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "p50": percentile(0.50),
+        "p90": percentile(0.90),
+        "p99": percentile(0.99),
+        "max": ordered[-1],
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "histogram": histogram
+    }
+
+
+def print_histogram(histogram: Dict[str, int], width: int = 40):
+    """Print a histogram as horizontal bars."""
+    if not histogram:
+        return
+    peak = max(histogram.values())
+    for label, count in histogram.items():
+        bar = "█" * max(1, round(width * count / peak))
+        print(f"      {label:>13} {count:>8} {bar}")
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+def split_documents(text: str, count: int) -> List[str]:
+    """Cut a corpus into `count` documents of about equal size."""
+    size = max(1, len(text) // count)
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def prepare_benchmark(
+    name: str,
+    text: str,
+    workdir: Path,
+    args: argparse.Namespace
+) -> Callable[[], List[Any]]:
+    """
+    Build the zero-argument callable measured for one benchmark and corpus.
+
+    Setup (writing files, pre-splitting for the merge benchmark) happens here,
+    outside of the measurement. The callable returns the produced items.
+    """
+    options = {"chunk_size": args.chunk_size, "chunk_overlap": args.chunk_overlap}
+
+    if name == "split_text_legacy":
+        return partial(TextChunker(**options).split_text, text)
+    if name == "split_text_span":
+        return partial(SpanTextChunker(**options).split_text, text)
+    if name == "structure_chunker":
+        return partial(MarkdownStructureChunker(**options).split_text, text)
+    if name == "merge_small_chunks":
+        chunker = TextChunker(**options)
+        pieces = chunker._split_text_recursive(text, chunker.separators)
+        return partial(chunker._merge_small_chunks, pieces)
+    if name == "chunk_document":
+        token_options = {}
+        if args.tokenizer:
+            token_options = {"max_chunk_tokens": args.max_chunk_tokens, "tokenizer_name": args.tokenizer}
+        return lambda: chunk_document(
+            text, "bench", metadata={"source_type": "bench"},
+            max_chunk_chars=args.max_chunk_chars, **options, **token_options
+        )
+    if name == "load_directory":
+        directory = workdir / "documents"
+        directory.mkdir()
+        for i, content in enumerate(split_documents(text, args.files)):
+            (directory / f"doc_{i:05d}.md").write_text(content, encoding="utf-8")
+        return lambda: load_documents_from_directory(directory, verbose=False)
+    if name == "load_json":
+        json_path = workdir / "documents.jsonl"
+        with open(json_path, "w", encoding="utf-8") as f:
+            for i, content in enumerate(split_documents(text, args.files)):
+                f.write(json.dumps({"id": f"doc_{i}", "content": content, "metadata": {"index": i}}) + "\n")
+        return lambda: load_documents_from_json(json_path)
+    raise ValueError(f"Unknown benchmark: {name}")
+
+
+def item_size(item: Any) -> int:
+    """Size of a produced item: a chunk string, or a chunk/document dict's content."""
+    return len(item["content"]) if isinstance(item, dict) else len(item)
+
+
+def run_benchmark(name: str, kind: str, text: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Measure one benchmark on one corpus."""
+    with tempfile.TemporaryDirectory(prefix="bench_ingest_") as workdir:
+        func = prepare_benchmark(name, text, Path(workdir), args)
+        seconds, items = time_call(func, args.repeat)
+        sizes = [item_size(item) for item in items]
+        del items
+        peak_mb = peak_memory_mb(func) if not args.no_memory else None
+
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    return {
+        "benchmark": name,
+        "corpus": kind,
+        "size_mb": round(size_mb, 3),
+        "seconds": round(seconds, 6),
+        "mb_per_s": round(size_mb / seconds, 3) if seconds else None,
+        "peak_memory_mb": round(peak_mb, 3) if peak_mb is not None else None,
+        "sizes": size_summary(sizes)
+    }
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    max_regression: float
+) -> List[str]:
+    """Messages for every result whose throughput dropped more than max_regression."""
+    previous = {(r["benchmark"], r["corpus"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = previous.get((result["benchmark"], result["corpus"]))
+        if not old or not old.get("mb_per_s") or not result["mb_per_s"]:
+            continue
+        change = result["mb_per_s"] / old["mb_per_s"] - 1
+        if change < -max_regression:
+            regressions.append(
+                f"{result['benchmark']} [{result['corpus']}]: "
+                f"{old['mb_per_s']:.1f} -> {result['mb_per_s']:.1f} MB/s ({change:+.0%})"
+            )
+    return regressions
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the chunkers and document loaders")
+    parser.add_argument("--size-mb", type=float, default=2.0, help="Corpus size in MB (default: 2)")
+    parser.add_argument(
+        "--kinds",
+        default="markdown,lines,noseps,cjk",
+        help="Comma-separated corpus kinds (default: markdown,lines,noseps,cjk)"
+    )
+    parser.add_argument(
+        "--benchmarks",
+        default=",".join(BENCHMARKS),
+        help=f"Comma-separated benchmarks (default: all of {','.join(BENCHMARKS)})"
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument("--max-chunk-chars", type=int, default=DEFAULT_MAX_CHUNK_CHARS)
+    parser.add_argument("--tokenizer", help="Benchmark chunk_document in token mode with this tokenizer")
+    parser.add_argument("--max-chunk-tokens", type=int, default=512, help="Token budget with --tokenizer (default: 512)")
+    parser.add_argument("--files", type=int, default=100, help="Documents the corpus is cut into for the loaders (default: 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, best is reported (default: 3)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the (slower) peak memory measurement")
+    parser.add_argument("--histograms", action="store_true", help="Print the size histogram of every result")
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    parser.add_argument("--baseline", help="Previous results JSON to compare throughput against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Fail when throughput drops by more than this fraction of the baseline (default: 0.2)"
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Corpus generator seed (default: 42)")
+    args = parser.parse_args(argv)
+
+    benchmarks = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = [name for name in benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    size = int(args.size_mb * 1024 * 1024)
+    print(f"📏 Corpus size: {args.size_mb} MB, chunk size {args.chunk_size}, overlap {args.chunk_overlap}")
+    print(f"{'benchmark':<20} {'corpus':<10} {'items':>8} {'time (s)':>9} {'MB/s':>8} {'peak MB':>8} {'p50':>6} {'p99':>6} {'max':>6}")
+
+    results = []
+    for kind in args.kinds.split(","):
+        text = generate_corpus(kind, size, seed=args.seed)
+        for name in benchmarks:
+            result = run_benchmark(name, kind, text, args)
+            results.append(result)
+            sizes = result["sizes"]
+            peak = f"{result['peak_memory_mb']:>8.1f}" if result["peak_memory_mb"] is not None else f"{'-':>8}"
+            print(
+                f"{name:<20} {kind:<10} {sizes['count']:>8} {result['seconds']:>9.3f} "
+                f"{result['mb_per_s'] or float('inf'):>8.1f} {peak} "
+                f"{sizes.get('p50', 0):>6} {sizes.get('p99', 0):>6} {sizes.get('max', 0):>6}"
+            )
+            if args.histograms:
+                print_histogram(sizes["histogram"])
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": vars(args),
+        "results": results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"💾 Results saved to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_with_baseline(results, baseline, args.max_regression)
+        if regressions:
+            print(f"❌ {len(regressions)} throughput regression(s) beyond {args.max_regression:.0%}:")
+            for message in regressions:
+                print(f"   {message}")
+            return 1
+        print(f"✅ No throughput regression beyond {args.max_regression:.0%} of {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of vector_io.insert request encoding.
+
+Builds the insert batches of a corpus exactly as the local chunking upload
+does, then sends them through each request encoding to an in-memory httpx
+transport (no server, no network), and reports the client time per batch and
+the bytes each encoding puts on the wire:
+
+    python bench_insert.py --size-mb 5 --batch-size 100
+    python bench_insert.py --embedding-dimension 768 --output insert.json
+
+"sdk" is today's path (llama_stack_client vector_io.insert); the "bulk"
+variants use BulkInsertTransport with a JSON encoder and an optional
+compression. It also reports how many bytes the document metadata repeated on
+every chunk costs, before and after compression.
+
+--embedding-dimension attaches float32 vectors to the chunks, like an upload
+with an embedding cache; they are random, so they compress about as badly as
+real embeddings.
+"""
+
+import sys
+import json
+import time
+import random
+import logging
+import platform
+import tempfile
+import argparse
+from array import array
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench_chunker import generate_corpus
+from bench_ab import write_corpus
+from milvus_upload import (
+    BulkInsertTransport,
+    load_documents_from_directory,
+    iter_chunked_documents,
+    iter_insert_batches,
+    encode_json,
+    compress_body,
+    LLAMA_STACK_CLIENT_AVAILABLE,
+    ORJSON_AVAILABLE,
+    ZSTD_AVAILABLE,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_MAX_CHUNK_CHARS,
+)
+
+if LLAMA_STACK_CLIENT_AVAILABLE:
+    from llama_stack_client import LlamaStackClient
+
+
+BENCH_URL = "http://bench.invalid"
+BENCH_STORE_ID = "vs_bench"
+
+# (encoder, compression) of each bulk variant
+BULK_VARIANTS = {
+    "bulk-json": ("json", None),
+    "bulk-orjson": ("orjson", None),
+    "bulk-json-gzip": ("json", "gzip"),
+    "bulk-orjson-gzip": ("orjson", "gzip"),
+    "bulk-orjson-zstd": ("orjson", "zstd"),
+}
+VARIANTS = ["sdk", *BULK_VARIANTS]
+
+
+# =============================================================================
+# BATCHES
+# =============================================================================
+
+def build_batches(documents_dir: Path, batch_size: int, embedding_dimension: int, seed: int) -> List[List[Dict[str, Any]]]:
+    """Chunk and format a directory into insert batches, optionally with float32 embeddings."""
+    documents = load_documents_from_directory(documents_dir, verbose=False)
+    chunks = (
+        chunk
+        for _, doc_chunks in iter_chunked_documents(
+            documents,
+            chunk_size=DEFAULT_CHUNK_SIZE,
+            chunk_overlap=DEFAULT_CHUNK_OVERLAP,
+            max_chunk_chars=DEFAULT_MAX_CHUNK_CHARS
+        )
+        for chunk in doc_chunks
+    )
+    batches = [batch for _, batch in iter_insert_batches(chunks, batch_size=batch_size)]
+
+    if embedding_dimension:
+        rng = random.Random(seed)
+        for batch in batches:
+            for chunk in batch:
+                # Through float32, like vectors read back from the embedding cache
+                chunk["embedding"] = array("f", (rng.uniform(-0.1, 0.1) for _ in range(embedding_dimension))).tolist()
+    return batches
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def recording_client(sent: List[int]) -> httpx.Client:
+    """httpx client that answers every request locally and records its body size."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(len(request.content))
+        return httpx.Response(200)
+
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def insert_function(variant: str, sent: List[int]) -> Callable[[List[Dict[str, Any]]], None]:
+    """Send one batch through a variant's request encoding."""
+    if variant == "sdk":
+        client = LlamaStackClient(base_url=BENCH_URL, http_client=recording_client(sent), max_retries=0)
+        return lambda batch: client.vector_io.insert(vector_db_id=BENCH_STORE_ID, chunks=batch)
+
+    encoder, compression = BULK_VARIANTS[variant]
+    transport = BulkInsertTransport(BENCH_URL, recording_client(sent), compression=compression, encoder=encoder)
+    return lambda batch: transport.insert(BENCH_STORE_ID, batch)
+
+
+def run_variant(variant: str, batches: List[List[Dict[str, Any]]], repeat: int) -> Dict[str, Any]:
+    """Best-of-repeat client time and wire bytes of sending every batch."""
+    best = float("inf")
+    for _ in range(repeat):
+        sent = []
+        insert = insert_function(variant, sent)
+        start = time.perf_counter()
+        for batch in batches:
+            insert(batch)
+        best = min(best, time.perf_counter() - start)
+
+    chunks = sum(len(batch) for batch in batches)
+    return {
+        "variant": variant,
+        "seconds": round(best, 4),
+        "ms_per_batch": round(best * 1000 / len(batches), 3),
+        "chunks_per_sec": round(chunks / max(best, 1e-9), 1),
+        "bytes_sent": sum(sent),
+    }
+
+
+def metadata_overhead(batches: List[List[Dict[str, Any]]], compression: Optional[str]) -> Tuple[int, int]:
+    """Body bytes with and without the metadata repeated on every chunk (document_id kept)."""
+    def size(body_batches) -> int:
+        return sum(
+            len(compress_body(encode_json({"vector_db_id": BENCH_STORE_ID, "chunks": batch}, "json"), compression))
+            for batch in body_batches
+        )
+
+    lean = [
+        [{**chunk, "metadata": {"document_id": chunk["metadata"]["document_id"]}} for chunk in batch]
+        for batch in batches
+    ]
+    return size(batches), size(lean)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark vector_io.insert request encodings offline")
+    source = parser.add_argument_group("corpus")
+    source.add_argument("--documents-dir", help="Chunk this directory instead of a synthetic corpus")
+    source.add_argument("--size-mb", type=float, default=2.0, help="Synthetic corpus size in MB (default: 2)")
+    source.add_argument("--kind", default="markdown", help="Synthetic corpus kind, see bench_chunker (default: markdown)")
+    source.add_argument("--files", type=int, default=100, help="Documents the corpus is cut into (default: 100)")
+    source.add_argument("--seed", type=int, default=42, help="Corpus and embedding generator seed (default: 42)")
+
+    parser.add_argument("--batch-size", type=int, default=50, help="Chunks per insert request (default: 50)")
+    parser.add_argument(
+        "--embedding-dimension",
+        type=int,
+        default=0,
+        help="Attach embeddings of this dimension to every chunk (default: 0 = server embeds)"
+    )
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"Comma-separated (default: {','.join(VARIANTS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant, the best is kept (default: 3)")
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    selected = [variant.strip() for variant in args.variants.split(",") if variant.strip()]
+    unknown = [variant for variant in selected if variant not in VARIANTS]
+    if unknown:
+        parser.error(f"Unknown variants: {', '.join(unknown)}")
+    skipped = {
+        "sdk": None if LLAMA_STACK_CLIENT_AVAILABLE else "llama-stack-client",
+        **{
+            name: "orjson" if encoder == "orjson" and not ORJSON_AVAILABLE
+            else "zstandard" if compression == "zstd" and not ZSTD_AVAILABLE
+            else None
+            for name, (encoder, compression) in BULK_VARIANTS.items()
+        },
+    }
+    for variant in [variant for variant in selected if skipped[variant]]:
+        print(f"⚠️  Skipping {variant}: pip install {skipped[variant]}")
+    selected = [variant for variant in selected if not skipped[variant]]
+    if not selected:
+        parser.error("No variant can run here")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # One INFO line per request otherwise
+
+    with tempfile.TemporaryDirectory(prefix="bench_insert_") as workdir:
+        if args.documents_dir:
+            documents_dir = Path(args.documents_dir)
+            print(f"📁 Corpus: {documents_dir}")
+        else:
+            documents_dir = Path(workdir)
+            write_corpus(documents_dir, generate_corpus(args.kind, int(args.size_mb * 1024 * 1024), seed=args.seed), args.files)
+            print(f"📏 Corpus: {args.size_mb} MB of '{args.kind}' in {args.files} files")
+        batches = build_batches(documents_dir, args.batch_size, args.embedding_dimension, args.seed)
+
+    chunks = sum(len(batch) for batch in batches)
+    vectors = f"{args.embedding_dimension}-dim embeddings" if args.embedding_dimension else "no embeddings"
+    print(f"📦 {chunks} chunks in {len(batches)} batches of up to {args.batch_size}, {vectors}\n")
+
+    results = [run_variant(variant, batches, args.repeat) for variant in selected]
+    baseline = next((result for result in results if result["variant"] == "sdk"), results[0])
+    print(f"{'variant':<18} {'ms/batch':>9} {'chunks/s':>10} {'MB sent':>9} {'time':>7} {'bytes':>7}")
+    for result in results:
+        result["time_vs_baseline"] = round(result["seconds"] / max(baseline["seconds"], 1e-9), 3)
+        result["bytes_vs_baseline"] = round(result["bytes_sent"] / max(baseline["bytes_sent"], 1), 3)
+        print(
+            f"{result['variant']:<18} {result['ms_per_batch']:>9.2f} {result['chunks_per_sec']:>10.0f} "
+            f"{result['bytes_sent'] / (1024 * 1024):>9.2f} {result['time_vs_baseline']:>6.2f}x "
+            f"{result['bytes_vs_baseline']:>6.2f}x"
+        )
+    print(f"(time and bytes relative to {baseline['variant']})")
+
+    compressions = [None] + [
+        compression for compression in ("gzip", "zstd")
+        if any(BULK_VARIANTS.get(variant, (None, None))[1] == compression for variant in selected)
+    ]
+    overhead = {}
+    print("\nRepeated document metadata:")
+    for compression in compressions:
+        full, lean = metadata_overhead(batches, compression)
+        overhead[compression or "none"] = {"body_bytes": full, "metadata_bytes": full - lean}
+        print(
+            f"   {compression or 'uncompressed':<13} {(full - lean) / 1024:>9.1f} KB "
+            f"({(full - lean) / max(full, 1):.0%} of the body, {(full - lean) / max(chunks, 1):.0f} bytes/chunk)"
+        )
+
+    if args.output:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": vars(args),
+            "chunks": chunks,
+            "batches": len(batches),
+            "results": results,
+            "metadata_overhead": overhead,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"💾 Results saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
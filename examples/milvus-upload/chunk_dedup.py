@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Exact and near-duplicate chunk detection for the local chunking upload.
+
+ChunkDeduplicator drops repeated boilerplate (headers, license blocks,
+navigation text) from a chunk stream before it is embedded, keeping only
+hashes, MinHash signatures and a bounded window of kept chunks in memory:
+
+    from chunk_dedup import ChunkDeduplicator
+
+    deduplicator = ChunkDeduplicator(threshold=0.85, merge_window=256)
+    for chunk in deduplicator.deduplicate(chunks):
+        ...
+    deduplicator.save_back_references(Path("output/duplicates.json"))
+
+Signatures are vectorised with numpy when it is installed.
+"""
+
+import os
+import re
+import json
+import zlib
+import random
+import hashlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Optional import for vectorised MinHash signatures
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# =============================================================================
+# DEDUPLICATION
+# =============================================================================
+
+_MINHASH_PRIME = (1 << 31) - 1
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class ChunkDeduplicator:
+    """
+    Drop exact and near-duplicate chunks (boilerplate, license blocks, nav text).
+    
+    Exact duplicates are found by hashing the whitespace-normalised text. Near
+    duplicates are found with MinHash signatures over word shingles, bucketed
+    by LSH banding; candidates are kept as duplicates only when their estimated
+    Jaccard similarity reaches `threshold`. The first occurrence is kept as the
+    representative.
+    
+    Kept chunks are held back in a window of the last `merge_window` kept
+    chunks, so memory stays bounded. When a chunk leaves the window, the
+    metadata of the duplicates dropped in its favour so far is merged into it:
+    
+        duplicate_count: number of chunks dropped in its favour
+        duplicate_sources: their `source` documents (at most max_back_references)
+        duplicate_chunk_ids: their chunk IDs (at most max_back_references)
+    
+    Duplicates found after their representative left the window are only in
+    back_references() and save_back_references(), which are complete once the
+    run is over.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+        max_back_references: int = 100,
+        merge_window: int = 256,
+        on_duplicate: Optional[Callable[[Dict[str, Any], str], None]] = None,
+        seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_back_references = max_back_references
+        self.merge_window = merge_window
+        self.on_duplicate = on_duplicate
+        
+        rng = random.Random(seed)
+        self.perm_a = [rng.randrange(1, _MINHASH_PRIME) for _ in range(num_perm)]
+        self.perm_b = [rng.randrange(0, _MINHASH_PRIME) for _ in range(num_perm)]
+        if NUMPY_AVAILABLE:
+            self._np_a = np.array(self.perm_a, dtype=np.uint64)
+            self._np_b = np.array(self.perm_b, dtype=np.uint64)
+        
+        self.kept: List[Tuple[Optional[str], str]] = []  # (source, chunk_id) of each kept chunk
+        self.duplicates: Dict[int, Dict[str, Any]] = {}  # kept index -> {count, sources, chunk_ids}
+        self.window: Dict[int, Dict[str, Any]] = {}  # kept index -> chunk not yet passed on, oldest first
+        self.exact_index: Dict[bytes, int] = {}
+        self.signatures: List[Optional[Tuple[int, ...]]] = []
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self.stats = {"chunks": 0, "kept": 0, "exact_duplicates": 0, "near_duplicates": 0, "chars_saved": 0}
+    
+    def shingles(self, text: str) -> set:
+        """CRC32 hashes of the lower-cased word n-grams of a text."""
+        words = _WORD_PATTERN.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+        size = self.shingle_size
+        return {
+            zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+            for i in range(len(words) - size + 1)
+        }
+    
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """MinHash signature of a text (None if it has no words)."""
+        shingles = self.shingles(text)
+        if not shingles:
+            return None
+        if NUMPY_AVAILABLE:
+            values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles)) % _MINHASH_PRIME
+            hashed = (values[:, None] * self._np_a + self._np_b) % _MINHASH_PRIME
+            return tuple(hashed.min(axis=0).tolist())
+        values = [value % _MINHASH_PRIME for value in shingles]
+        return tuple(
+            min((a * value + b) % _MINHASH_PRIME for value in values)
+            for a, b in zip(self.perm_a, self.perm_b)
+        )
+    
+    def similarity(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """Jaccard similarity estimated from two signatures."""
+        return sum(1 for a, b in zip(first, second) if a == b) / self.num_perm
+    
+    def _band_keys(self, signature: Tuple[int, ...]):
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+    
+    def add(self, chunk: Dict[str, Any]) -> Optional[str]:
+        """
+        Offer one chunk.
+        
+        Returns:
+            The chunk_id of the representative if `chunk` is a duplicate (and
+            was dropped), None if it was kept
+        """
+        self.stats["chunks"] += 1
+        content = chunk["content"]
+        exact_key = hashlib.sha1(" ".join(content.split()).encode("utf-8")).digest()
+        
+        match = self.exact_index.get(exact_key)
+        kind = "exact_duplicates"
+        signature = None
+        if match is None:
+            signature = self.signature(content)
+            kind = "near_duplicates"
+            if signature is not None:
+                for key in self._band_keys(signature):
+                    for candidate in self.buckets.get(key, ()):
+                        if self.similarity(signature, self.signatures[candidate]) >= self.threshold:
+                            match = candidate
+                            break
+                    if match is not None:
+                        break
+        
+        source = chunk.get("metadata", {}).get("source")
+        if match is not None:
+            self.stats[kind] += 1
+            self.stats["chars_saved"] += len(content)
+            entry = self.duplicates.setdefault(match, {"count": 0, "sources": set(), "chunk_ids": []})
+            entry["count"] += 1
+            if source is not None and source != self.kept[match][0] and len(entry["sources"]) < self.max_back_references:
+                entry["sources"].add(source)
+            if len(entry["chunk_ids"]) < self.max_back_references:
+                entry["chunk_ids"].append(chunk["chunk_id"])
+            representative_id = self.kept[match][1]
+            if self.on_duplicate:
+                self.on_duplicate(chunk, representative_id)
+            return representative_id
+        
+        index = len(self.kept)
+        self.kept.append((source, chunk["chunk_id"]))
+        self.signatures.append(signature)
+        self.exact_index[exact_key] = index
+        if signature is not None:
+            for key in self._band_keys(signature):
+                self.buckets.setdefault(key, []).append(index)
+        self.stats["kept"] += 1
+        return None
+    
+    def push(self, chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Offer one chunk of a stream.
+        
+        Returns:
+            The kept chunks that left the merge window, in input order, with
+            their duplicates' metadata merged in
+        """
+        if self.add(chunk) is None:
+            self.window[len(self.kept) - 1] = chunk
+        released = []
+        while len(self.window) > self.merge_window:
+            released.append(self._release(next(iter(self.window))))
+        return released
+    
+    def flush(self) -> List[Dict[str, Any]]:
+        """Release the kept chunks left in the merge window at the end of a stream."""
+        return [self._release(index) for index in list(self.window)]
+    
+    def _release(self, index: int) -> Dict[str, Any]:
+        chunk = self.window.pop(index)
+        entry = self.duplicates.get(index)
+        if not entry:
+            return chunk
+        return {
+            **chunk,
+            "metadata": {
+                **chunk.get("metadata", {}),
+                "duplicate_count": entry["count"],
+                "duplicate_sources": sorted(entry["sources"]),
+                "duplicate_chunk_ids": list(entry["chunk_ids"]),
+            }
+        }
+    
+    def deduplicate(self, chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Consume a chunk stream and yield the kept chunks (see push)."""
+        for chunk in chunks:
+            yield from self.push(chunk)
+        yield from self.flush()
+    
+    def back_references(self) -> Dict[str, Dict[str, Any]]:
+        """Representative chunk_id -> what was dropped in its favour, in input order."""
+        return {
+            self.kept[index][1]: {
+                "source": self.kept[index][0],
+                "duplicate_count": entry["count"],
+                "duplicate_sources": sorted(entry["sources"]),
+                "duplicate_chunk_ids": list(entry["chunk_ids"]),
+            }
+            for index, entry in sorted(self.duplicates.items())
+        }
+    
+    def save_back_references(self, path: Path):
+        """Write the back-references and stats as JSON (temp file + rename)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"threshold": self.threshold, "stats": self.stats, "chunks": self.back_references()},
+                f, indent=2, sort_keys=True
+            )
+        os.replace(tmp_path, path)
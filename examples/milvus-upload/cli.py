@@ -2,14 +2,39 @@
 """
 CLI for uploading documents to Milvus using Llama Stack.
 
-This script can be run directly or imported from other scripts.
+This script can be run directly or imported from other scripts. Run
+directly, it uploads with server-side chunking. The milvus-upload.py scripts
+of the examples import run_local_chunking, which parses the options of a
+local chunking upload (local_chunking_parser) and runs it.
 """
 
 import os
 import sys
+import json
 import argparse
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
 
-from milvus_upload import MilvusUploadConfig, upload_documents_to_milvus, EMBEDDING_DIMENSIONS
+from milvus_upload import (
+    MilvusUploadConfig,
+    MilvusLocalChunkingConfig,
+    upload_documents_to_milvus,
+    upload_documents_with_local_chunking,
+    plan_local_chunking,
+    vector_index_options,
+    EMBEDDING_DIMENSIONS,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_MAX_CHUNK_CHARS,
+    DEFAULT_CHUNK_OVERLAP_TOKENS,
+    DEFAULT_MODEL_REGISTRY_PATH,
+    INDEX_BUILD_PARAMS,
+    INSERT_TRANSPORTS,
+    INSERT_COMPRESSION_LEVELS,
+    METRIC_TYPES,
+    QUANTIZATION_TYPES,
+)
 
 
 def main():
@@ -28,6 +53,8 @@ Examples:
   python cli.py --url https://llama-stack.example.com
   python cli.py --documents-dir ./my-docs
   python cli.py --embedding-model granite-embedding-125m --vector-store-name my-docs
+  python cli.py --index-type HNSW --index-params '{{"M": 32}}' --metric-type COSINE
+  python cli.py --manifest output/manifest.json   # re-run to upload only changed documents
         """
     )
     parser.add_argument(
@@ -49,13 +76,40 @@ Examples:
         "--embedding-dimension",
         type=int,
         default=None,
-        help="Embedding dimension (default: auto-detect from model)"
+        help="Embedding dimension, checked against the server (default: auto-detect from the server)"
     )
     parser.add_argument(
         "--vector-store-name",
         default=None,
         help="Name for the vector store (default: auto-generated)"
     )
+    parser.add_argument(
+        "--index-type",
+        type=str.upper,
+        choices=list(INDEX_BUILD_PARAMS),
+        default=None,
+        help="Vector index of the new store (default: provider default)"
+    )
+    parser.add_argument(
+        "--index-params",
+        type=json.loads,
+        default=None,
+        help='Index build parameters as JSON, merged over the defaults, e.g. \'{"nlist": 2048}\''
+    )
+    parser.add_argument(
+        "--metric-type",
+        type=str.upper,
+        choices=list(METRIC_TYPES),
+        default=None,
+        help="Similarity metric of the new store (default: provider default)"
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=list(QUANTIZATION_TYPES),
+        default=None,
+        help="Store int8 (scalar) or PQ quantized vectors: the quantized variant of --index-type (default HNSW). "
+             "Fails unless the new store reports the quantized index"
+    )
     parser.add_argument(
         "--provider-id",
         default="inline-milvus",
@@ -72,6 +126,40 @@ Examples:
         default=300,
         help="Timeout in seconds (default: 300)"
     )
+    parser.add_argument(
+        "--upload-workers",
+        type=int,
+        default=4,
+        help="Concurrent file uploads (default: 4)"
+    )
+    parser.add_argument(
+        "--upload-retries",
+        type=int,
+        default=3,
+        help="Retries per file upload on transient errors, with jittered exponential backoff (default: 3)"
+    )
+    parser.add_argument(
+        "--allow-partial-upload",
+        action="store_true",
+        help="Create the vector store from the files that uploaded when some fail (default: fail the upload)"
+    )
+    parser.add_argument(
+        "--max-requests-per-second",
+        type=float,
+        default=None,
+        help="Client-side rate limit for upload requests (default: unlimited)"
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Content-hash manifest: upload only new or changed documents into the manifest's store, "
+             "replacing their old files and deleting those of removed documents"
+    )
+    parser.add_argument(
+        "--vector-store-id",
+        default=None,
+        help="Existing vector store to upload into (default: from --manifest, or create a new one)"
+    )
     parser.add_argument(
         "--quiet",
         action="store_true",
@@ -80,6 +168,13 @@ Examples:
     
     args = parser.parse_args()
     
+    try:
+        vector_index_options(
+            args.index_type, args.index_params, args.metric_type, args.embedding_dimension, args.quantization
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    
     print(f"🔗 Connecting to: {args.url}")
     if not args.verify_ssl:
         print("⚠️  SSL verification disabled")
@@ -93,7 +188,17 @@ Examples:
         provider_id=args.provider_id,
         verify_ssl=args.verify_ssl,
         timeout=args.timeout,
-        verbose=not args.quiet
+        verbose=not args.quiet,
+        upload_workers=args.upload_workers,
+        upload_retries=args.upload_retries,
+        allow_partial_upload=args.allow_partial_upload,
+        max_requests_per_second=args.max_requests_per_second,
+        index_type=args.index_type,
+        index_params=args.index_params,
+        metric_type=args.metric_type,
+        quantization=args.quantization,
+        manifest_path=args.manifest,
+        vector_store_id=args.vector_store_id
     )
     
     try:
@@ -110,6 +215,529 @@ Examples:
         return 1
 
 
+LOCAL_CHUNKING_EPILOG = """
+Available embedding models:
+{models}
+
+⚠️ IMPORTANTE: El modelo de embedding DEBE coincidir con la configuración del servidor.
+
+Examples:
+  # Basic usage (uses documents/ directory)
+  python %(prog)s
+  
+  # With custom chunk size
+  python %(prog)s --chunk-size 500 --chunk-overlap 100
+  
+  # From a JSON array or JSON Lines file (streamed, not loaded whole)
+  python %(prog)s --json-file dataset.json
+  python %(prog)s --json-file dataset.jsonl
+  
+  # Recursive scan of Markdown and HTML docs, read with 8 threads
+  python %(prog)s --recursive --extensions .md,.html --read-workers 8
+  
+  # Overlap reading, chunking and inserting
+  python %(prog)s --pipeline --chunk-workers 4 --insert-concurrency 4 --batch-size 32
+  
+  # Journal acknowledged chunks, then continue an interrupted upload
+  python %(prog)s --checkpoint-dir output/checkpoints
+  python %(prog)s --checkpoint-dir output/checkpoints --resume vs_abc123
+  
+  # HNSW index with cosine similarity (tune search params with sweep_index.py)
+  python %(prog)s --index-type HNSW --index-params '{{"M": 32}}' --metric-type COSINE
+  
+  # Hybrid dense + BM25 search (query it with hybrid_search.py)
+  python %(prog)s --sparse-index-dir output/sparse_index
+  
+  # Pre-encoded, gzip-compressed insert requests (see bench_insert.py; the server must
+  # advertise gzip in Accept-Encoding, otherwise the upload stops before creating the store)
+  python %(prog)s --batch-size 100 --insert-transport bulk --insert-compression gzip
+  
+  # Record each upload's throughput, then plan from it (chunks, tokens, requests,
+  # bytes and projected duration; no network)
+  python %(prog)s --run-history output/run_history.jsonl
+  python %(prog)s --run-history output/run_history.jsonl --dry-run --batch-size 32
+"""
+
+
+def local_chunking_parser(
+    llama_stack_url: str = "http://localhost:8321",
+    embedding_model: str = "granite-embedding-125m",
+    embedding_dimension: Optional[int] = None
+) -> argparse.ArgumentParser:
+    """
+    Options of a local chunking upload (see local_chunking_config).
+    
+    Checkpoint journals and run history are only written when their path is
+    given.
+    
+    Args:
+        llama_stack_url: Default of --url
+        embedding_model: Default of --embedding-model
+        embedding_dimension: Default of --embedding-dimension (None = auto-detect)
+    
+    Returns:
+        argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        description="Upload documents to Milvus with LOCAL chunking",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=LOCAL_CHUNKING_EPILOG.format(
+            models="\n".join(f"  - {model} ({dim} dim)" for model, dim in EMBEDDING_DIMENSIONS.items())
+        )
+    )
+    
+    documents = parser.add_argument_group("documents")
+    documents.add_argument(
+        "--documents-dir",
+        type=Path,
+        default=Path("documents"),
+        help="Directory with documents to upload (default: documents)"
+    )
+    documents.add_argument(
+        "--json-file",
+        type=Path,
+        help="JSON array or JSON Lines file with documents (alternative to --documents-dir)"
+    )
+    documents.add_argument(
+        "--extensions",
+        default=None,
+        help="Comma-separated file extensions to load, e.g. .md,.html,.pdf (default: .md,.txt,.rst)"
+    )
+    documents.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also load documents from subdirectories of --documents-dir"
+    )
+    documents.add_argument(
+        "--read-workers",
+        type=int,
+        default=1,
+        help="Threads reading and extracting document files (default: 1)"
+    )
+    documents.add_argument("--min-file-size", type=int, default=None, help="Skip files smaller than this many bytes")
+    documents.add_argument("--max-file-size", type=int, default=None, help="Skip files larger than this many bytes")
+    documents.add_argument(
+        "--modified-after",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Only load files modified after this ISO date/time, e.g. 2024-06-01T12:00"
+    )
+    
+    store = parser.add_argument_group("vector store")
+    store.add_argument("--url", "--llama-stack-url", default=llama_stack_url, help="Llama Stack server URL")
+    store.add_argument(
+        "--store-name",
+        default=None,
+        help="Name for the vector store (default: auto-generated with timestamp)"
+    )
+    store.add_argument(
+        "--vector-store-id",
+        default=None,
+        help="Existing vector store to add the chunks to instead of creating a new one"
+    )
+    store.add_argument(
+        "--embedding-model",
+        default=embedding_model,
+        help=f"Embedding model (default: {embedding_model})"
+    )
+    store.add_argument(
+        "--embedding-dimension",
+        type=int,
+        default=embedding_dimension,
+        help="Embedding dimension, checked against the server "
+             f"(default: {embedding_dimension or 'auto-detect from the server'})"
+    )
+    store.add_argument(
+        "--model-registry",
+        type=Path,
+        default=DEFAULT_MODEL_REGISTRY_PATH,
+        help="Cache of embedding dimensions read from the server, refreshed daily "
+             f"(default: {DEFAULT_MODEL_REGISTRY_PATH})"
+    )
+    store.add_argument(
+        "--index-type",
+        type=str.upper,
+        choices=list(INDEX_BUILD_PARAMS),
+        default=None,
+        help="Vector index of the new store (default: provider default)"
+    )
+    store.add_argument(
+        "--index-params",
+        type=json.loads,
+        default=None,
+        help='Index build parameters as JSON, merged over the defaults, e.g. \'{"M": 32, "efConstruction": 400}\''
+    )
+    store.add_argument(
+        "--metric-type",
+        type=str.upper,
+        choices=list(METRIC_TYPES),
+        default=None,
+        help="Similarity metric of the new store (default: provider default)"
+    )
+    store.add_argument(
+        "--quantization",
+        choices=list(QUANTIZATION_TYPES),
+        default=None,
+        help="Store int8 (scalar) or PQ quantized vectors: the quantized variant of --index-type "
+             "(default HNSW). Fails unless the new store reports the quantized index. "
+             "Measure the recall loss first with eval_quantization.py"
+    )
+    store.add_argument(
+        "--sparse-index-dir",
+        type=Path,
+        default=None,
+        help="Hybrid mode: directory of SQLite BM25 indexes of the inserted chunks, one "
+             "<vector_store_id>.sqlite per store, fused with dense search (RRF) by "
+             "--verify-query and hybrid_search.py"
+    )
+    store.add_argument(
+        "--verify-query",
+        default="Millbrook",
+        help="Query to verify insertion (default: Millbrook)"
+    )
+    
+    chunking = parser.add_argument_group("chunking")
+    chunking.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Chunk size in CHARACTERS (default: {DEFAULT_CHUNK_SIZE})"
+    )
+    chunking.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=DEFAULT_CHUNK_OVERLAP,
+        help=f"Overlap between chunks in characters (default: {DEFAULT_CHUNK_OVERLAP})"
+    )
+    chunking.add_argument(
+        "--max-chunk-chars",
+        type=int,
+        default=DEFAULT_MAX_CHUNK_CHARS,
+        help=f"Max characters per chunk (default: {DEFAULT_MAX_CHUNK_CHARS}, to avoid exceeding 512 tokens)"
+    )
+    chunking.add_argument(
+        "--max-chunk-tokens",
+        type=int,
+        default=None,
+        help="Token budget per chunk using the embedding model's tokenizer, e.g. 512 "
+             "(replaces --chunk-size/--chunk-overlap/--max-chunk-chars; needs: pip install tokenizers)"
+    )
+    chunking.add_argument(
+        "--chunk-overlap-tokens",
+        type=int,
+        default=DEFAULT_CHUNK_OVERLAP_TOKENS,
+        help=f"Overlap between chunks in tokens with --max-chunk-tokens (default: {DEFAULT_CHUNK_OVERLAP_TOKENS})"
+    )
+    chunking.add_argument(
+        "--tokenizer",
+        default=None,
+        help="Tokenizer for --max-chunk-tokens: Hugging Face repo or local tokenizer.json "
+             "(default: derived from --embedding-model)"
+    )
+    chunking.add_argument(
+        "--structure-aware",
+        action="store_true",
+        help="Split along Markdown/RST headings, keeping code blocks, tables and lists whole; "
+             "chunks get heading_path metadata (not with --max-chunk-tokens)"
+    )
+    chunking.add_argument(
+        "--chunk-workers",
+        type=int,
+        default=1,
+        help="Processes used for chunking (default: 1, chunk in this process)"
+    )
+    chunking.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Drop exact and near-duplicate chunks (MinHash/LSH) before embedding"
+    )
+    chunking.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.85,
+        help="Jaccard similarity above which chunks count as near-duplicates (default: 0.85)"
+    )
+    chunking.add_argument(
+        "--dedup-references",
+        type=Path,
+        help="With --dedup, write which chunks were dropped in favour of each kept chunk "
+             "(sources and chunk IDs) to this JSON file after the run"
+    )
+    chunking.add_argument(
+        "--dedup-merge-window",
+        type=int,
+        default=256,
+        help="With --dedup, kept chunks held back so the duplicate_count/duplicate_sources of "
+             "later duplicates are merged into their metadata (default: 256, 0 = none)"
+    )
+    
+    insert = parser.add_argument_group("insertion")
+    insert.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Batch size for insertion (default: 1, one by one)"
+    )
+    insert.add_argument(
+        "--insert-concurrency",
+        type=int,
+        default=1,
+        help="Insert requests kept in flight (default: 1, sequential)"
+    )
+    insert.add_argument(
+        "--insert-retries",
+        type=int,
+        default=3,
+        help="Retries per insert/embedding request on transient errors (default: 3)"
+    )
+    insert.add_argument(
+        "--max-requests-per-second",
+        type=float,
+        default=None,
+        help="Client-side rate limit for insert/embedding requests (default: unlimited)"
+    )
+    insert.add_argument(
+        "--max-batch-bytes",
+        type=int,
+        default=None,
+        help="Payload budget per insert request in bytes (default: no budget)"
+    )
+    insert.add_argument(
+        "--insert-transport",
+        choices=INSERT_TRANSPORTS,
+        default="sdk",
+        help="Insert request encoding: sdk (llama_stack_client) or bulk (bodies encoded "
+             "once, with orjson when installed; see bench_insert.py) (default: sdk)"
+    )
+    insert.add_argument(
+        "--insert-compression",
+        choices=list(INSERT_COMPRESSION_LEVELS),
+        default="identity",
+        help="Compress bulk insert bodies (Content-Encoding); refused unless the server "
+             "advertises the encoding in Accept-Encoding (default: identity, uncompressed)"
+    )
+    insert.add_argument(
+        "--embedding-cache",
+        type=Path,
+        default=None,
+        help="SQLite embedding cache: chunks are embedded client-side (reusing cached "
+             "vectors) and inserted with their embeddings"
+    )
+    insert.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run loading, chunking, embedding and insertion as concurrent stages "
+             "with bounded queues (async pipeline)"
+    )
+    insert.add_argument(
+        "--pipeline-queue-size",
+        type=int,
+        default=8,
+        help="Max documents or batches waiting between pipeline stages (default: 8)"
+    )
+    insert.add_argument(
+        "--embed-concurrency",
+        type=int,
+        default=1,
+        help="Embedding requests in flight with --pipeline and --embedding-cache (default: 1)"
+    )
+    
+    runs = parser.add_argument_group("checkpoints and planning")
+    runs.add_argument(
+        "--checkpoint-dir",
+        type=Path,
+        default=None,
+        help="Journal the acknowledged chunks here, one file per vector store, so an "
+             "interrupted upload can be resumed (default: no journal)"
+    )
+    runs.add_argument(
+        "--resume",
+        default=None,
+        metavar="VECTOR_STORE_ID",
+        help="Resume an interrupted upload into this vector store, skipping the chunks "
+             "its journal in --checkpoint-dir records as acknowledged"
+    )
+    runs.add_argument(
+        "--run-history",
+        type=Path,
+        default=None,
+        help="Append the throughput of each finished upload to this JSON Lines file; "
+             "--dry-run projects the duration from it (default: no history)"
+    )
+    runs.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only chunk the corpus locally and print how many chunks, embedding tokens, "
+             "insert requests and bytes the upload would send, and its projected duration"
+    )
+    
+    parser.add_argument(
+        "--verify-ssl",
+        action="store_true",
+        help="Enable SSL certificate verification (disabled by default)"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=300,
+        help="Timeout in seconds for requests (default: 300)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        default=True,
+        help="Show detailed progress"
+    )
+    return parser
+
+
+def local_chunking_config(
+    parser: argparse.ArgumentParser,
+    args: argparse.Namespace,
+    store_name_prefix: str = "local_chunking"
+) -> MilvusLocalChunkingConfig:
+    """
+    Check parsed local_chunking_parser options and build the upload config.
+    
+    Invalid combinations exit through parser.error.
+    
+    Args:
+        parser: Parser the options came from
+        args: Parsed options
+        store_name_prefix: Prefix of the generated store name (without --store-name)
+    
+    Returns:
+        MilvusLocalChunkingConfig
+    """
+    if args.structure_aware and args.max_chunk_tokens:
+        parser.error("--structure-aware can't be combined with --max-chunk-tokens")
+    if args.insert_compression != "identity" and args.insert_transport != "bulk":
+        parser.error("--insert-compression requires --insert-transport bulk")
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume needs the --checkpoint-dir of the interrupted upload")
+    if args.resume and args.vector_store_id and args.resume != args.vector_store_id:
+        parser.error("--resume and --vector-store-id name different vector stores")
+    
+    store_name = args.store_name or f"{store_name_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    
+    try:
+        return MilvusLocalChunkingConfig(
+            llama_stack_url=args.url,
+            documents_dir=str(args.documents_dir),
+            json_file=str(args.json_file) if args.json_file else None,
+            embedding_model=args.embedding_model,
+            embedding_dimension=args.embedding_dimension,
+            vector_store_name=store_name,
+            index_type=args.index_type,
+            index_params=args.index_params,
+            metric_type=args.metric_type,
+            quantization=args.quantization,
+            model_registry_path=str(args.model_registry),
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            max_chunk_chars=args.max_chunk_chars,
+            chunk_workers=args.chunk_workers,
+            max_chunk_tokens=args.max_chunk_tokens,
+            chunk_overlap_tokens=args.chunk_overlap_tokens,
+            tokenizer_name=args.tokenizer,
+            structure_aware=args.structure_aware,
+            dedup=args.dedup,
+            dedup_threshold=args.dedup_threshold,
+            dedup_merge_window=args.dedup_merge_window,
+            dedup_references_path=str(args.dedup_references) if args.dedup_references else None,
+            batch_size=args.batch_size,
+            insert_concurrency=args.insert_concurrency,
+            max_batch_bytes=args.max_batch_bytes,
+            insert_retries=args.insert_retries,
+            max_requests_per_second=args.max_requests_per_second,
+            insert_transport=args.insert_transport,
+            insert_compression=args.insert_compression,
+            verify_ssl=args.verify_ssl,
+            timeout=args.timeout,
+            verbose=args.verbose,
+            verify_query=args.verify_query,
+            vector_store_id=args.resume or args.vector_store_id,
+            embedding_cache_path=str(args.embedding_cache) if args.embedding_cache else None,
+            sparse_index_dir=str(args.sparse_index_dir) if args.sparse_index_dir else None,
+            file_extensions=args.extensions.split(",") if args.extensions else None,
+            recursive=args.recursive,
+            read_workers=args.read_workers,
+            min_file_size=args.min_file_size,
+            max_file_size=args.max_file_size,
+            modified_after=args.modified_after.timestamp() if args.modified_after else None,
+            pipeline=args.pipeline,
+            pipeline_queue_size=args.pipeline_queue_size,
+            embed_concurrency=args.embed_concurrency,
+            checkpoint_dir=str(args.checkpoint_dir) if args.checkpoint_dir else None,
+            resume=bool(args.resume),
+            run_history_path=str(args.run_history) if args.run_history else None,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def run_local_chunking(
+    argv: Optional[List[str]] = None,
+    store_name_prefix: str = "local_chunking",
+    next_steps: Optional[Callable[[Dict[str, Any], argparse.Namespace], None]] = None,
+    **parser_defaults
+) -> int:
+    """
+    Parse the options of a local chunking upload and run it (or its --dry-run plan).
+    
+    The result is saved to output/<store name>_info.json.
+    
+    Args:
+        argv: Command line arguments (None = sys.argv)
+        store_name_prefix: Prefix of the generated store name
+        next_steps: Prints what to do with the new store, given the result and the options
+        **parser_defaults: llama_stack_url, embedding_model, embedding_dimension (local_chunking_parser)
+    
+    Returns:
+        Exit code
+    """
+    parser = local_chunking_parser(**parser_defaults)
+    args = parser.parse_args(argv)
+    config = local_chunking_config(parser, args, store_name_prefix)
+    
+    if args.dry_run:
+        plan_local_chunking(config)
+        return 0
+    
+    try:
+        result = upload_documents_with_local_chunking(config)
+        
+        if next_steps:
+            next_steps(result, args)
+        
+        # Save vector store info
+        output_info = {
+            **result,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        output_file = Path("output") / f"{config.vector_store_name}_info.json"
+        output_file.parent.mkdir(exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(output_info, f, indent=2)
+        print(f"   📝 Info saved to: {output_file}")
+        
+        return 0
+        
+    except Exception as e:
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        if config.checkpoint_dir:
+            print(
+                f"   ⏯️  Acknowledged chunks are journaled in {config.checkpoint_dir}; re-run with "
+                f"--checkpoint-dir {config.checkpoint_dir} --resume <vector_store_id> to continue",
+                file=sys.stderr
+            )
+        import traceback
+        print("\n📋 Full traceback:", file=sys.stderr)
+        traceback.print_exc()
+        return 1
+
+
 if __name__ == "__main__":
     sys.exit(main())
 
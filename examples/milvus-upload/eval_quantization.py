@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Local evaluation of quantized vector storage: recall loss vs memory saved.
+
+Takes a sample of embeddings, quantizes it with int8 scalar quantization and/or
+product quantization (the encodings of Milvus' *_SQ8 / *_SQ and *_PQ indexes)
+and measures recall@k against exact float32 search. It also projects the memory
+the vectors of a collection would need with each encoding:
+
+    # Sample vectors from the embedding cache of a --embedding-cache upload
+    python eval_quantization.py --embedding-cache embeddings.sqlite \\
+        --model multilingual-e5-large --collection-size 30000000
+
+    # Offline smoke run on synthetic clustered vectors
+    python eval_quantization.py --synthetic --dimension 1024 --pq-m 64,128,256
+
+Only vector data is projected; graph (HNSW) or inverted list (IVF) overhead
+comes on top. Choose the ingestion option with MilvusLocalChunkingConfig /
+MilvusUploadConfig quantization="int8" or "pq" (--quantization in the CLIs).
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from milvus_upload import EmbeddingCache
+from index_tuning import (
+    ScalarQuantizer,
+    ProductQuantizer,
+    evaluate_quantization,
+    INDEX_BUILD_PARAMS,
+    METRIC_TYPES,
+    NUMPY_AVAILABLE,
+)
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+def synthetic_vectors(count: int, dimension: int, clusters: int = 64, seed: int = 0):
+    """Clustered gaussian vectors, a rough stand-in for real embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.6 * rng.normal(size=(count, dimension))
+    return vectors.astype(np.float32)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the recall loss of int8 / PQ quantized vectors")
+    source = parser.add_argument_group("vector sample")
+    source.add_argument("--embedding-cache", type=Path, help="SQLite embedding cache to sample vectors from")
+    source.add_argument("--model", help="Embedding model of the cached vectors (with --embedding-cache)")
+    source.add_argument("--vectors", type=Path, help=".npy file with one embedding per row")
+    source.add_argument("--synthetic", action="store_true", help="Use synthetic clustered vectors")
+    source.add_argument("--dimension", type=int, default=1024, help="Dimension of --synthetic vectors (default: 1024)")
+    source.add_argument("--sample", type=int, default=20000, help="Vectors sampled (default: 20000)")
+
+    evaluation = parser.add_argument_group("evaluation")
+    evaluation.add_argument("--methods", default="int8,pq", help="Comma-separated: int8, pq (default: int8,pq)")
+    evaluation.add_argument(
+        "--pq-m",
+        default=str(INDEX_BUILD_PARAMS["IVF_PQ"]["m"]),
+        help="Comma-separated PQ sub-vector counts; each must divide the dimension "
+             f"(default: {INDEX_BUILD_PARAMS['IVF_PQ']['m']})"
+    )
+    evaluation.add_argument("--pq-nbits", type=int, default=INDEX_BUILD_PARAMS["IVF_PQ"]["nbits"])
+    evaluation.add_argument("--metric", type=str.upper, choices=list(METRIC_TYPES), default="COSINE")
+    evaluation.add_argument("--top-k", type=int, default=10, help="Neighbors compared per query (default: 10)")
+    evaluation.add_argument("--queries", type=int, default=200, help="Held-out query vectors (default: 200)")
+    evaluation.add_argument("--seed", type=int, default=0)
+
+    parser.add_argument(
+        "--collection-size",
+        type=int,
+        default=10_000_000,
+        help="Vectors in the collection, for the memory projection (default: 10000000)"
+    )
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if not NUMPY_AVAILABLE:
+        print("❌ numpy is required. Install with: pip install numpy", file=sys.stderr)
+        return 1
+    if sum(bool(option) for option in (args.embedding_cache, args.vectors, args.synthetic)) != 1:
+        parser.error("Pass exactly one of --embedding-cache, --vectors or --synthetic")
+    if args.embedding_cache and not args.model:
+        parser.error("--embedding-cache needs --model")
+
+    if args.embedding_cache:
+        cache = EmbeddingCache(str(args.embedding_cache))
+        vectors = np.array(cache.sample_vectors(args.model, args.sample), dtype=np.float32)
+        cache.close()
+        source_name = f"{args.embedding_cache} ({args.model})"
+    elif args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)[:args.sample]
+        source_name = str(args.vectors)
+    else:
+        vectors = synthetic_vectors(args.sample, args.dimension, seed=args.seed)
+        source_name = "synthetic"
+    if vectors.ndim != 2 or len(vectors) <= args.queries + args.top_k:
+        print(f"❌ Not enough vectors in {source_name}: {len(vectors)}", file=sys.stderr)
+        return 1
+
+    dimension = vectors.shape[1]
+    print(f"📐 {len(vectors)} vectors of dimension {dimension} from {source_name}, metric {args.metric}")
+
+    quantizers = []
+    for method in [name.strip() for name in args.methods.split(",") if name.strip()]:
+        if method == "int8":
+            quantizers.append(("int8", ScalarQuantizer()))
+        elif method == "pq":
+            for m in (int(value) for value in args.pq_m.split(",")):
+                if dimension % m:
+                    print(f"⚠️  Skipping PQ m={m}: doesn't divide dimension {dimension}")
+                    continue
+                quantizers.append((f"pq m={m} nbits={args.pq_nbits}", ProductQuantizer(m, args.pq_nbits, seed=args.seed)))
+        else:
+            parser.error(f"Unknown method: {method}")
+
+    float32_gb = args.collection_size * dimension * 4 / 1e9
+    print(f"\n{'encoding':<22} {'recall@' + str(args.top_k):>10} {'bytes/vec':>10} {'ratio':>7} {'GB @ ' + format(args.collection_size, ','):>22}")
+    print(f"{'float32 (exact)':<22} {1.0:>10.4f} {dimension * 4:>10} {1.0:>6.1f}x {float32_gb:>22.1f}")
+
+    results = []
+    for name, quantizer in quantizers:
+        result = evaluate_quantization(
+            vectors, quantizer, top_k=args.top_k, query_count=args.queries, metric=args.metric, seed=args.seed
+        )
+        result["encoding"] = name
+        result["projected_gb"] = round(args.collection_size * result["bytes_per_vector"] / 1e9, 2)
+        results.append(result)
+        print(
+            f"{name:<22} {result['recall']:>10.4f} {result['bytes_per_vector']:>10g} "
+            f"{result['compression']:>6.1f}x {result['projected_gb']:>22.1f}"
+        )
+
+    if args.output:
+        report = {
+            "source": source_name,
+            "vectors": len(vectors),
+            "dimension": dimension,
+            "metric": args.metric,
+            "top_k": args.top_k,
+            "collection_size": args.collection_size,
+            "float32_projected_gb": round(float32_gb, 2),
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"💾 Results saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Hybrid dense + sparse (BM25) search of a vector store, fused with RRF.
+
+Queries a store uploaded with a sparse index (sparse_index_dir /
+--sparse-index-dir of the local chunking upload): the dense candidates come
+from the store, the BM25 candidates from the local index, and the fused top-k
+shows which side retrieved each chunk:
+
+    python hybrid_search.py --vector-store-id vs_abc123 \\
+        --sparse-index output/sparse_index --query "CrashLoopBackOff llama-stack-7d9f"
+
+Keyword-heavy queries (pod names, error codes, versions) are where the sparse
+side helps: the exact term ranks high in BM25 even when the embedding doesn't
+tell it apart from its neighbours.
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from milvus_upload import create_clients
+from sparse_index import hybrid_search, SparseIndex, DEFAULT_HYBRID_CANDIDATES, DEFAULT_RRF_K
+from sweep_index import load_queries
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Hybrid dense + BM25 search of a vector store (RRF fusion)")
+    parser.add_argument(
+        "--url",
+        default=os.getenv("LLAMA_STACK_URL", "http://localhost:8321"),
+        help="Llama Stack URL (default: from LLAMA_STACK_URL env or http://localhost:8321)"
+    )
+    parser.add_argument("--vector-store-id", help="Vector store to search (default: the sparse index's store)")
+    parser.add_argument(
+        "--sparse-index",
+        type=Path,
+        required=True,
+        help="SQLite BM25 index written by the upload, or its directory (needs --vector-store-id)"
+    )
+    parser.add_argument("--queries", type=Path, help="Text file (one query per line) or JSON/JSON Lines dataset")
+    parser.add_argument("--query", action="append", default=[], help="A query (repeatable, added to --queries)")
+    parser.add_argument("--top-k", type=int, default=5, help="Fused results per query (default: 5)")
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=DEFAULT_HYBRID_CANDIDATES,
+        help=f"Results retrieved from each side before fusion (default: {DEFAULT_HYBRID_CANDIDATES})"
+    )
+    parser.add_argument("--rrf-k", type=int, default=DEFAULT_RRF_K, help=f"RRF constant (default: {DEFAULT_RRF_K})")
+    parser.add_argument("--search-params", type=json.loads, help='Dense index search parameters, e.g. \'{"ef": 64}\'')
+    parser.add_argument("--output", help="Save the results as JSON to this file")
+    parser.add_argument("--verify-ssl", action="store_true", help="Enable SSL certificate verification")
+    parser.add_argument("--timeout", type=int, default=60, help="Timeout in seconds (default: 60)")
+    args = parser.parse_args(argv)
+
+    queries = (load_queries(args.queries) if args.queries else []) + args.query
+    if not queries:
+        parser.error("No queries: pass --queries and/or --query")
+    if args.sparse_index.is_dir():
+        if not args.vector_store_id:
+            parser.error("--sparse-index is a directory: pass --vector-store-id")
+        args.sparse_index = SparseIndex.path_for(args.sparse_index, args.vector_store_id)
+    if not args.sparse_index.exists():
+        parser.error(f"Sparse index not found: {args.sparse_index}")
+
+    try:
+        sparse_index = SparseIndex(str(args.sparse_index), args.vector_store_id)
+    except ValueError as e:
+        parser.error(str(e))
+    vector_store_id = args.vector_store_id or sparse_index.vector_store_id
+    if not vector_store_id:
+        parser.error("The sparse index doesn't record its vector store: pass --vector-store-id")
+
+    llama_client, _ = create_clients(args.url, timeout=args.timeout, verify_ssl=args.verify_ssl)
+    if llama_client is None:
+        print("❌ llama_stack_client is required. Install with: pip install llama-stack-client", file=sys.stderr)
+        return 1
+
+    stats = sparse_index.stats()
+    print(f"🔍 Hybrid search of {vector_store_id}: {stats['chunks']} chunks, {stats['terms']} terms in {args.sparse_index}")
+
+    report = []
+    for query in queries:
+        results = hybrid_search(
+            llama_client,
+            vector_store_id,
+            sparse_index,
+            query,
+            top_k=args.top_k,
+            candidates=args.candidates,
+            rrf_k=args.rrf_k,
+            search_params=args.search_params
+        )
+        sparse_only = sum(1 for result in results if result["dense_rank"] is None)
+        print(f"\n❓ {query}  ({sparse_only} of {len(results)} only found by BM25)")
+        for rank, result in enumerate(results, start=1):
+            content = " ".join(str(result["content"]).split())[:80]
+            print(
+                f"   {rank:>2}. {result['score']:.4f}  dense #{result['dense_rank'] or '-':<3} "
+                f"sparse #{result['sparse_rank'] or '-':<3} {result['chunk_id']}  {content}"
+            )
+        report.append({"query": query, "results": results})
+    sparse_index.close()
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"vector_store_id": vector_store_id, "top_k": args.top_k, "queries": report}, indent=2, default=str),
+            encoding="utf-8"
+        )
+        print(f"\n💾 Results saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Milvus vector index options, search parameter sweeps and quantization evaluation.
+
+Validates the index settings of a new vector store (vector_index_options),
+checks them against what the created store reports (check_vector_index),
+measures recall@k and latency of a store per search parameter value
+(sweep_search_params, see sweep_index.py), and estimates the recall loss of
+int8 / PQ quantization offline (evaluate_quantization, see
+eval_quantization.py):
+
+    from index_tuning import vector_index_options, sweep_search_params
+
+    options = vector_index_options("HNSW", {"M": 32}, "COSINE")
+    report = sweep_search_params(llama_client, vector_store_id, queries, "HNSW")
+
+Quantization evaluation needs numpy (pip install numpy).
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sparse_index import retrieved_chunk_id
+
+# Optional import for quantization evaluation
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+# Milvus index types and their default build parameters
+INDEX_BUILD_PARAMS = {
+    "FLAT": {},  # Exact search (brute force)
+    "HNSW": {"M": 16, "efConstruction": 200},
+    "IVF_FLAT": {"nlist": 1024},
+    "IVF_PQ": {"nlist": 1024, "m": 16, "nbits": 8},
+    "IVF_SQ8": {"nlist": 1024},
+    "HNSW_SQ": {"M": 16, "efConstruction": 200, "sq_type": "SQ8"},
+    "HNSW_PQ": {"M": 16, "efConstruction": 200, "m": 16, "nbits": 8},
+    "DISKANN": {},
+}
+
+# Search parameter trading recall for latency, per index type (None = exact)
+INDEX_SEARCH_PARAMS = {
+    "FLAT": None,
+    "HNSW": "ef",
+    "IVF_FLAT": "nprobe",
+    "IVF_PQ": "nprobe",
+    "IVF_SQ8": "nprobe",
+    "HNSW_SQ": "ef",
+    "HNSW_PQ": "ef",
+    "DISKANN": "search_list",
+}
+
+# Quantized variant of each index type: scalar (int8) or product quantization
+QUANTIZED_INDEX_TYPES = {
+    ("HNSW", "int8"): "HNSW_SQ",
+    ("HNSW", "pq"): "HNSW_PQ",
+    ("IVF_FLAT", "int8"): "IVF_SQ8",
+    ("IVF_FLAT", "pq"): "IVF_PQ",
+}
+QUANTIZATION_TYPES = ("int8", "pq")
+
+METRIC_TYPES = ("COSINE", "IP", "L2")
+
+# Index settings go to vector_stores.create as extra_body entries, which a
+# server may ignore: they only count as applied once the store reports them
+INDEX_VERIFIED = "verified"
+INDEX_NOT_VERIFIED = "requested, not verified"
+
+
+# =============================================================================
+# VECTOR INDEX OPTIONS
+# =============================================================================
+
+def vector_index_options(
+    index_type: Optional[str] = None,
+    index_params: Optional[Dict[str, Any]] = None,
+    metric_type: Optional[str] = None,
+    embedding_dimension: Optional[int] = None,
+    quantization: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Validate index settings and build their vector_stores.create extra_body entries.
+    
+    Build parameters are merged over INDEX_BUILD_PARAMS[index_type]. The keys
+    follow pymilvus (index_type, params, metric_type); the Milvus provider of
+    the Llama Stack server has to pass them on to the collection's index.
+    
+    Args:
+        index_type: One of INDEX_BUILD_PARAMS (None = provider default, or HNSW
+            with quantization)
+        index_params: Build parameters overriding the defaults, e.g. {"M": 32}
+        metric_type: COSINE, IP or L2 (None = provider default)
+        embedding_dimension: Checked against the PQ "m" when given
+        quantization: "int8" or "pq": use the quantized variant of index_type
+            (see QUANTIZED_INDEX_TYPES)
+    
+    Returns:
+        Dict with "index_type", "index_params" and "metric_type" (only those set)
+    
+    Raises:
+        ValueError: On unknown index types, metrics, quantizations or build parameters
+    """
+    options = {}
+    if quantization is not None:
+        if quantization not in QUANTIZATION_TYPES:
+            raise ValueError(f"Invalid quantization '{quantization}'. Use one of: {', '.join(QUANTIZATION_TYPES)}")
+        base = (index_type or "HNSW").upper()
+        quantized = {variant: q for (_, q), variant in QUANTIZED_INDEX_TYPES.items()}
+        if quantized.get(base) == quantization:
+            index_type = base  # Already the quantized variant
+        elif (base, quantization) in QUANTIZED_INDEX_TYPES:
+            index_type = QUANTIZED_INDEX_TYPES[(base, quantization)]
+        else:
+            raise ValueError(f"No {quantization} quantized variant of index type '{base}' (use HNSW or IVF_FLAT)")
+    
+    if index_type is not None:
+        index_type = index_type.upper()
+        if index_type not in INDEX_BUILD_PARAMS:
+            raise ValueError(f"Invalid index_type '{index_type}'. Use one of: {', '.join(INDEX_BUILD_PARAMS)}")
+        defaults = INDEX_BUILD_PARAMS[index_type]
+        unknown = sorted(set(index_params or {}) - set(defaults))
+        if unknown:
+            allowed = ", ".join(defaults) or "none"
+            raise ValueError(f"Unknown {index_type} build parameters: {', '.join(unknown)} (allowed: {allowed})")
+        params = {**defaults, **(index_params or {})}
+        if index_type.endswith("_PQ") and embedding_dimension and embedding_dimension % params["m"]:
+            raise ValueError(f"{index_type} m={params['m']} must divide the embedding dimension {embedding_dimension}")
+        options["index_type"] = index_type
+        options["index_params"] = params
+    elif index_params:
+        raise ValueError("index_params requires index_type")
+    
+    if metric_type is not None:
+        if metric_type.upper() not in METRIC_TYPES:
+            raise ValueError(f"Invalid metric_type '{metric_type}'. Use one of: {', '.join(METRIC_TYPES)}")
+        options["metric_type"] = metric_type.upper()
+    
+    return options
+
+
+def describe_vector_index(index_options: Dict[str, Any]) -> str:
+    """One-line summary of vector_index_options output, e.g. "HNSW (M=16, efConstruction=200), COSINE"."""
+    parts = []
+    if "index_type" in index_options:
+        params = ", ".join(f"{key}={value}" for key, value in index_options["index_params"].items())
+        parts.append(f"{index_options['index_type']} ({params})" if params else index_options["index_type"])
+    if "metric_type" in index_options:
+        parts.append(index_options["metric_type"])
+    return ", ".join(parts) or "provider default"
+
+
+def reported_vector_index(vector_store: Any) -> Dict[str, Any]:
+    """
+    Index settings a vector store object reports, as vector_index_options keys.
+    
+    They are looked up in the store's extra fields, then in its metadata
+    (a dict works too); settings it doesn't report are left out.
+    """
+    if isinstance(vector_store, dict):
+        sources = [vector_store, vector_store.get("metadata")]
+    else:
+        sources = [getattr(vector_store, "model_extra", None), getattr(vector_store, "metadata", None)]
+    reported = {}
+    for key in ("index_type", "index_params", "metric_type"):
+        for source in sources:
+            if isinstance(source, dict) and source.get(key) is not None:
+                reported[key] = source[key]
+                break
+    if isinstance(reported.get("index_params"), str):
+        try:
+            reported["index_params"] = json.loads(reported["index_params"])
+        except ValueError:
+            del reported["index_params"]
+    return reported
+
+
+def check_vector_index(vector_store: Any, index_options: Dict[str, Any]) -> str:
+    """
+    Compare the index a created vector store reports with the requested one.
+    
+    Args:
+        vector_store: Store object read back from the server
+        index_options: Requested settings (vector_index_options output)
+    
+    Returns:
+        INDEX_VERIFIED if the store reports every requested setting,
+        INDEX_NOT_VERIFIED if it doesn't report some of them
+    
+    Raises:
+        ValueError: If the store reports a setting other than the requested one
+    """
+    reported = reported_vector_index(vector_store)
+    for key, requested in index_options.items():
+        if key not in reported:
+            continue
+        value = reported[key]
+        if key == "index_params":
+            applied = dict(value) if isinstance(value, dict) else {}
+            mismatch = any(str(applied.get(name)) != str(param) for name, param in requested.items())
+        else:
+            mismatch = str(value).upper() != str(requested).upper()
+        if mismatch:
+            store_id = vector_store.get("id") if isinstance(vector_store, dict) else getattr(vector_store, "id", None)
+            raise ValueError(
+                f"Vector store '{store_id}' reports "
+                f"{key}={value!r}, not the requested {requested!r}: the server did not apply the requested index"
+            )
+    return INDEX_VERIFIED if all(key in reported for key in index_options) else INDEX_NOT_VERIFIED
+
+
+# =============================================================================
+# INDEX TUNING (RECALL VS LATENCY)
+# =============================================================================
+
+# Search parameter values swept by default, per search parameter
+DEFAULT_SEARCH_SWEEP = {
+    "ef": [16, 32, 64, 128, 256, 512],
+    "nprobe": [1, 4, 8, 16, 32, 64, 128],
+    "search_list": [16, 32, 64, 128, 256],
+}
+
+
+def latency_percentile(latencies: List[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0..1) of a list of latencies."""
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered))) - 1))]
+
+
+def search_vector_store(
+    llama_client,  # LlamaStackClient
+    vector_store_id: str,
+    query: str,
+    top_k: int = 5,
+    search_params: Optional[Dict[str, Any]] = None
+) -> Tuple[List[str], float]:
+    """
+    Run one vector_io.query and time it.
+    
+    search_params (e.g. {"ef": 64}) are sent in the query params; the Milvus
+    provider of the Llama Stack server has to pass them on to the search.
+    
+    Returns:
+        Tuple of (retrieved chunk IDs in rank order, seconds)
+    """
+    params = {"max_chunks": top_k}
+    if search_params:
+        params["search_params"] = search_params
+    start = time.perf_counter()
+    results = llama_client.vector_io.query(vector_db_id=vector_store_id, query=query, params=params)
+    elapsed = time.perf_counter() - start
+    return [retrieved_chunk_id(chunk) for chunk in results.chunks], elapsed
+
+
+def sweep_search_params(
+    llama_client,  # LlamaStackClient
+    vector_store_id: str,
+    queries: List[str],
+    index_type: str,
+    values: Optional[List[int]] = None,
+    top_k: int = 5,
+    repeat: int = 1,
+    reference_store_id: Optional[str] = None,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    Measure recall@k and latency of a vector store for each search parameter value.
+    
+    Recall is measured against the top-k of reference_store_id, which should be
+    a FLAT (exact) store holding the same chunks. Without one, the results of
+    the largest swept value are the reference, so recall is relative to it.
+    Queries run one at a time, so latencies are not skewed by concurrency.
+    
+    Args:
+        llama_client: Llama Stack client
+        vector_store_id: Store to tune
+        queries: Query strings
+        index_type: Index type of the store (selects the search parameter)
+        values: Search parameter values (default: DEFAULT_SEARCH_SWEEP)
+        top_k: Chunks retrieved per query
+        repeat: Timed runs per query and value
+        reference_store_id: Exact store with the same chunks (optional)
+        verbose: Print one line per value
+    
+    Returns:
+        Dict with "search_param", "reference", "results" (one entry per value
+        with its params, recall and p50/p95/p99/mean latency in ms),
+        "search_params_status" (INDEX_NOT_VERIFIED: servers don't report
+        whether they applied search_params) and "identical_results" (every
+        value returned the same chunks, a sign that they were ignored)
+    
+    Raises:
+        ValueError: If the index type has no search parameter or no queries are given
+    """
+    index_type = index_type.upper()
+    search_param = INDEX_SEARCH_PARAMS.get(index_type)
+    if search_param is None:
+        raise ValueError(f"Index type '{index_type}' has no search parameter to sweep")
+    if not queries:
+        raise ValueError("No queries to sweep with")
+    values = sorted(values or DEFAULT_SEARCH_SWEEP[search_param])
+    
+    if reference_store_id:
+        reference = [search_vector_store(llama_client, reference_store_id, query, top_k)[0] for query in queries]
+    else:
+        reference = [
+            search_vector_store(llama_client, vector_store_id, query, top_k, {search_param: values[-1]})[0]
+            for query in queries
+        ]
+    
+    results = []
+    rankings = set()  # Chunks returned per value, to spot ignored search_params
+    for value in values:
+        search_params = {search_param: value}
+        search_vector_store(llama_client, vector_store_id, queries[0], top_k, search_params)  # Warm-up
+        latencies = []
+        hits = expected = 0
+        value_ranking = []
+        for query, truth in zip(queries, reference):
+            for _ in range(max(1, repeat)):
+                chunk_ids, seconds = search_vector_store(llama_client, vector_store_id, query, top_k, search_params)
+                latencies.append(seconds * 1000)
+            hits += len(set(chunk_ids) & set(truth))
+            expected += len(truth)
+            value_ranking.append(tuple(chunk_ids))
+        rankings.add(tuple(value_ranking))
+        
+        result = {
+            "params": search_params,
+            "recall": round(hits / expected, 4) if expected else None,
+            "p50_ms": round(latency_percentile(latencies, 0.50), 2),
+            "p95_ms": round(latency_percentile(latencies, 0.95), 2),
+            "p99_ms": round(latency_percentile(latencies, 0.99), 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+        }
+        results.append(result)
+        if verbose:
+            recall = f"{result['recall']:.3f}" if result["recall"] is not None else "n/a"
+            print(
+                f"   {search_param}={value:<6} recall@{top_k} {recall}  "
+                f"p50 {result['p50_ms']:.1f} ms  p95 {result['p95_ms']:.1f} ms  p99 {result['p99_ms']:.1f} ms"
+            )
+    
+    return {
+        "search_param": search_param,
+        "reference": reference_store_id or f"{search_param}={values[-1]}",
+        "results": results,
+        "search_params_status": INDEX_NOT_VERIFIED,
+        "identical_results": len(values) > 1 and len(rankings) == 1,
+    }
+
+
+def pick_search_params(results: List[Dict[str, Any]], target_p95_ms: float) -> Optional[Dict[str, Any]]:
+    """
+    Pick the sweep result with the best recall whose p95 latency meets the target.
+    
+    Ties on recall go to the lower p95. Returns None if no value is fast enough.
+    """
+    candidates = [result for result in results if result["p95_ms"] <= target_p95_ms]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda result: (result["recall"] or 0, -result["p95_ms"]))
+
+
+# =============================================================================
+# VECTOR QUANTIZATION (RECALL LOSS EVALUATION)
+# =============================================================================
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy is required for quantization evaluation. Install with: pip install numpy")
+
+
+def top_k_neighbors(base, queries, k: int, metric: str = "COSINE"):
+    """
+    Exact top-k neighbor indices (best first) of each query row in base.
+    
+    COSINE expects normalized rows (see normalize_vectors); IP ranks by inner
+    product, L2 by Euclidean distance.
+    """
+    _require_numpy()
+    if metric == "L2":
+        scores = -((queries ** 2).sum(axis=1)[:, None] - 2 * queries @ base.T + (base ** 2).sum(axis=1)[None, :])
+    else:
+        scores = queries @ base.T
+    k = min(k, base.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def normalize_vectors(vectors):
+    """Rows scaled to unit length (what Milvus does for COSINE)."""
+    _require_numpy()
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class ScalarQuantizer:
+    """
+    int8 scalar quantization (Milvus SQ8): each dimension's [min, max] range
+    is mapped onto 256 levels, so a vector takes 1 byte per dimension.
+    """
+    
+    def fit(self, vectors) -> "ScalarQuantizer":
+        _require_numpy()
+        self.low = vectors.min(axis=0)
+        self.scale = np.maximum(vectors.max(axis=0) - self.low, 1e-12) / 255
+        return self
+    
+    def encode(self, vectors):
+        return np.clip(np.rint((vectors - self.low) / self.scale), 0, 255).astype(np.uint8)
+    
+    def decode(self, codes):
+        return codes.astype(np.float32) * self.scale + self.low
+    
+    def bytes_per_vector(self, dimension: int) -> int:
+        return dimension
+
+
+class ProductQuantizer:
+    """
+    Product quantization (Milvus PQ): vectors are cut into m sub-vectors, each
+    replaced by the nearest of 2**nbits k-means centroids of its subspace, so a
+    vector takes m * nbits / 8 bytes.
+    """
+    
+    def __init__(self, m: int = 16, nbits: int = 8, iterations: int = 20, seed: int = 0):
+        if not 1 <= nbits <= 8:
+            raise ValueError(f"nbits must be between 1 and 8, got {nbits}")
+        self.m = m
+        self.nbits = nbits
+        self.iterations = iterations
+        self.seed = seed
+    
+    def fit(self, vectors) -> "ProductQuantizer":
+        _require_numpy()
+        n, dimension = vectors.shape
+        if dimension % self.m:
+            raise ValueError(f"PQ m={self.m} must divide the embedding dimension {dimension}")
+        rng = np.random.default_rng(self.seed)
+        centroids_count = min(1 << self.nbits, n)
+        self.centroids = []
+        for sub in np.split(vectors, self.m, axis=1):
+            centroids = sub[rng.choice(n, centroids_count, replace=False)].copy()
+            for _ in range(self.iterations):
+                assignment = self._assign(sub, centroids)
+                sums = np.stack([
+                    np.bincount(assignment, weights=sub[:, j], minlength=centroids_count)
+                    for j in range(sub.shape[1])
+                ], axis=1)
+                counts = np.bincount(assignment, minlength=centroids_count)[:, None]
+                # Empty clusters keep their previous centroid
+                centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids).astype(np.float32)
+            self.centroids.append(centroids)
+        return self
+    
+    @staticmethod
+    def _assign(sub, centroids):
+        distances = (centroids ** 2).sum(axis=1)[None, :] - 2 * sub @ centroids.T
+        return distances.argmin(axis=1)
+    
+    def encode(self, vectors):
+        subs = np.split(vectors, self.m, axis=1)
+        return np.stack([self._assign(sub, c) for sub, c in zip(subs, self.centroids)], axis=1).astype(np.uint8)
+    
+    def decode(self, codes):
+        return np.concatenate([c[codes[:, i]] for i, c in enumerate(self.centroids)], axis=1)
+    
+    def bytes_per_vector(self, dimension: int) -> float:
+        return self.m * self.nbits / 8
+
+
+def evaluate_quantization(
+    vectors,
+    quantizer,
+    top_k: int = 10,
+    query_count: int = 100,
+    metric: str = "COSINE",
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Measure the recall loss of a quantizer against exact float32 search.
+    
+    query_count random rows are held out as queries; the quantizer is trained
+    on and encodes the remaining rows. Queries stay float32 (asymmetric
+    distance, as in Milvus), and recall@k is the share of the exact float32
+    top-k found in the top-k over the decoded vectors.
+    
+    Args:
+        vectors: Sample of embeddings (2-D array-like, float32)
+        quantizer: ScalarQuantizer or ProductQuantizer
+        top_k: Neighbors compared per query
+        query_count: Held-out query vectors
+        metric: COSINE, IP or L2
+        seed: Seed of the query split
+    
+    Returns:
+        Dict with recall, bytes per vector (float32 and quantized), compression
+        ratio and training time
+    """
+    _require_numpy()
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if metric == "COSINE":
+        vectors = normalize_vectors(vectors)
+    if len(vectors) <= query_count + top_k:
+        raise ValueError(f"Need more than {query_count + top_k} vectors, got {len(vectors)}")
+    
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    queries, base = vectors[order[:query_count]], vectors[order[query_count:]]
+    
+    start = time.perf_counter()
+    quantizer.fit(base)
+    decoded = quantizer.decode(quantizer.encode(base))
+    train_seconds = time.perf_counter() - start
+    
+    exact = top_k_neighbors(base, queries, top_k, metric)
+    approximate = top_k_neighbors(decoded, queries, top_k, metric)
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact.tolist(), approximate.tolist()))
+    
+    dimension = vectors.shape[1]
+    quantized_bytes = quantizer.bytes_per_vector(dimension)
+    return {
+        "recall": round(hits / exact.size, 4),
+        "float32_bytes_per_vector": dimension * 4,
+        "bytes_per_vector": quantized_bytes,
+        "compression": round(dimension * 4 / quantized_bytes, 2),
+        "train_seconds": round(train_seconds, 3),
+        "base_vectors": len(base),
+        "queries": query_count,
+    }
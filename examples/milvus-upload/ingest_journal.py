@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal of acknowledged chunks (resumable ingestion).
+
+CheckpointJournal appends one line per insert batch the server confirmed,
+so an interrupted upload resumes without re-sending them:
+
+    from ingest_journal import CheckpointJournal
+
+    path = CheckpointJournal.path_for(Path("output/checkpoints"), vector_store_id)
+    journal = CheckpointJournal.resume(path, header)
+    if not journal.is_acknowledged(chunk):
+        ...
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ingest_manifest import chunk_hash
+
+
+# =============================================================================
+# CHECKPOINT JOURNAL (RESUMABLE INGESTION)
+# =============================================================================
+
+class CheckpointJournal:
+    """
+    Append-only journal of the chunks a vector store has acknowledged.
+    
+    One JSON line is appended (and flushed) per acknowledged insert batch, so
+    after a crash or eviction every batch the server confirmed is on disk and
+    a resumed run only sends the rest. A torn last line from an interrupted
+    write is ignored.
+    
+    File format (JSON Lines):
+        {"vector_store_id": ..., "embedding_model": ..., "chunking": {...}}
+        {"chunks": {chunk_id: content hash, ...}}
+        ...
+    """
+    
+    def __init__(self, path: Path, header: Dict[str, Any], fsync: bool = False):
+        self.path = Path(path)
+        self.header = header
+        self.fsync = fsync
+        self.acknowledged: Dict[str, str] = {}
+        self._file = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def path_for(checkpoint_dir: Path, vector_store_id: str) -> Path:
+        return Path(checkpoint_dir) / f"{vector_store_id}.jsonl"
+    
+    @classmethod
+    def create(cls, path: Path, header: Dict[str, Any], fsync: bool = False) -> "CheckpointJournal":
+        """Start a new journal (replacing any previous one at `path`)."""
+        journal = cls(path, header, fsync=fsync)
+        journal.path.parent.mkdir(parents=True, exist_ok=True)
+        journal._file = open(journal.path, "w", encoding="utf-8")
+        journal._append(header)
+        return journal
+    
+    @classmethod
+    def resume(cls, path: Path, header: Dict[str, Any], fsync: bool = False) -> "CheckpointJournal":
+        """
+        Reopen an existing journal for appending.
+        
+        Raises:
+            FileNotFoundError: If there is no journal at `path`
+            ValueError: If it was written with other settings than `header`
+        """
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"No checkpoint journal to resume from: {path}")
+        
+        journal = cls(path, header, fsync=fsync)
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break  # Torn write at the end of an interrupted run
+        
+        if not records or records[0] != header:
+            raise ValueError(
+                f"Checkpoint journal {path} was written with different settings "
+                f"({records[0] if records else 'empty'}); resume with the same embedding model and chunking options"
+            )
+        for record in records[1:]:
+            journal.acknowledged.update(record.get("chunks", {}))
+        
+        # Compact to the valid records (atomically), so a torn line doesn't stay in the middle
+        tmp_path = path.with_name(path.name + ".tmp")
+        journal._file = open(tmp_path, "w", encoding="utf-8")
+        journal._append(header)
+        if journal.acknowledged:
+            journal._append({"chunks": journal.acknowledged})
+        journal._file.close()
+        os.replace(tmp_path, path)
+        journal._file = open(path, "a", encoding="utf-8")
+        return journal
+    
+    def _append(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+    
+    def record(self, batch: List[Dict[str, Any]]):
+        """Record an acknowledged batch of formatted chunks."""
+        chunks = {formatted["metadata"]["document_id"]: chunk_hash(formatted) for formatted in batch}
+        with self._lock:
+            self.acknowledged.update(chunks)
+            self._append({"chunks": chunks})
+    
+    def is_acknowledged(self, chunk: Dict[str, Any]) -> bool:
+        """Whether this exact chunk (same ID and content) is already in the store."""
+        acknowledged = self.acknowledged.get(chunk["chunk_id"])
+        return acknowledged is not None and acknowledged == chunk_hash(chunk)
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
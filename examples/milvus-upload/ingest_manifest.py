@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Content-hash manifest of what a vector store holds (incremental re-ingestion).
+
+IngestionManifest records, per document file, its content hash and the ID of
+the vector store file it was uploaded as. A later server-side upload only
+uploads new or changed files, and deletes the vector store files they replace
+(and those of removed documents) through the vector store files API:
+
+    from ingest_manifest import IngestionManifest, file_content_hash
+
+    manifest = IngestionManifest.load(Path("output/manifest.json"))
+    changed, removed = manifest.changes({path.name: file_content_hash(path) for path in files})
+    ...
+    manifest.save()
+
+Only depends on the standard library (and an OpenAI-compatible client for
+delete_document_file).
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# =============================================================================
+# INCREMENTAL INGESTION (CONTENT-HASH MANIFEST)
+# =============================================================================
+
+def content_hash(value: Any) -> str:
+    """SHA-256 of a JSON-serialisable value (keys sorted, so dict order doesn't matter)."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chunk_hash(chunk: Dict[str, Any]) -> str:
+    """
+    Hash of a chunk's content.
+    
+    Document-level metadata (file_size, total_chunks, ...) is copied into every
+    chunk, so it is left out: only a change of the text changes the hash.
+    """
+    return content_hash(chunk["content"])
+
+
+def file_content_hash(path: Path, read_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(read_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """
+    Content hash and vector store file of every document in a vector store.
+    
+    Each document is uploaded as one file and attached to the store, so
+    replacing or removing it deletes exactly its chunks: the store deletes a
+    file's chunks together with the file. A document is recorded only once
+    its file is attached, so an interrupted run uploads it again.
+    
+    File format (JSON):
+        {
+            "version": 2,
+            "vector_store_id": "...",
+            "embedding_model": "...",
+            "documents": {name: {"hash": ..., "file_id": ...}},
+            "pending_deletions": [file_id, ...]
+        }
+    """
+    VERSION = 2
+    
+    def __init__(self, path: Path, data: Optional[Dict[str, Any]] = None):
+        self.path = Path(path)
+        self.data = data or {
+            "version": self.VERSION,
+            "vector_store_id": None,
+            "embedding_model": None,
+            "documents": {},
+            "pending_deletions": [],
+        }
+    
+    @classmethod
+    def load(cls, path: Path) -> "IngestionManifest":
+        """Load a manifest, or start an empty one if the file doesn't exist."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            raise ValueError(
+                f"Unsupported manifest version in {path}: {data.get('version')}. "
+                "Start a new manifest with a new vector store."
+            )
+        data.setdefault("pending_deletions", [])
+        return cls(path, data)
+    
+    def save(self):
+        """Write the manifest atomically (temp file + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    @property
+    def documents(self) -> Dict[str, Dict[str, Any]]:
+        return self.data["documents"]
+    
+    def document_hash(self, name: str) -> Optional[str]:
+        return self.documents.get(name, {}).get("hash")
+    
+    def file_id(self, name: str) -> Optional[str]:
+        return self.documents.get(name, {}).get("file_id")
+    
+    def set_document(self, name: str, hash_value: str, file_id: str):
+        self.documents[name] = {"hash": hash_value, "file_id": file_id}
+    
+    def remove_document(self, name: str) -> Optional[str]:
+        """Drop a document; returns the vector store file it was stored as."""
+        return self.documents.pop(name, {}).get("file_id")
+    
+    def changes(self, hashes: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        Compare the current documents with the manifest.
+        
+        Args:
+            hashes: Content hash of every current document, by name
+        
+        Returns:
+            Tuple of (new or changed document names, names of documents no
+            longer in hashes), both sorted
+        """
+        changed = sorted(name for name, hash_value in hashes.items() if self.document_hash(name) != hash_value)
+        removed = sorted(name for name in self.documents if name not in hashes)
+        return changed, removed
+
+
+def delete_document_file(openai_client, vector_store_id: str, file_id: str):
+    """
+    Delete a document's file from a vector store (with its chunks), then the file itself.
+    
+    A file that is already gone (404) counts as deleted, so a retried
+    deletion succeeds.
+    """
+    for delete in (
+        lambda: openai_client.vector_stores.files.delete(file_id=file_id, vector_store_id=vector_store_id),
+        lambda: openai_client.files.delete(file_id),
+    ):
+        try:
+            delete()
+        except Exception as e:
+            if getattr(e, "status_code", None) != 404:
+                raise
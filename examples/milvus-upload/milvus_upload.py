@@ -11,13 +11,78 @@ Two modes are supported:
 """
 
 import os
+import re
+import asyncio
 import json
+import mmap
+import codecs
+import time
+import random
+import gzip
+import hashlib
+import sqlite3
+import itertools
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from html.parser import HTMLParser
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable, Iterable, Iterator, Tuple
 from openai import OpenAI
 import httpx
 
+from http_pool import get_http_client
+# Split out of this module; everything stays importable from milvus_upload
+from chunk_dedup import ChunkDeduplicator
+from ingest_manifest import (
+    IngestionManifest,
+    content_hash,
+    chunk_hash,
+    file_content_hash,
+    delete_document_file,
+)
+from ingest_journal import CheckpointJournal
+from index_tuning import (
+    vector_index_options,
+    describe_vector_index,
+    reported_vector_index,
+    check_vector_index,
+    latency_percentile,
+    search_vector_store,
+    sweep_search_params,
+    pick_search_params,
+    top_k_neighbors,
+    normalize_vectors,
+    ScalarQuantizer,
+    ProductQuantizer,
+    evaluate_quantization,
+    NUMPY_AVAILABLE,
+    INDEX_BUILD_PARAMS,
+    INDEX_SEARCH_PARAMS,
+    QUANTIZED_INDEX_TYPES,
+    QUANTIZATION_TYPES,
+    METRIC_TYPES,
+    DEFAULT_SEARCH_SWEEP,
+    INDEX_VERIFIED,
+    INDEX_NOT_VERIFIED,
+)
+from sparse_index import (
+    SparseIndex,
+    sparse_terms,
+    retrieved_chunk_id,
+    reciprocal_rank_fusion,
+    hybrid_search,
+    BM25_K1,
+    BM25_B,
+    DEFAULT_RRF_K,
+    DEFAULT_HYBRID_CANDIDATES,
+)
+
 # Optional import for local chunking with vector_io
 try:
     from llama_stack_client import LlamaStackClient
@@ -25,6 +90,34 @@ try:
 except ImportError:
     LLAMA_STACK_CLIENT_AVAILABLE = False
 
+# Optional import for token-aware chunking
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+# Optional import for extracting text from PDF documents
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+# Optional import for fast JSON encoding of bulk insert bodies
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional import for zstd-compressed bulk insert bodies
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
 
 # =============================================================================
 # CONSTANTS
@@ -40,6 +133,21 @@ EMBEDDING_DIMENSIONS = {
     "multilingual-e5-large": 1024,
 }
 
+# Model registry: embedding dimensions learned from the server, cached on disk
+DEFAULT_MODEL_REGISTRY_PATH = Path.home() / ".cache" / "milvus-upload" / "model_registry.json"
+DEFAULT_MODEL_REGISTRY_TTL = 24 * 3600  # seconds
+EMBEDDING_PROBE_TEXT = "embedding dimension probe"
+
+# Hugging Face tokenizers for known embedding models (token-aware chunking)
+TOKENIZER_NAMES = {
+    "granite-embedding-125m": "ibm-granite/granite-embedding-125m-english",
+    "sentence-transformers/nomic-ai/nomic-embed-text-v1.5": "nomic-ai/nomic-embed-text-v1.5",
+    "nomic-embed-text-v1.5": "nomic-ai/nomic-embed-text-v1.5",
+    "all-MiniLM-L6-v2": "sentence-transformers/all-MiniLM-L6-v2",
+    "multilingual-e5-large-vllm-embedding/multilingual-e5-large": "intfloat/multilingual-e5-large",
+    "multilingual-e5-large": "intfloat/multilingual-e5-large",
+}
+
 # Milvus provider modes
 MILVUS_MODE_INLINE = "inline"
 MILVUS_MODE_REMOTE = "remote"
@@ -54,6 +162,7 @@ MILVUS_PROVIDER_IDS = {
 DEFAULT_CHUNK_SIZE = 1000  # characters
 DEFAULT_CHUNK_OVERLAP = 200  # characters
 DEFAULT_MAX_CHUNK_CHARS = 450  # Hard limit to avoid exceeding 512 tokens
+DEFAULT_CHUNK_OVERLAP_TOKENS = 50  # tokens (token-aware chunking)
 
 
 # =============================================================================
@@ -66,7 +175,7 @@ class MilvusUploadConfig:
     llama_stack_url: str = field(default_factory=lambda: os.getenv("REMOTE_BASE_URL", "http://localhost:8321"))
     documents_dir: str = "documents"
     embedding_model: str = field(default_factory=lambda: os.getenv("EMBEDDING_MODEL", "granite-embedding-125m"))
-    embedding_dimension: Optional[int] = None  # Auto-detect if None
+    embedding_dimension: Optional[int] = None  # Auto-detect with the model registry if None
     vector_store_name: Optional[str] = None  # Auto-generate if None
     # Milvus mode: "inline" (embedded/local) or "remote" (external Milvus server)
     milvus_mode: str = field(default_factory=lambda: os.getenv("MILVUS_MODE", MILVUS_MODE_INLINE))
@@ -74,12 +183,26 @@ class MilvusUploadConfig:
     verify_ssl: bool = False
     timeout: int = 300
     verbose: bool = True
+    # File upload configuration
+    upload_workers: int = 4  # Concurrent files.create calls
+    upload_retries: int = 3  # Retries per file on transient failures (jittered exponential backoff)
+    allow_partial_upload: bool = False  # Build the store from the files that uploaded when some fail
+    max_requests_per_second: Optional[float] = None  # Client-side rate limit (None = unlimited)
+    # Incremental re-ingestion: one vector store file per document, replaced when it changes
+    manifest_path: Optional[str] = None  # Content-hash manifest; enables incremental mode
+    vector_store_id: Optional[str] = None  # Existing store to update (default: from manifest)
+    # Vector index of the new store (None = provider default); see INDEX_BUILD_PARAMS
+    index_type: Optional[str] = None  # FLAT, HNSW, IVF_FLAT, IVF_PQ or DISKANN
+    index_params: Optional[Dict[str, Any]] = None  # Build parameters, merged over the defaults
+    metric_type: Optional[str] = None  # COSINE, IP or L2
+    quantization: Optional[str] = None  # "int8" or "pq": quantized variant of index_type (default HNSW)
+    # Model registry: embedding dimensions from the server, cached on disk (None = no disk cache)
+    model_registry_path: Optional[str] = field(
+        default_factory=lambda: os.getenv("MODEL_REGISTRY_PATH", str(DEFAULT_MODEL_REGISTRY_PATH))
+    )
+    model_registry_ttl: float = DEFAULT_MODEL_REGISTRY_TTL  # seconds
     
     def __post_init__(self):
-        # Auto-detect embedding dimension if not provided
-        if self.embedding_dimension is None:
-            self.embedding_dimension = EMBEDDING_DIMENSIONS.get(self.embedding_model, 768)
-        
         # Validate milvus_mode
         if self.milvus_mode not in (MILVUS_MODE_INLINE, MILVUS_MODE_REMOTE):
             raise ValueError(f"Invalid milvus_mode '{self.milvus_mode}'. Use '{MILVUS_MODE_INLINE}' or '{MILVUS_MODE_REMOTE}'")
@@ -87,6 +210,14 @@ class MilvusUploadConfig:
         # Auto-set provider_id based on milvus_mode if not explicitly provided
         if self.provider_id is None:
             self.provider_id = MILVUS_PROVIDER_IDS[self.milvus_mode]
+        
+        if self.manifest_path and self.allow_partial_upload:
+            raise ValueError("allow_partial_upload can't be combined with manifest_path: every changed file must be stored")
+        
+        # Validate the index settings early (raises ValueError)
+        vector_index_options(
+            self.index_type, self.index_params, self.metric_type, self.embedding_dimension, self.quantization
+        )
 
 
 @dataclass
@@ -94,16 +225,35 @@ class MilvusLocalChunkingConfig:
     """Configuration for Milvus upload with LOCAL chunking."""
     llama_stack_url: str = field(default_factory=lambda: os.getenv("LLAMA_STACK_URL", "http://localhost:8321"))
     documents_dir: str = "documents"
-    json_file: Optional[str] = None  # Alternative to documents_dir
+    json_file: Optional[str] = None  # JSON array or JSON Lines file, alternative to documents_dir
     embedding_model: str = field(default_factory=lambda: os.getenv("EMBEDDING_MODEL", "granite-embedding-125m"))
-    embedding_dimension: Optional[int] = None  # Auto-detect if None
+    embedding_dimension: Optional[int] = None  # Auto-detect with the model registry if None
     vector_store_name: Optional[str] = None  # Auto-generate if None
     # Chunking configuration
     chunk_size: int = DEFAULT_CHUNK_SIZE  # characters
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP  # characters
     max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS  # hard limit
+    chunk_workers: int = 1  # Chunking processes (1 = chunk in this process)
+    # Token-aware chunking (replaces chunk_size/chunk_overlap/max_chunk_chars when set)
+    max_chunk_tokens: Optional[int] = None  # Token budget per chunk, e.g. 512
+    chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS
+    tokenizer_name: Optional[str] = None  # HF repo or local path (default: from embedding_model)
+    # Split along Markdown/RST headings, code blocks, tables and lists (adds heading_path metadata)
+    structure_aware: bool = False
+    # Deduplication (exact + MinHash/LSH); kept chunks stream through, only hashes are held
+    dedup: bool = False
+    dedup_threshold: float = 0.85  # Estimated Jaccard similarity of word 3-grams
+    dedup_merge_window: int = 256  # Kept chunks held back to merge their duplicates' metadata into (0 = none)
+    dedup_references_path: Optional[str] = None  # JSON side table of the dropped duplicates, written after the run
     # Insertion configuration
     batch_size: int = 1  # 1 = insert one by one (safer)
+    insert_concurrency: int = 1  # Insert requests kept in flight
+    max_batch_bytes: Optional[int] = None  # Payload budget per insert request (None = no budget)
+    insert_retries: int = 3  # Retries per request on transient failures (jittered exponential backoff)
+    max_requests_per_second: Optional[float] = None  # Client-side rate limit (None = unlimited)
+    # Insert request encoding: "sdk" (llama_stack_client) or "bulk" (see BulkInsertTransport)
+    insert_transport: str = "sdk"
+    insert_compression: str = "identity"  # "gzip" or "zstd" request bodies (bulk transport, if the server accepts them)
     # Milvus mode
     milvus_mode: str = field(default_factory=lambda: os.getenv("MILVUS_MODE", MILVUS_MODE_REMOTE))
     provider_id: Optional[str] = None
@@ -113,12 +263,43 @@ class MilvusLocalChunkingConfig:
     verbose: bool = True
     # Verification
     verify_query: Optional[str] = None  # Query to verify insertion
+    # Existing store to add the chunks to (required with resume); None = create a new one
+    vector_store_id: Optional[str] = None
+    # Local embedding cache (embeddings are then computed client-side and sent with chunks)
+    embedding_cache_path: Optional[str] = None  # SQLite file; None = server embeds chunks
+    embedding_cache_max_entries: int = 1_000_000  # LRU eviction beyond this
+    # Checkpoint journal of acknowledged chunks (resumable ingestion)
+    checkpoint_dir: Optional[str] = None  # Journal at <checkpoint_dir>/<vector_store_id>.jsonl
+    resume: bool = False  # Continue vector_store_id from its journal, skipping acknowledged chunks
+    # Directory scanning (ignored with json_file)
+    file_extensions: Optional[List[str]] = None  # Default: DEFAULT_DOCUMENT_EXTENSIONS
+    recursive: bool = False  # Descend into subdirectories
+    read_workers: int = 1  # Threads reading and extracting files
+    min_file_size: Optional[int] = None  # bytes
+    max_file_size: Optional[int] = None  # bytes
+    modified_after: Optional[float] = None  # Unix timestamp; skip files not modified since
+    # Async pipeline: load, chunk, embed and insert run concurrently over bounded queues.
+    # Stage concurrency: read_workers, chunk_workers, embed_concurrency, insert_concurrency
+    pipeline: bool = False
+    pipeline_queue_size: int = 8  # Max items (documents or batches) waiting between stages
+    embed_concurrency: int = 1  # Embedding calls in flight (pipeline + embedding cache only)
+    pipeline_report_interval: Optional[float] = 5.0  # Seconds between stage reports (None = off)
+    # Run history: throughput of finished runs, used by plan_local_chunking to project durations
+    run_history_path: Optional[str] = None  # JSON Lines file, one record appended per run
+    # Vector index of the new store (None = provider default); see INDEX_BUILD_PARAMS
+    index_type: Optional[str] = None  # FLAT, HNSW, IVF_FLAT, IVF_PQ or DISKANN
+    index_params: Optional[Dict[str, Any]] = None  # Build parameters, merged over the defaults
+    metric_type: Optional[str] = None  # COSINE, IP or L2
+    quantization: Optional[str] = None  # "int8" or "pq": quantized variant of index_type (default HNSW)
+    # Model registry: embedding dimensions from the server, cached on disk (None = no disk cache)
+    model_registry_path: Optional[str] = field(
+        default_factory=lambda: os.getenv("MODEL_REGISTRY_PATH", str(DEFAULT_MODEL_REGISTRY_PATH))
+    )
+    model_registry_ttl: float = DEFAULT_MODEL_REGISTRY_TTL  # seconds
+    # Hybrid mode: local BM25 index of the inserted chunks, fused with dense search (RRF)
+    sparse_index_dir: Optional[str] = None  # One SQLite file per vector store; None = dense only
     
     def __post_init__(self):
-        # Auto-detect embedding dimension if not provided
-        if self.embedding_dimension is None:
-            self.embedding_dimension = EMBEDDING_DIMENSIONS.get(self.embedding_model, 768)
-        
         # Validate milvus_mode
         if self.milvus_mode not in (MILVUS_MODE_INLINE, MILVUS_MODE_REMOTE):
             raise ValueError(f"Invalid milvus_mode '{self.milvus_mode}'. Use '{MILVUS_MODE_INLINE}' or '{MILVUS_MODE_REMOTE}'")
@@ -126,6 +307,26 @@ class MilvusLocalChunkingConfig:
         # Auto-set provider_id based on milvus_mode if not explicitly provided
         if self.provider_id is None:
             self.provider_id = MILVUS_PROVIDER_IDS[self.milvus_mode]
+        
+        if self.resume and not (self.vector_store_id and self.checkpoint_dir):
+            raise ValueError("resume requires vector_store_id and checkpoint_dir")
+        
+        if self.structure_aware and self.max_chunk_tokens:
+            raise ValueError("structure_aware chunking is character based; it can't be combined with max_chunk_tokens")
+        
+        if self.insert_transport not in INSERT_TRANSPORTS:
+            raise ValueError(f"Invalid insert_transport '{self.insert_transport}'. Use one of: {', '.join(INSERT_TRANSPORTS)}")
+        if self.insert_compression not in INSERT_COMPRESSION_LEVELS:
+            raise ValueError(
+                f"Invalid insert_compression '{self.insert_compression}'. "
+                f"Use one of: {', '.join(INSERT_COMPRESSION_LEVELS)}"
+            )
+        if self.insert_compression != "identity" and self.insert_transport != "bulk":
+            raise ValueError("insert_compression requires insert_transport='bulk'")
+        
+        vector_index_options(
+            self.index_type, self.index_params, self.metric_type, self.embedding_dimension, self.quantization
+        )
 
 
 # =============================================================================
@@ -237,292 +438,2483 @@ class TextChunker:
         return merged
 
 
-def chunk_document(
-    content: str,
-    document_id: str,
-    chunk_size: int = DEFAULT_CHUNK_SIZE,
-    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
-    metadata: Dict[str, Any] = None,
-    max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS
-) -> List[Dict[str, Any]]:
+def _strip_span(text: str, start: int, end: int) -> Optional[Tuple[int, int]]:
+    """Shrink a (start, end) span the same way str.strip() would. None if empty."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+class SpanTextChunker(TextChunker):
     """
-    Split a document into chunks with metadata.
-    
-    Args:
-        content: Document text content
-        document_id: Unique identifier for the document
-        chunk_size: Target chunk size in characters
-        chunk_overlap: Overlap between chunks in characters
-        metadata: Additional metadata to include in each chunk
-        max_chunk_chars: Hard limit for chunk size (to avoid token limits)
+    Linear-time chunker that works on offsets into the original text.
     
-    Returns:
-        List of chunks with format for vector_io.insert
+    Produces exactly the same chunks as TextChunker.split_text, but the split
+    stage emits (start, end) spans in a single forward pass and the merge stage
+    groups spans, so strings are only sliced and joined once per output chunk.
     """
-    chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    text_chunks = chunker.split_text(content)
-    
-    chunks = []
-    chunk_index = 0
     
-    for chunk_text in text_chunks:
-        # If chunk exceeds hard limit, split it
-        if len(chunk_text) > max_chunk_chars:
-            # Split into sub-chunks
-            for j in range(0, len(chunk_text), max_chunk_chars - 50):
-                sub_chunk = chunk_text[j:j + max_chunk_chars]
-                if sub_chunk.strip():
-                    chunk_metadata = {
-                        "source": document_id,
-                        "chunk_index": chunk_index,
-                        "is_subchunk": True,
-                        **(metadata or {})
-                    }
-                    chunks.append({
-                        "chunk_id": f"{document_id}_chunk_{chunk_index}",
-                        "content": sub_chunk.strip(),
-                        "metadata": chunk_metadata
-                    })
-                    chunk_index += 1
-        else:
-            chunk_metadata = {
-                "source": document_id,
-                "chunk_index": chunk_index,
-                **(metadata or {})
-            }
-            chunks.append({
-                "chunk_id": f"{document_id}_chunk_{chunk_index}",
-                "content": chunk_text,
-                "metadata": chunk_metadata
-            })
-            chunk_index += 1
-    
-    # Update total_chunks in all chunks
-    for chunk in chunks:
-        chunk["metadata"]["total_chunks"] = len(chunks)
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks (same output as TextChunker.split_text)."""
+        return [self.join_spans(text, group) for group in self.merge_spans(self.split_spans(text))]
     
-    return chunks
-
-
-# =============================================================================
-# DOCUMENT LOADING
-# =============================================================================
-
-def load_documents_from_directory(
-    directory: Path,
-    extensions: List[str] = None,
-    verbose: bool = True
-) -> List[Dict]:
-    """
-    Load documents from a directory.
+    @staticmethod
+    def join_spans(text: str, group: List[Tuple[int, int]]) -> str:
+        """Materialise a group of spans produced by merge_spans."""
+        if len(group) == 1:
+            start, end = group[0]
+            return text[start:end]
+        return "\n\n".join(text[start:end] for start, end in group)
     
-    Args:
-        directory: Path to directory containing documents
-        extensions: List of file extensions to include (default: [".md", ".txt", ".rst"])
-        verbose: Print progress messages
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split text into stripped (start, end) spans.
+        
+        Equivalent to _split_text_recursive, but tracks the current chunk as a
+        window of split offsets instead of a list of substrings.
+        """
+        if not text:
+            return []
+        
+        if len(text) <= self.chunk_size:
+            span = _strip_span(text, 0, len(text))
+            return [span] if span else []
+        
+        separator = self.separators[-1]
+        for sep in self.separators:
+            if sep == "" or sep in text:
+                separator = sep
+                break
+        
+        # Character splitting with a sane overlap: windows are fixed-size strides
+        if separator == "" and 0 <= self.chunk_overlap < self.chunk_size:
+            return self._split_spans_by_stride(text)
+        
+        # When no two occurrences of the separator overlap in this text, every
+        # occurrence is a split point and they can be located with rfind
+        if separator and not any(
+            separator[:k] == separator[-k:] and separator + separator[k:] in text
+            for k in range(1, len(separator))
+        ):
+            return self._split_spans_by_jump(text, separator)
+        
+        return self._split_spans_by_separator(text, separator)
     
-    Returns:
-        List of document dicts with {document_id, content, metadata}
-    """
-    if extensions is None:
-        extensions = [".md", ".txt", ".rst"]
+    def _split_spans_by_stride(self, text: str) -> List[Tuple[int, int]]:
+        """Closed form of the separator loop when every split is one character."""
+        spans = []
+        step = self.chunk_size - self.chunk_overlap
+        start = 0
+        while start + self.chunk_size < len(text):
+            span = _strip_span(text, start, start + self.chunk_size)
+            if span:
+                spans.append(span)
+            start += step
+        span = _strip_span(text, start, len(text))
+        if span:
+            spans.append(span)
+        return spans
     
-    documents = []
+    def _split_spans_by_jump(self, text: str, separator: str) -> List[Tuple[int, int]]:
+        """
+        Same result as _split_spans_by_separator, but jumps to each flush point.
+        
+        The current chunk always covers text[window_start:window_end] and its
+        length accounting reduces to offsets, so a split fits while it ends at or
+        before window_start + chunk_size - len(separator). The last separator
+        before that limit is found with one rfind instead of visiting every split.
+        Only valid when no two occurrences of separator overlap in text.
+        """
+        spans = []
+        text_len = len(text)
+        sep_len = len(separator)
+        chunk_overlap = self.chunk_overlap
+        find = text.find
+        rfind = text.rfind
+        
+        # First split always starts the first chunk
+        pos = find(separator)
+        window_start = 0
+        window_end = text_len if pos == -1 else pos
+        
+        while pos != -1:
+            start = pos + sep_len
+            limit = window_start + self.chunk_size - sep_len
+            
+            # Absorb every following split that still fits
+            last = rfind(separator, start, limit + sep_len) if limit >= start else -1
+            if last != -1:
+                window_end = last
+                start = last + sep_len
+            
+            pos = find(separator, start)
+            end = text_len if pos == -1 else pos
+            if end <= limit:
+                # Only possible for the final split
+                window_end = end
+                break
+            
+            span = _strip_span(text, window_start, window_end)
+            if span:
+                spans.append(span)
+            
+            # Overlap: keep the longest suffix of splits that fits
+            new_start = None
+            overlap_length = 0
+            item_end = window_end
+            while True:
+                item_start = rfind(separator, window_start, item_end)
+                item_start = window_start if item_start == -1 else item_start + sep_len
+                if overlap_length + (item_end - item_start) > chunk_overlap:
+                    break
+                new_start = item_start
+                overlap_length += item_end - item_start + sep_len
+                if item_start == window_start:
+                    break
+                item_end = item_start - sep_len
+            
+            window_start = start if new_start is None else new_start
+            window_end = end
+        
+        # Last chunk
+        span = _strip_span(text, window_start, window_end)
+        if span:
+            spans.append(span)
+        
+        return spans
     
-    for ext in extensions:
-        for file_path in sorted(Path(directory).glob(f"*{ext}")):
-            try:
-                content = file_path.read_text(encoding="utf-8")
+    def _split_spans_by_separator(self, text: str, separator: str) -> List[Tuple[int, int]]:
+        """Single forward pass over the splits of text, mirroring _split_text_recursive."""
+        spans = []
+        text_len = len(text)
+        sep_len = len(separator)
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        find = text.find
+        window = deque()  # start offsets of the splits in the current chunk
+        window_end = 0  # end offset of the last split in the window
+        current_length = 0
+        start = 0
+        
+        while True:
+            # Next split is text[start:end] (one character when separator is "")
+            if sep_len:
+                pos = find(separator, start)
+                end = text_len if pos == -1 else pos
+                is_last = pos == -1
+            else:
+                end = start + 1
+                is_last = end >= text_len
+            split_len = end - start + sep_len
+            
+            if current_length + split_len > chunk_size and window:
+                # Consecutive splits are contiguous in text, so no join is needed
+                span = _strip_span(text, window[0], window_end)
+                if span:
+                    spans.append(span)
                 
-                documents.append({
-                    "document_id": file_path.name,
-                    "content": content,
-                    "metadata": {
-                        "filename": file_path.name,
-                        "file_path": str(file_path),
-                        "file_size": file_path.stat().st_size,
-                        "extension": ext,
-                    }
-                })
+                # Overlap: keep the longest suffix of splits that fits
+                keep = 0
+                overlap_length = 0
+                item_end = window_end
+                for item_start in reversed(window):
+                    item_len = item_end - item_start
+                    if overlap_length + item_len <= chunk_overlap:
+                        keep += 1
+                        overlap_length += item_len + sep_len
+                        item_end = item_start - sep_len
+                    else:
+                        break
                 
-            except Exception as e:
-                if verbose:
-                    print(f"   ⚠️  Error reading {file_path}: {e}")
+                for _ in range(len(window) - keep):
+                    window.popleft()
+                current_length = overlap_length
+            
+            window.append(start)
+            window_end = end
+            current_length += split_len
+            
+            if is_last:
+                break
+            start = end + sep_len
+        
+        # Last chunk
+        if window:
+            span = _strip_span(text, window[0], window_end)
+            if span:
+                spans.append(span)
+        
+        return spans
     
-    return documents
+    def merge_spans(self, spans: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        """Group spans the same way _merge_small_chunks merges chunks ("\n\n" joiner)."""
+        groups = []
+        current = []
+        current_length = 0
+        
+        for start, end in spans:
+            length = end - start
+            if current_length + length <= self.chunk_size:
+                current_length = current_length + 2 + length if current else length
+                current.append((start, end))
+            else:
+                if current:
+                    groups.append(current)
+                current = [(start, end)]
+                current_length = length
+        
+        if current:
+            groups.append(current)
+        
+        return groups
 
 
-def load_documents_from_json(json_path: Path) -> List[Dict]:
+_ATX_HEADING = re.compile(r" {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*")
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+_ADORNMENT = re.compile(r"([!-/:-@\[-`{-~])\1*[ \t]*")
+_LIST_ITEM = re.compile(r" {0,3}(?:[-*+]|\d{1,9}[.)]|#\.)[ \t]+\S")
+_TABLE_ROW = re.compile(r" {0,3}(?:\||\+[-=+]+[ \t]*$)")
+_TABLE_DELIMITER = re.compile(r" {0,3}\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)+\|?[ \t]*")
+_RST_SIMPLE_TABLE = re.compile(r"=+(?: +=+)+[ \t]*")
+_RST_DIRECTIVE = re.compile(r"\.\. \S")
+
+
+class MarkdownStructureChunker:
     """
-    Load documents from a JSON file.
-    
-    Supports formats:
-    - List of objects with {id/document_id, content/text, metadata}
+    Structure-aware chunker for Markdown and reStructuredText.
     
-    Args:
-        json_path: Path to JSON file
+    One linear pass over the lines splits the text into blocks: headings (ATX,
+    setext and RST over/underlined titles), code (fenced, indented, RST
+    directives and "::" literal blocks), tables (pipe, grid and simple), lists
+    and paragraphs. Chunks are packed from whole consecutive blocks of a single
+    section, so code blocks, tables and lists are only cut when one alone
+    exceeds chunk_size, and separate sections are never merged. Each chunk is
+    returned with the path of headings it sits under.
     
-    Returns:
-        List of document dicts with {document_id, content, metadata}
+    Chunks are contiguous spans of the text. Only paragraphs larger than
+    chunk_size are split further, by SpanTextChunker (with chunk_overlap);
+    oversized code blocks, tables and lists are split at line boundaries.
     """
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
     
-    if isinstance(data, list):
-        documents = []
-        for i, item in enumerate(data):
-            doc = {
-                "document_id": item.get("id", item.get("document_id", f"doc_{i}")),
-                "content": item.get("content", item.get("text", "")),
-                "metadata": item.get("metadata", {})
-            }
-            documents.append(doc)
-        return documents
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, chunk_overlap: int = DEFAULT_CHUNK_OVERLAP):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
     
-    raise ValueError(f"Unsupported JSON format: {type(data)}")
-
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks (without their heading paths)."""
+        return [SpanTextChunker.join_spans(text, group) for group, _ in self.chunk_groups(text)]
+    
+    def split_blocks(self, text: str) -> List[Tuple[int, int, str, Tuple[str, ...]]]:
+        """
+        Split text into (start, end, kind, heading path) blocks.
+        
+        Kinds are "heading", "code", "table", "list", "paragraph" and
+        "frontmatter". A heading block's path ends with its own title.
+        """
+        texts = text.split("\n") if text else []
+        starts = list(itertools.accumulate((len(line) + 1 for line in texts), initial=0))
+        
+        def line(i: int) -> str:
+            return texts[i]
+        
+        def blank(i: int) -> bool:
+            return not texts[i].strip()
+        
+        def indented(i: int) -> bool:
+            return texts[i][:1] in (" ", "\t")
+        
+        blocks = []
+        path = []  # (level, title) of the enclosing headings
+        titles = ()  # Titles of path, shared by the blocks of a section
+        underline_styles = []  # RST/setext adornment styles, in order of first use
+        literal_next = False  # Previous paragraph ended with "::"
+        
+        def add(kind: str, first: int, last: int, title: Optional[str] = None, level: int = 0):
+            nonlocal titles
+            if title is not None:
+                while path and path[-1][0] >= level:
+                    path.pop()
+                path.append((level, title))
+                titles = tuple(title for _, title in path)
+            end = starts[last] + len(texts[last])
+            while end > starts[first] and text[end - 1] in " \t\r":
+                end -= 1
+            blocks.append((starts[first], end, kind, titles))
+        
+        def underline_level(style: Tuple[str, bool]) -> int:
+            if style not in underline_styles:
+                underline_styles.append(style)
+            return underline_styles.index(style) + 1
+        
+        def is_underline(i: int, title: str) -> bool:
+            match = _ADORNMENT.fullmatch(line(i))
+            if not match:
+                return False
+            length = len(line(i).strip())
+            if match.group(1) in "=-":
+                return length >= min(3, len(title))
+            return length >= max(2, len(title))
+        
+        def starts_block(i: int) -> bool:
+            current = line(i)
+            return bool(_FENCE.match(current) or _ATX_HEADING.fullmatch(current))
+        
+        n = len(texts)
+        i = 0
+        
+        # YAML front matter
+        if n > 1 and line(0).rstrip() == "---":
+            for j in range(1, n):
+                if line(j).rstrip() in ("---", "..."):
+                    add("frontmatter", 0, j)
+                    i = j + 1
+                    break
+        
+        while i < n:
+            if blank(i):
+                i += 1
+                continue
+            current = line(i)
+            
+            fence = _FENCE.match(current)
+            if fence:
+                marker = fence.group(1)
+                closing = re.compile(rf" {{0,3}}{re.escape(marker[0])}{{{len(marker)},}}[ \t]*")
+                j = i + 1
+                while j < n and not closing.fullmatch(line(j)):
+                    j += 1
+                add("code", i, min(j, n - 1))
+                i = j + 1
+                literal_next = False
+                continue
+            
+            atx = _ATX_HEADING.fullmatch(current)
+            if atx:
+                add("heading", i, i, (atx.group(2) or "").strip(), len(atx.group(1)))
+                i += 1
+                literal_next = False
+                continue
+            
+            # RST title with overline: adornment, title, same adornment
+            if (
+                i + 2 < n and _ADORNMENT.fullmatch(current) and not blank(i + 1)
+                and line(i + 2).strip() == current.strip()
+                and len(current.strip()) >= len(line(i + 1).strip())
+            ):
+                title = line(i + 1).strip()
+                add("heading", i, i + 2, title, underline_level((current.strip()[0], True)))
+                i += 3
+                literal_next = False
+                continue
+            
+            # Setext / RST underlined title (a single-line paragraph)
+            if (
+                i + 1 < n and not indented(i) and not _LIST_ITEM.match(current)
+                and not _ADORNMENT.fullmatch(current) and not _TABLE_ROW.match(current)
+                and is_underline(i + 1, current.strip())
+            ):
+                title = current.strip()
+                add("heading", i, i + 1, title, underline_level((line(i + 1).strip()[0], False)))
+                i += 2
+                literal_next = False
+                continue
+            
+            # Indented blocks: code (markdown), literal blocks and block quotes (RST)
+            if indented(i) or _RST_DIRECTIVE.match(current):
+                j = i + 1
+                while j < n and (blank(j) or indented(j)):
+                    j += 1
+                last = j - 1
+                while blank(last):
+                    last -= 1
+                add("code" if literal_next or _RST_DIRECTIVE.match(current) or current.startswith(("    ", "\t"))
+                    else "paragraph", i, last)
+                i = j
+                literal_next = False
+                continue
+            
+            # Tables: pipe / grid rows, pipe tables without outer pipes, RST simple tables
+            if (
+                _TABLE_ROW.match(current)
+                or ("|" in current and i + 1 < n and _TABLE_DELIMITER.fullmatch(line(i + 1)))
+                or _RST_SIMPLE_TABLE.fullmatch(current)
+            ):
+                j = i + 1
+                while j < n and not blank(j):
+                    j += 1
+                add("table", i, j - 1)
+                i = j
+                literal_next = False
+                continue
+            
+            if _LIST_ITEM.match(current):
+                j = i + 1
+                while j < n:
+                    if blank(j):
+                        k = j
+                        while k < n and blank(k):
+                            k += 1
+                        if k < n and (indented(k) or _LIST_ITEM.match(line(k))):
+                            j = k
+                            continue
+                        break
+                    if starts_block(j):
+                        break
+                    j += 1
+                last = j - 1
+                while blank(last):
+                    last -= 1
+                add("list", i, last)
+                i = j
+                literal_next = False
+                continue
+            
+            j = i + 1
+            while j < n and not blank(j) and not starts_block(j):
+                j += 1
+            add("paragraph", i, j - 1)
+            literal_next = line(j - 1).rstrip().endswith("::")
+            i = j
+        
+        return blocks
+    
+    def chunk_groups(self, text: str) -> List[Tuple[List[Tuple[int, int]], Tuple[str, ...]]]:
+        """
+        Pack blocks into chunks.
+        
+        Headings with no body yet (e.g. a chapter title directly followed by
+        its first section) are kept with the first chunk of their child.
+        
+        Returns:
+            List of (spans, heading path). Spans are joined with "\n\n" as in
+            SpanTextChunker.join_spans; there is a single one unless a
+            paragraph had to be split.
+        """
+        chunks = []
+        current = None  # [start, end, path, has body] of the chunk being packed
+        
+        def flush():
+            nonlocal current
+            if current:
+                chunks.append(([(current[0], current[1])], current[2]))
+            current = None
+        
+        for start, end, kind, path in self.split_blocks(text):
+            if kind == "heading":
+                # A heading-only chunk only stays open for a subsection
+                if current and (current[3] or path[:len(current[2])] != current[2] or len(path) <= len(current[2])):
+                    flush()
+                if current:
+                    current[1:3] = [end, path]
+                else:
+                    current = [start, end, path, False]
+                continue
+            
+            if current and current[2] != path:
+                flush()
+            if current and end - current[0] <= self.chunk_size:
+                current[1] = end
+                current[3] = True
+                continue
+            if current and current[3]:
+                flush()
+            
+            if end - start <= self.chunk_size:
+                flush()  # Headings that don't fit with the block go alone
+                current = [start, end, path, True]
+                continue
+            
+            # Oversized block: headings are kept with its first piece if they fit
+            pieces = self._split_oversized(text, start, end, kind)
+            if current:
+                first = pieces[0]
+                if len(first) == 1 and first[0][1] - current[0] <= self.chunk_size:
+                    pieces[0] = [(current[0], first[0][1])]
+                    current = None
+                else:
+                    flush()
+            chunks.extend((group, path) for group in pieces)
+        
+        flush()
+        return chunks
+    
+    def _split_oversized(self, text: str, start: int, end: int, kind: str) -> List[List[Tuple[int, int]]]:
+        """Split a block larger than chunk_size into span groups."""
+        if kind == "paragraph":
+            fallback = SpanTextChunker(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+            return [
+                [(start + span_start, start + span_end) for span_start, span_end in group]
+                for group in fallback.merge_spans(fallback.split_spans(text[start:end]))
+            ]
+        
+        # Code blocks, tables and lists: pack whole lines
+        pieces = []
+        piece_start = start
+        last_break = None
+        pos = text.find("\n", start, end)
+        while pos != -1:
+            if pos - piece_start > self.chunk_size and last_break is not None:
+                pieces.append([(piece_start, last_break)])
+                piece_start = last_break + 1
+            last_break = pos
+            pos = text.find("\n", pos + 1, end)
+        if end - piece_start > self.chunk_size and last_break is not None and last_break > piece_start:
+            pieces.append([(piece_start, last_break)])
+            piece_start = last_break + 1
+        pieces.append([(piece_start, end)])
+        return [group for group in pieces if _strip_span(text, *group[0])]
 
-# =============================================================================
-# CLIENT CREATION
-# =============================================================================
 
-def create_clients(base_url: str, timeout: int = 300, verify_ssl: bool = False):
+@lru_cache(maxsize=8)
+def get_tokenizer(name: str):
     """
-    Create Llama Stack and OpenAI clients.
+    Load a Hugging Face tokenizer once per process.
     
     Args:
-        base_url: Llama Stack server URL
-        timeout: Request timeout in seconds
-        verify_ssl: Whether to verify SSL certificates
+        name: Embedding model identifier (see TOKENIZER_NAMES), Hugging Face
+            repo ID, or local path to a tokenizer.json file or its directory
     
     Returns:
-        Tuple of (LlamaStackClient, OpenAI client)
+        tokenizers.Tokenizer with truncation and padding disabled
     """
-    http_client = httpx.Client(verify=verify_ssl, timeout=timeout)
+    if not TOKENIZERS_AVAILABLE:
+        raise RuntimeError("tokenizers is required for token-aware chunking. Install with: pip install tokenizers")
     
-    if LLAMA_STACK_CLIENT_AVAILABLE:
-        llama_client = LlamaStackClient(
-            base_url=base_url,
-            http_client=http_client
-        )
+    path = Path(name)
+    if path.is_dir():
+        path = path / "tokenizer.json"
+    if path.is_file():
+        tokenizer = Tokenizer.from_file(str(path))
     else:
-        llama_client = None
-    
-    openai_client = OpenAI(
-        base_url=f"{base_url}/v1",
-        api_key="fake-key",
-        http_client=http_client
-    )
+        tokenizer = Tokenizer.from_pretrained(TOKENIZER_NAMES.get(name, name))
     
-    return llama_client, openai_client
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
 
 
-def create_vector_store(
-    openai_client: OpenAI,
-    name: str,
-    embedding_model: str,
-    embedding_dimension: int,
-    provider_id: str = "milvus-remote",
-    verbose: bool = True
-) -> str:
+def local_tokenizer_file(name: str) -> Path:
     """
-    Create a new vector store in Milvus.
+    Find a tokenizer.json on disk, without any network access.
+    
+    Looks at `name` as a local file or directory, then in the Hugging Face hub
+    cache (HF_HUB_CACHE, or HF_HOME/hub) that Tokenizer.from_pretrained
+    downloads into, for the repo TOKENIZER_NAMES maps `name` to.
     
     Args:
-        openai_client: OpenAI-compatible client
-        name: Name for the vector store
-        embedding_model: Embedding model identifier
-        embedding_dimension: Dimension of embeddings
-        provider_id: Milvus provider ID
-        verbose: Print progress messages
+        name: Same as for get_tokenizer
     
     Returns:
-        Vector store ID
+        Path of the tokenizer.json file
+    
+    Raises:
+        RuntimeError: If the tokenizer is neither a local file nor cached
     """
-    if verbose:
-        print(f"\n🗄️  Creating vector store '{name}'...")
+    path = Path(name)
+    if path.is_dir():
+        path = path / "tokenizer.json"
+    if path.is_file():
+        return path
     
-    vector_store = openai_client.vector_stores.create(
-        name=name,
-        extra_body={
-            "embedding_model": embedding_model,
-            "embedding_dimension": embedding_dimension,
-            "provider_id": provider_id
-        }
+    repo_id = TOKENIZER_NAMES.get(name, name)
+    hub_cache = Path(os.getenv("HF_HUB_CACHE") or Path(os.getenv("HF_HOME", Path.home() / ".cache" / "huggingface")) / "hub")
+    repo_dir = hub_cache / f"models--{repo_id.replace('/', '--')}"
+    ref = repo_dir / "refs" / "main"
+    snapshots = [repo_dir / "snapshots" / ref.read_text().strip()] if ref.is_file() else []
+    snapshots += sorted((repo_dir / "snapshots").glob("*")) if (repo_dir / "snapshots").is_dir() else []
+    for snapshot in snapshots:
+        if (snapshot / "tokenizer.json").is_file():
+            return snapshot / "tokenizer.json"
+    raise RuntimeError(
+        f"Tokenizer '{repo_id}' is not available locally (not a local file, not in {hub_cache}). "
+        "Set tokenizer_name (--tokenizer) to a local tokenizer.json, or run once with network access to cache it."
     )
-    
-    if verbose:
-        print(f"   ✅ Vector Store ID: {vector_store.id}")
-    
-    return vector_store.id
-
 
-# =============================================================================
-# CHUNK INSERTION (LOCAL CHUNKING)
-# =============================================================================
 
-def insert_chunks_with_vector_io(
-    llama_client,  # LlamaStackClient
-    vector_store_id: str,
-    chunks: List[Dict[str, Any]],
-    batch_size: int = 1,
-    verbose: bool = False
-) -> int:
+class TokenTextChunker:
     """
-    Insert pre-processed chunks using vector_io.insert.
+    Chunker that fills each chunk up to a token budget.
     
-    Args:
-        llama_client: Llama Stack client
-        vector_store_id: ID of the vector store
-        chunks: List of chunks with format {chunk_id, content, metadata}
-        batch_size: Batch size for insertion (1 = one by one, safer)
-        verbose: Show detailed progress
-        
-    Returns:
-        Number of chunks inserted
+    Uses the same separator hierarchy as TextChunker, but sizes are measured in
+    tokens of the embedding model's tokenizer. Each text is tokenized once;
+    the token count of any span is then derived from the token offsets with a
+    binary search. Cutting inside a word can make a chunk re-tokenize to a few
+    more tokens, so the resulting chunks are checked with one batched encode
+    and the rare offenders are split again with a smaller budget.
     """
-    if not LLAMA_STACK_CLIENT_AVAILABLE:
-        raise RuntimeError("llama_stack_client is required for local chunking. Install with: pip install llama-stack-client")
     
-    total_inserted = 0
-    total_failed = 0
+    def __init__(
+        self,
+        tokenizer,
+        max_tokens: int,
+        overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+        separators: List[str] = None
+    ):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.limit = max_tokens  # Hard limit checked on the final chunks
+        # Room for the special tokens ([CLS], [SEP], ...) added at embedding time
+        self.budget = max(1, max_tokens - tokenizer.num_special_tokens_to_add(False))
+        self.overlap_tokens = min(overlap_tokens, self.budget - 1)
+        self.separators = separators or ["\n\n", "\n", ". ", " ", ""]
+    
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks of at most max_tokens tokens (special tokens included)."""
+        return [text[start:end] for start, end in self.chunk_spans(text)]
+    
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) offsets of the chunks returned by split_text."""
+        spans = self.split_spans(text)
+        if not spans:
+            return spans
+        
+        result = []
+        chunks = [text[start:end] for start, end in spans]
+        for (start, end), chunk, encoding in zip(spans, chunks, self.tokenizer.encode_batch(chunks)):
+            if len(encoding.ids) <= self.limit or self.max_tokens <= 1:
+                result.append((start, end))
+                continue
+            # Strictly smaller budget each time, so this always terminates
+            smaller = TokenTextChunker(
+                self.tokenizer,
+                max_tokens=min(self.max_tokens - 1, self.max_tokens * self.limit // len(encoding.ids)),
+                overlap_tokens=0,
+                separators=self.separators
+            )
+            smaller.limit = self.limit
+            result.extend((start + sub_start, start + sub_end) for sub_start, sub_end in smaller.chunk_spans(chunk))
+        return result
+    
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Split text into stripped (start, end) spans within the token budget."""
+        encoding = self.tokenizer.encode(text, add_special_tokens=False)
+        token_starts = [start for start, end in encoding.offsets if end > start]
+        
+        def count(start: int, end: int) -> int:
+            return bisect_left(token_starts, end) - bisect_left(token_starts, start)
+        
+        spans = []
+        self._split(text, 0, len(text), 0, count, token_starts, spans)
+        return spans
+    
+    def _split(self, text, start, end, sep_index, count, token_starts, spans):
+        """Pack the splits of text[start:end] greedily; recurse on oversized ones."""
+        if count(start, end) <= self.budget:
+            span = _strip_span(text, start, end)
+            if span:
+                spans.append(span)
+            return
+        
+        separator = ""
+        for sep in self.separators[sep_index:]:
+            if sep == "" or text.find(sep, start, end) != -1:
+                separator = sep
+                break
+        
+        if separator == "":
+            # No separator left: cut at token boundaries
+            first = bisect_left(token_starts, start)
+            last = bisect_left(token_starts, end)
+            step = self.budget - self.overlap_tokens
+            for i in range(first, last, step):
+                chunk_start = max(start, token_starts[i])
+                chunk_end = token_starts[i + self.budget] if i + self.budget < last else end
+                span = _strip_span(text, chunk_start, chunk_end)
+                if span:
+                    spans.append(span)
+                if i + self.budget >= last:
+                    break
+            return
+        
+        pieces = []
+        piece_start = start
+        while True:
+            pos = text.find(separator, piece_start, end)
+            if pos == -1:
+                pieces.append((piece_start, end))
+                break
+            pieces.append((piece_start, pos))
+            piece_start = pos + len(separator)
+        
+        i = 0
+        while i < len(pieces):
+            window_start = pieces[i][0]
+            if count(window_start, pieces[i][1]) > self.budget:
+                self._split(text, window_start, pieces[i][1], self.separators.index(separator) + 1,
+                            count, token_starts, spans)
+                i += 1
+                continue
+            
+            j = i
+            while j + 1 < len(pieces) and count(window_start, pieces[j + 1][1]) <= self.budget:
+                j += 1
+            
+            span = _strip_span(text, window_start, pieces[j][1])
+            if span:
+                spans.append(span)
+            if j + 1 >= len(pieces):
+                break
+            
+            # Overlap: start the next window as early as possible while keeping the
+            # overlap within overlap_tokens and the next piece within budget
+            k = j + 1
+            while (
+                k - 1 > i
+                and count(pieces[k - 1][0], pieces[j][1]) <= self.overlap_tokens
+                and count(pieces[k - 1][0], pieces[j + 1][1]) <= self.budget
+            ):
+                k -= 1
+            i = k
+
+
+def _window_spans(text: str, group: List[Tuple[int, int]], start: int, end: int) -> List[Tuple[int, int]]:
+    """
+    Spans of SpanTextChunker.join_spans(text, group)[start:end].strip().
+    
+    The window is mapped back onto the source spans it covers; the "\n\n"
+    joiners between them are implied, as in join_spans.
+    """
+    parts = []
+    offset = 0
+    for span_start, span_end in group:
+        if offset >= end:
+            break
+        lo = max(start, offset)
+        hi = min(end, offset + span_end - span_start)
+        if lo < hi:
+            parts.append([span_start + lo - offset, span_start + hi - offset])
+        offset += span_end - span_start + 2
+    
+    # Source spans are already stripped, so only the clipped edges can need it
+    while parts:
+        while parts[0][0] < parts[0][1] and text[parts[0][0]].isspace():
+            parts[0][0] += 1
+        if parts[0][0] < parts[0][1]:
+            break
+        parts.pop(0)
+    while parts:
+        while parts[-1][1] > parts[-1][0] and text[parts[-1][1] - 1].isspace():
+            parts[-1][1] -= 1
+        if parts[-1][1] > parts[-1][0]:
+            break
+        parts.pop()
+    return [(lo, hi) for lo, hi in parts]
+
+
+class ChunkBatch:
+    """
+    Columnar chunks of one document.
+    
+    Instead of one dict (with its own metadata dict) per chunk, a batch holds
+    the document text once, every chunk as a run of (start, end) offsets into
+    it in flat arrays, and one metadata dict shared by all of its chunks.
+    Chunk dicts are only materialised when the batch is iterated, i.e. at the
+    vector_io.insert boundary. Batches pickle compactly, which also keeps the
+    chunking process pool's result traffic small.
+    """
+    
+    __slots__ = (
+        "document_id", "text", "metadata", "span_starts", "span_ends", "chunk_offsets", "subchunks",
+        "heading_paths", "heading_ids",
+    )
+    
+    def __init__(self, document_id: str, text: str, metadata: Dict[str, Any] = None):
+        self.document_id = document_id
+        self.text = text
+        self.metadata = metadata or {}
+        self.span_starts = array("q")
+        self.span_ends = array("q")
+        # Chunk i is made of spans chunk_offsets[i]:chunk_offsets[i + 1]
+        self.chunk_offsets = array("q", [0])
+        self.subchunks = array("B")
+        # Structure-aware chunking: heading path of each chunk (-1 = none), shared by its section
+        self.heading_paths = []
+        self.heading_ids = array("l")
+    
+    def append(self, spans: Iterable[Tuple[int, int]], is_subchunk: bool = False, heading_path: Optional[str] = None):
+        """Add a chunk made of spans joined with "\n\n" (see SpanTextChunker.join_spans)."""
+        for start, end in spans:
+            self.span_starts.append(start)
+            self.span_ends.append(end)
+        self.chunk_offsets.append(len(self.span_starts))
+        self.subchunks.append(is_subchunk)
+        if heading_path and not (self.heading_paths and self.heading_paths[-1] == heading_path):
+            self.heading_paths.append(heading_path)
+        self.heading_ids.append(len(self.heading_paths) - 1 if heading_path else -1)
+    
+    def __len__(self) -> int:
+        return len(self.subchunks)
+    
+    def chunk_id(self, index: int) -> str:
+        return f"{self.document_id}_chunk_{index}"
+    
+    def content(self, index: int) -> str:
+        first, last = self.chunk_offsets[index], self.chunk_offsets[index + 1]
+        if last - first == 1:
+            return self.text[self.span_starts[first]:self.span_ends[first]]
+        return "\n\n".join(self.text[self.span_starts[i]:self.span_ends[i]] for i in range(first, last))
+    
+    def chunk(self, index: int) -> Dict[str, Any]:
+        """Materialise chunk `index` as a {chunk_id, content, metadata} dict."""
+        chunk_metadata = {"source": self.document_id, "chunk_index": index}
+        if self.subchunks[index]:
+            chunk_metadata["is_subchunk"] = True
+        if self.heading_ids[index] >= 0:
+            chunk_metadata["heading_path"] = self.heading_paths[self.heading_ids[index]]
+        chunk_metadata.update(self.metadata)
+        chunk_metadata["total_chunks"] = len(self)
+        
+        return {
+            "chunk_id": self.chunk_id(index),
+            "content": self.content(index),
+            "metadata": chunk_metadata
+        }
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return map(self.chunk, range(len(self)))
+
+
+def chunk_document_batch(
+    content: str,
+    document_id: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    metadata: Dict[str, Any] = None,
+    max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS,
+    max_chunk_tokens: Optional[int] = None,
+    chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    tokenizer_name: Optional[str] = None,
+    structure_aware: bool = False
+) -> ChunkBatch:
+    """
+    Split a document into a ChunkBatch.
+    
+    Args:
+        content: Document text content
+        document_id: Unique identifier for the document
+        chunk_size: Target chunk size in characters
+        chunk_overlap: Overlap between chunks in characters
+        metadata: Additional metadata to include in each chunk
+        max_chunk_chars: Hard limit for chunk size (to avoid token limits)
+        max_chunk_tokens: Token budget per chunk. When set, chunks are filled up
+            to this many tokens of the tokenizer instead of using the character
+            settings above
+        chunk_overlap_tokens: Overlap between chunks in tokens (token mode)
+        tokenizer_name: Tokenizer for token mode (see get_tokenizer)
+        structure_aware: Chunk along Markdown/RST structure with
+            MarkdownStructureChunker, packing up to min(chunk_size,
+            max_chunk_chars) characters; chunks get heading_path metadata
+    
+    Returns:
+        ChunkBatch whose chunks are in the format for vector_io.insert
+    """
+    batch = ChunkBatch(document_id, content, metadata)
+    
+    def add_group(group: List[Tuple[int, int]], heading_path: Optional[str] = None):
+        length = sum(end - start for start, end in group) + 2 * (len(group) - 1)
+        # If chunk exceeds hard limit, split it
+        if length > max_chunk_chars:
+            for j in range(0, length, max_chunk_chars - 50):
+                spans = _window_spans(content, group, j, j + max_chunk_chars)
+                if spans:
+                    batch.append(spans, is_subchunk=True, heading_path=heading_path)
+        else:
+            batch.append(group, heading_path=heading_path)
+    
+    if structure_aware:
+        if max_chunk_tokens:
+            raise ValueError("structure_aware chunking is character based; it can't be combined with max_chunk_tokens")
+        chunker = MarkdownStructureChunker(chunk_size=min(chunk_size, max_chunk_chars), chunk_overlap=chunk_overlap)
+        for group, path in chunker.chunk_groups(content):
+            add_group(group, " > ".join(title for title in path if title))
+    elif max_chunk_tokens:
+        if not tokenizer_name:
+            raise ValueError("tokenizer_name is required when max_chunk_tokens is set")
+        chunker = TokenTextChunker(
+            get_tokenizer(tokenizer_name),
+            max_tokens=max_chunk_tokens,
+            overlap_tokens=chunk_overlap_tokens
+        )
+        # Chunks are already within the token budget
+        for span in chunker.chunk_spans(content):
+            batch.append((span,))
+    else:
+        chunker = SpanTextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        for group in chunker.merge_spans(chunker.split_spans(content)):
+            add_group(group)
+    
+    return batch
+
+
+def iter_chunk_document(
+    content: str,
+    document_id: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    metadata: Dict[str, Any] = None,
+    max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS,
+    max_chunk_tokens: Optional[int] = None,
+    chunk_overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    tokenizer_name: Optional[str] = None,
+    structure_aware: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    Split a document into chunks with metadata, yielding one chunk at a time.
+    
+    The chunks are held as a ChunkBatch (offsets into the content); chunk
+    dicts are built lazily. Arguments are those of chunk_document_batch.
+    
+    Yields:
+        Chunks with format for vector_io.insert
+    """
+    yield from chunk_document_batch(
+        content,
+        document_id,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        metadata=metadata,
+        max_chunk_chars=max_chunk_chars,
+        max_chunk_tokens=max_chunk_tokens,
+        chunk_overlap_tokens=chunk_overlap_tokens,
+        tokenizer_name=tokenizer_name,
+        structure_aware=structure_aware
+    )
+
+
+def chunk_document(
+    content: str,
+    document_id: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    metadata: Dict[str, Any] = None,
+    max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS,
+    **token_options
+) -> List[Dict[str, Any]]:
+    """
+    Split a document into chunks with metadata.
+    
+    List-returning wrapper around iter_chunk_document (token_options are its
+    max_chunk_tokens, chunk_overlap_tokens and tokenizer_name).
+    
+    Returns:
+        List of chunks with format for vector_io.insert
+    """
+    return list(iter_chunk_document(
+        content,
+        document_id,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        metadata=metadata,
+        max_chunk_chars=max_chunk_chars,
+        **token_options
+    ))
+
+
+def _chunk_document_task(
+    content: str,
+    document_id: str,
+    metadata: Dict[str, Any],
+    chunk_options: Dict[str, Any]
+) -> ChunkBatch:
+    """Process-pool entry point (module level so it can be pickled)."""
+    return chunk_document_batch(content, document_id, metadata=metadata, **chunk_options)
+
+
+def _chunk_pipeline_document(
+    doc: Dict[str, Any],
+    chunk_options: Dict[str, Any]
+) -> Tuple[str, ChunkBatch]:
+    """Chunk stage of the async pipeline (run in a process or thread pool)."""
+    return doc["document_id"], _chunk_document_task(
+        doc["content"], doc["document_id"], doc.get("metadata", {}), chunk_options
+    )
+
+
+def iter_chunked_documents(
+    documents: Iterable[Dict[str, Any]],
+    workers: int = 1,
+    prefetch: Optional[int] = None,
+    **chunk_options
+) -> Iterator[Tuple[Dict[str, Any], ChunkBatch]]:
+    """
+    Chunk a stream of documents, optionally across a pool of processes.
+    
+    Results are yielded in input order. With workers > 1, at most `prefetch`
+    documents (default: 2 per worker) are being chunked ahead of the consumer,
+    so memory stays bounded while every core is kept busy.
+    
+    Args:
+        documents: Document dicts with {document_id, content, metadata}
+        workers: Number of chunking processes (1 = chunk in this process)
+        prefetch: Max documents in flight when workers > 1
+        **chunk_options: Keyword arguments for chunk_document_batch
+            (chunk_size, chunk_overlap, max_chunk_chars, max_chunk_tokens, ...)
+    
+    Yields:
+        Tuples of (document, its chunks as a ChunkBatch)
+    """
+    if workers <= 1:
+        for doc in documents:
+            yield doc, chunk_document_batch(
+                content=doc["content"],
+                document_id=doc["document_id"],
+                metadata=doc.get("metadata", {}),
+                **chunk_options
+            )
+        return
+    
+    prefetch = prefetch or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for doc in documents:
+            in_flight.append((doc, executor.submit(
+                _chunk_document_task,
+                doc["content"],
+                doc["document_id"],
+                doc.get("metadata", {}),
+                chunk_options
+            )))
+            if len(in_flight) >= prefetch:
+                doc, future = in_flight.popleft()
+                yield doc, future.result()
+        
+        while in_flight:
+            doc, future = in_flight.popleft()
+            yield doc, future.result()
+
+
+# =============================================================================
+# DOCUMENT LOADING
+# =============================================================================
+
+def read_text_file(file_path: Path) -> str:
+    """Read a plain-text document (Markdown, text, reStructuredText, ...)."""
+    return file_path.read_text(encoding="utf-8")
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collect the visible text of an HTML page, one paragraph per block element."""
+    
+    BLOCK_TAGS = {
+        "p", "div", "section", "article", "header", "footer", "li", "tr", "br", "pre",
+        "table", "ul", "ol", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "title",
+    }
+    SKIP_TAGS = {"script", "style", "noscript", "template"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = [[]]
+        self.skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.blocks.append([])
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.blocks.append([])
+    
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.blocks[-1].append(data)
+    
+    def text(self) -> str:
+        paragraphs = (" ".join("".join(block).split()) for block in self.blocks)
+        return "\n\n".join(p for p in paragraphs if p)
+
+
+def read_html_file(file_path: Path) -> str:
+    """Extract the visible text of an HTML document."""
+    parser = _HTMLTextExtractor()
+    parser.feed(file_path.read_text(encoding="utf-8", errors="replace"))
+    parser.close()
+    return parser.text()
+
+
+def read_pdf_file(file_path: Path) -> str:
+    """Extract the text layer of a PDF document (requires pypdf)."""
+    if not PYPDF_AVAILABLE:
+        raise ImportError("pypdf is required to read PDF files. Install with: pip install pypdf")
+    reader = PdfReader(str(file_path))
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+# Loaders by file extension; files with unregistered extensions are read as text
+DOCUMENT_LOADERS: Dict[str, Callable[[Path], str]] = {
+    ".md": read_text_file,
+    ".txt": read_text_file,
+    ".rst": read_text_file,
+    ".html": read_html_file,
+    ".htm": read_html_file,
+    ".pdf": read_pdf_file,
+}
+
+DEFAULT_DOCUMENT_EXTENSIONS = [".md", ".txt", ".rst"]
+
+
+def register_document_loader(extension: str, loader: Callable[[Path], str]) -> None:
+    """
+    Register (or replace) the loader used for files with the given extension.
+    
+    Args:
+        extension: File extension including the dot, e.g. ".docx"
+        loader: Callable taking the file path and returning its text
+    """
+    DOCUMENT_LOADERS[extension] = loader
+
+
+def scan_directory(
+    directory: Path,
+    extensions: List[str] = None,
+    recursive: bool = False,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    modified_after: Optional[float] = None
+) -> List[Tuple[Path, str, os.stat_result]]:
+    """
+    Find the documents to load in a directory with a single os.scandir pass.
+    
+    Files are ordered by extension (in `extensions` order), then by path.
+    Symlinked directories are not followed.
+    
+    Args:
+        directory: Directory to scan
+        extensions: File extensions to include (default: DEFAULT_DOCUMENT_EXTENSIONS)
+        recursive: Descend into subdirectories
+        min_size: Skip files smaller than this many bytes
+        max_size: Skip files larger than this many bytes
+        modified_after: Skip files whose mtime is not after this Unix timestamp
+    
+    Returns:
+        List of (file path, matched extension, stat result)
+    """
+    if extensions is None:
+        extensions = DEFAULT_DOCUMENT_EXTENSIONS
+    
+    found = []
+    pending = [Path(directory)]
+    while pending:
+        current = pending.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(current / entry.name)
+                    continue
+                
+                ext = next((e for e in extensions if entry.name.endswith(e)), None)
+                if ext is None or not entry.is_file():
+                    continue
+                
+                stat = entry.stat()
+                if min_size is not None and stat.st_size < min_size:
+                    continue
+                if max_size is not None and stat.st_size > max_size:
+                    continue
+                if modified_after is not None and stat.st_mtime <= modified_after:
+                    continue
+                
+                found.append((current / entry.name, ext, stat))
+    
+    order = {ext: i for i, ext in enumerate(extensions)}
+    found.sort(key=lambda item: (order[item[1]], item[0].relative_to(directory).parts))
+    return found
+
+
+def iter_documents_from_directory(
+    directory: Path,
+    extensions: List[str] = None,
+    verbose: bool = True,
+    recursive: bool = False,
+    workers: int = 1,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    modified_after: Optional[float] = None
+) -> Iterator[Dict]:
+    """
+    Stream documents from a directory.
+    
+    Files are found with scan_directory and read with the loader registered
+    for their extension in DOCUMENT_LOADERS. With workers > 1, files are read
+    by a thread pool, at most 2 per worker ahead of the consumer; documents are
+    still yielded in scan order.
+    
+    Args:
+        directory: Path to directory containing documents
+        extensions: List of file extensions to include (default: [".md", ".txt", ".rst"])
+        verbose: Print progress messages
+        recursive: Descend into subdirectories
+        workers: Number of reader threads (1 = read in this thread)
+        min_size: Skip files smaller than this many bytes
+        max_size: Skip files larger than this many bytes
+        modified_after: Skip files not modified after this Unix timestamp
+    
+    Yields:
+        Document dicts with {document_id, content, metadata}
+    """
+    directory = Path(directory)
+    files = scan_directory(
+        directory,
+        extensions=extensions,
+        recursive=recursive,
+        min_size=min_size,
+        max_size=max_size,
+        modified_after=modified_after
+    )
+    
+    def load(file_path: Path, ext: str, stat: os.stat_result) -> Dict:
+        loader = DOCUMENT_LOADERS.get(ext, read_text_file)
+        return {
+            "document_id": file_path.relative_to(directory).as_posix(),
+            "content": loader(file_path),
+            "metadata": {
+                "filename": file_path.name,
+                "file_path": str(file_path),
+                "file_size": stat.st_size,
+                "extension": ext,
+            }
+        }
+    
+    def load_or_skip(item) -> Optional[Dict]:
+        try:
+            return load(*item)
+        except Exception as e:
+            if verbose:
+                print(f"   ⚠️  Error reading {item[0]}: {e}")
+            return None
+    
+    if workers <= 1:
+        for item in files:
+            document = load_or_skip(item)
+            if document is not None:
+                yield document
+        return
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for item in files:
+            in_flight.append(executor.submit(load_or_skip, item))
+            if len(in_flight) >= workers * 2:
+                document = in_flight.popleft().result()
+                if document is not None:
+                    yield document
+        
+        while in_flight:
+            document = in_flight.popleft().result()
+            if document is not None:
+                yield document
+
+
+def load_documents_from_directory(
+    directory: Path,
+    extensions: List[str] = None,
+    verbose: bool = True,
+    **scan_options
+) -> List[Dict]:
+    """
+    Load documents from a directory.
+    
+    List-returning wrapper around iter_documents_from_directory.
+    
+    Args:
+        **scan_options: recursive, workers, min_size, max_size, modified_after
+    
+    Returns:
+        List of document dicts with {document_id, content, metadata}
+    """
+    return list(iter_documents_from_directory(directory, extensions=extensions, verbose=verbose, **scan_options))
+
+
+# Extensions always read as JSON Lines, even with a single record
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def iter_json_records(json_path: Path, read_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Stream the records of a JSON array or JSON Lines file.
+    
+    The file is memory-mapped and decoded incrementally, so only the records
+    being parsed are held in memory. A file starting with "[" is read as one
+    JSON array; anything else as JSON Lines (newline-separated values, which
+    may themselves be pretty-printed). A .json file holding a single non-array
+    value (e.g. {"documents": [...]}) is rejected rather than read as one
+    record; .jsonl / .ndjson files may hold a single record.
+    
+    Args:
+        json_path: Path to the JSON or JSON Lines file
+        read_size: Bytes decoded per read (grows while a record doesn't fit)
+    
+    Yields:
+        Parsed records, in file order
+    
+    Raises:
+        ValueError: On a malformed array (missing "," or "]", data after "]"),
+            records not separated by newlines, or a single-object .json file
+    """
+    lines_only = Path(json_path).suffix.lower() in JSON_LINES_EXTENSIONS
+    with open(json_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            decoder = json.JSONDecoder()
+            utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+            buffer = ""
+            pos = 0
+            offset = 0
+            size = read_size
+            in_array = None
+            closed = False  # Array: "]" seen
+            expect_value = True  # Array: a value is due next (else "," or "]")
+            separated = True  # JSON Lines: a newline since the previous record
+            held = []  # JSON Lines: first record, until a second one shows it isn't a single object
+            count = 0
+            
+            while True:
+                end = _JSON_WHITESPACE.match(buffer, pos).end()
+                if not separated and "\n" in buffer[pos:end]:
+                    separated = True
+                pos = end
+                eof = offset >= len(mapped)
+                
+                if pos < len(buffer):
+                    char = buffer[pos]
+                    if closed:
+                        raise ValueError(f"Unexpected data after the JSON array in {json_path}")
+                    if in_array is None:
+                        in_array = char == "["
+                        if in_array:
+                            pos += 1
+                            continue
+                    if in_array:
+                        if char == "]" and (not expect_value or count == 0):
+                            closed = True
+                            pos += 1
+                            continue
+                        if char == "," and not expect_value:
+                            expect_value = True
+                            pos += 1
+                            continue
+                        if not expect_value:
+                            raise ValueError(f"Expected ',' or ']' after record {count} in {json_path}")
+                        if char in ",]":
+                            raise ValueError(f"Unexpected '{char}' after record {count} in {json_path}")
+                    elif not separated:
+                        raise ValueError(f"JSON Lines records must be separated by newlines (record {count}) in {json_path}")
+                    
+                    try:
+                        record, end = decoder.raw_decode(buffer, pos)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                        end = None
+                    
+                    # A value ending exactly at the buffer end may be truncated
+                    if end is not None and (end < len(buffer) or eof):
+                        pos = end
+                        size = read_size
+                        count += 1
+                        if in_array:
+                            expect_value = False
+                            yield record
+                            continue
+                        separated = False
+                        if count == 1 and not lines_only:
+                            held.append(record)
+                            continue
+                        yield from held
+                        held.clear()
+                        yield record
+                        continue
+                    size *= 2  # The record doesn't fit: read a bigger window
+                elif eof:
+                    if in_array and not closed:
+                        raise ValueError(f"Unterminated JSON array in {json_path}")
+                    if held:
+                        raise ValueError(
+                            f"Unsupported JSON format: a single {type(held[0]).__name__} in {json_path}. "
+                            "Use a JSON array of records or JSON Lines (one record per line)"
+                        )
+                    return
+                
+                # Drop consumed text and decode the next window of the file
+                chunk = mapped[offset:offset + size]
+                offset += len(chunk)
+                buffer = buffer[pos:] + utf8.decode(chunk, final=offset >= len(mapped))
+                pos = 0
+
+
+def iter_documents_from_json(json_path: Path) -> Iterator[Dict]:
+    """
+    Stream documents from a JSON array or JSON Lines file.
+    
+    Supports formats:
+    - List of objects with {id/document_id, content/text, metadata}
+    - JSON Lines: one such object per line
+    
+    Args:
+        json_path: Path to JSON or JSON Lines file
+    
+    Yields:
+        Document dicts with {document_id, content, metadata}
+    """
+    for i, item in enumerate(iter_json_records(json_path)):
+        if not isinstance(item, dict):
+            raise ValueError(f"Unsupported JSON format: {type(item)} at record {i}")
+        yield {
+            "document_id": item.get("id", item.get("document_id", f"doc_{i}")),
+            "content": item.get("content", item.get("text", "")),
+            "metadata": item.get("metadata", {})
+        }
+
+
+def load_documents_from_json(json_path: Path) -> List[Dict]:
+    """
+    Load documents from a JSON array or JSON Lines file.
+    
+    List-returning wrapper around iter_documents_from_json.
+    
+    Returns:
+        List of document dicts with {document_id, content, metadata}
+    """
+    return list(iter_documents_from_json(json_path))
+
+
+# =============================================================================
+# RETRIES AND RATE LIMITING
+# =============================================================================
+
+# HTTP status codes worth retrying, and the subset meaning "slow down"
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+OVERLOAD_STATUS_CODES = {429, 503}
+
+
+def error_status_code(error: Exception) -> Optional[int]:
+    """HTTP status of an openai / llama_stack_client / httpx error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Whether an error is transient: a retryable HTTP status, a timeout or a dropped connection."""
+    status = error_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError)):
+        return True
+    # openai / llama_stack_client wrap transport errors in their own classes
+    return any(cls.__name__ in ("APIConnectionError", "APITimeoutError") for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the server's Retry-After header (seconds form only)."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket: at most `rate` acquisitions per second, bursts of `burst`."""
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit with additive increase, multiplicative decrease (like TCP).
+    
+    Every successful request grows the limit by 1/limit (about +1 per round
+    trip of the whole window); an overload response (429/503) multiplies it by
+    `decrease`. Only requests started after the last decrease can trigger the
+    next one, so one burst of rejections halves the limit once, not N times.
+    """
+    
+    def __init__(self, max_limit: int, min_limit: int = 1, decrease: float = 0.5):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.decrease = decrease
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.epoch = 0  # Bumped on every decrease
+        self.condition = threading.Condition()
+    
+    @contextmanager
+    def slot(self):
+        """
+        Hold one of `limit` concurrent slots.
+        
+        Yields a callback to report the request's outcome: report(overloaded).
+        """
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+            epoch = self.epoch
+        
+        def report(overloaded: bool):
+            with self.condition:
+                if overloaded:
+                    if epoch == self.epoch:
+                        self.limit = max(self.min_limit, self.limit * self.decrease)
+                        self.epoch += 1
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        
+        try:
+            yield report
+        finally:
+            with self.condition:
+                self.in_flight -= 1
+                self.condition.notify_all()
+
+
+class ResilienceLayer:
+    """
+    Client-side rate limiting, adaptive concurrency and retries for API calls.
+    
+    One instance is shared by all the threads talking to a server: each
+    attempt waits for a token-bucket token (if requests_per_second is set) and
+    an AIMD concurrency slot (if max_concurrency is set). Transient failures
+    are retried with full-jitter exponential backoff, or after the server's
+    Retry-After delay; 429/503 responses also shrink the concurrency limit.
+    """
+    
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: int = 1
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.limiter = AIMDLimiter(max_concurrency, min_concurrency) if max_concurrency else None
+        self.stats = {"calls": 0, "retries": 0, "overloaded": 0}
+        self.stats_lock = threading.Lock()
+    
+    def _count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+    
+    def backoff(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """Delay before retry number attempt + 1."""
+        retry_after = retry_after_seconds(error) if error is not None else None
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    def call(self, func: Callable[[], Any]) -> Any:
+        """
+        Call func() under the rate limit and concurrency limit, retrying transient errors.
+        
+        Raises:
+            The last exception if every attempt fails, or immediately if it isn't transient
+        """
+        self._count("calls")
+        for attempt in range(self.max_retries + 1):
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                if self.limiter:
+                    with self.limiter.slot() as report:
+                        try:
+                            result = func()
+                        except Exception as e:
+                            report(error_status_code(e) in OVERLOAD_STATUS_CODES)
+                            raise
+                        report(False)
+                else:
+                    result = func()
+                return result
+            except Exception as e:
+                if error_status_code(e) in OVERLOAD_STATUS_CODES:
+                    self._count("overloaded")
+                if attempt == self.max_retries or not is_retryable_error(e):
+                    raise
+                self._count("retries")
+                time.sleep(self.backoff(attempt, e))
+    
+    def describe(self) -> str:
+        """One-line summary of retries and the current concurrency limit."""
+        summary = f"{self.stats['retries']} retries, {self.stats['overloaded']} overload responses (429/503)"
+        if self.limiter:
+            summary += f", concurrency limit {self.limiter.limit:.1f}/{self.limiter.max_limit}"
+        return summary
+
+
+# =============================================================================
+# CLIENT CREATION
+# =============================================================================
+
+def create_clients(base_url: str, timeout: int = 300, verify_ssl: bool = False, **pool_options):
+    """
+    Create Llama Stack and OpenAI clients.
+    
+    Both clients share one pooled (HTTP/2 when available) connection pool,
+    which is also reused by later calls with the same settings.
+    
+    Args:
+        base_url: Llama Stack server URL
+        timeout: Request timeout in seconds
+        verify_ssl: Whether to verify SSL certificates
+        **pool_options: Pool settings for http_pool.get_http_client
+            (http2, max_connections, max_keepalive_connections, keepalive_expiry)
+    
+    Returns:
+        Tuple of (LlamaStackClient, OpenAI client)
+    """
+    http_client = get_http_client(timeout=timeout, verify_ssl=verify_ssl, **pool_options)
+    
+    if LLAMA_STACK_CLIENT_AVAILABLE:
+        llama_client = LlamaStackClient(
+            base_url=base_url,
+            http_client=http_client
+        )
+    else:
+        llama_client = None
+    
+    openai_client = OpenAI(
+        base_url=f"{base_url}/v1",
+        api_key="fake-key",
+        http_client=http_client
+    )
+    
+    return llama_client, openai_client
+
+
+def create_vector_store(
+    openai_client: OpenAI,
+    name: str,
+    embedding_model: str,
+    embedding_dimension: int,
+    provider_id: str = "milvus-remote",
+    verbose: bool = True,
+    index_type: Optional[str] = None,
+    index_params: Optional[Dict[str, Any]] = None,
+    metric_type: Optional[str] = None,
+    quantization: Optional[str] = None
+) -> str:
+    """
+    Create a new vector store in Milvus.
+    
+    Args:
+        openai_client: OpenAI-compatible client
+        name: Name for the vector store
+        embedding_model: Embedding model identifier
+        embedding_dimension: Dimension of embeddings
+        provider_id: Milvus provider ID
+        verbose: Print progress messages
+        index_type: Vector index type (None = provider default), see vector_index_options
+        index_params: Index build parameters, merged over INDEX_BUILD_PARAMS
+        metric_type: Similarity metric (None = provider default)
+        quantization: "int8" or "pq" to store quantized vectors (quantized index variant)
+    
+    Returns:
+        Vector store ID
+    
+    Raises:
+        ValueError: If the store reports an index other than the requested one
+    """
+    index_options = vector_index_options(index_type, index_params, metric_type, embedding_dimension, quantization)
+    
+    if verbose:
+        print(f"\n🗄️  Creating vector store '{name}'...")
+        if index_options:
+            print(f"   Index (requested): {describe_vector_index(index_options)}")
+    
+    vector_store = openai_client.vector_stores.create(
+        name=name,
+        extra_body={
+            "embedding_model": embedding_model,
+            "embedding_dimension": embedding_dimension,
+            "provider_id": provider_id,
+            **index_options
+        }
+    )
+    
+    if verbose:
+        print(f"   ✅ Vector Store ID: {vector_store.id}")
+    if index_options:
+        read_back_vector_index(
+            openai_client, vector_store.id, index_options, verbose=verbose, require_verified=quantization is not None
+        )
+    
+    return vector_store.id
+
+
+def read_back_vector_index(
+    openai_client: OpenAI,
+    vector_store_id: str,
+    index_options: Dict[str, Any],
+    verbose: bool = True,
+    require_verified: bool = False
+) -> str:
+    """
+    Read a new vector store back and check its index (see check_vector_index).
+    
+    Args:
+        openai_client: OpenAI-compatible client
+        vector_store_id: ID of the new vector store
+        index_options: Requested settings (vector_index_options output)
+        verbose: Print the outcome
+        require_verified: Raise unless the store reports the requested index
+            (for quantization, which changes memory sizing and recall)
+    
+    Returns:
+        INDEX_VERIFIED or INDEX_NOT_VERIFIED (also when the store can't be read back)
+    
+    Raises:
+        ValueError: If the store reports an index other than the requested one
+        RuntimeError: If require_verified and the index can't be verified
+    """
+    try:
+        vector_store = openai_client.vector_stores.retrieve(vector_store_id)
+    except Exception as e:
+        if verbose:
+            print(f"   ⚠️  Could not read back vector store {vector_store_id}: {e}")
+        status = INDEX_NOT_VERIFIED
+    else:
+        status = check_vector_index(vector_store, index_options)
+    
+    if verbose:
+        if status == INDEX_VERIFIED:
+            print(f"   ✅ Index verified: {describe_vector_index(index_options)}")
+        else:
+            print(
+                f"   ⚠️  Index {describe_vector_index(index_options)}: {status}. The server doesn't report "
+                "its index, so it may have ignored these settings and used its default"
+            )
+    if require_verified and status != INDEX_VERIFIED:
+        raise RuntimeError(
+            f"Quantized index {describe_vector_index(index_options)} of new vector store '{vector_store_id}' is "
+            f"{status}: the server may store full float32 vectors instead. Nothing was stored in it. Check the "
+            f"collection's index in Milvus (pymilvus describe_index): if it is quantized, continue with "
+            f"vector_store_id='{vector_store_id}' (--vector-store-id), otherwise delete the store"
+        )
+    return status
+
+
+def delete_vector_store(
+    openai_client: OpenAI,
+    vector_store_id: str,
+    sparse_index_dir: Optional[str] = None,
+    verbose: bool = True
+):
+    """
+    Delete a vector store together with its sparse index.
+    
+    vector_io can't delete single chunks, so this is how content inserted by
+    a local chunking upload is removed: delete the store and its index, then
+    upload the current documents into a new store. A store that is already
+    gone (404) counts as deleted, so a retried deletion still removes the index.
+    
+    Args:
+        openai_client: OpenAI-compatible client
+        vector_store_id: Vector store to delete
+        sparse_index_dir: Directory of the store's sparse index (None = no index)
+        verbose: Print progress messages
+    """
+    try:
+        openai_client.vector_stores.delete(vector_store_id)
+    except Exception as e:
+        if error_status_code(e) != 404:
+            raise
+    if verbose:
+        print(f"🗑️  Deleted vector store {vector_store_id}")
+    if sparse_index_dir:
+        path = SparseIndex.path_for(Path(sparse_index_dir), vector_store_id)
+        if SparseIndex.delete(path) and verbose:
+            print(f"🗑️  Deleted sparse index {path}")
+
+
+# =============================================================================
+# EMBEDDING MODEL REGISTRY
+# =============================================================================
+
+class EmbeddingModelRegistry:
+    """
+    Embedding dimensions of each server's models, cached on disk with a TTL.
+    
+    resolve() looks a model up in this order:
+    1. A cache entry younger than ttl (no network access)
+    2. The server's model metadata (get_available_embedding_models; one call
+       caches every embedding model the server lists)
+    3. One embeddings.create call on a probe string
+    Only when the server can't be reached does it fall back to a stale cache
+    entry or EMBEDDING_DIMENSIONS; otherwise an unknown model raises instead of
+    creating a collection with a guessed dimension.
+    
+    File format (JSON):
+        {
+            "version": 1,
+            "servers": {url: {model: {"dimension": 768, "source": "metadata", "fetched_at": 1718000000.0}}}
+        }
+    """
+    VERSION = 1
+    
+    def __init__(self, path: Optional[Path] = None, ttl: float = DEFAULT_MODEL_REGISTRY_TTL):
+        self.path = Path(path) if path else None  # None = in memory only
+        self.ttl = ttl
+        self.data = {"version": self.VERSION, "servers": {}}
+        if self.path and self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == self.VERSION:
+                    self.data = data
+            except (OSError, ValueError):
+                pass  # A cache: start over rather than fail the upload
+    
+    def save(self):
+        """Write the registry atomically (temp file + rename)."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    def lookup(self, url: str, model: str, max_age: Optional[float] = None) -> Optional[int]:
+        """Cached dimension of a model, if any entry is younger than max_age seconds (None = any age)."""
+        entry = self.data["servers"].get(url.rstrip("/"), {}).get(model)
+        if not entry or (max_age is not None and time.time() - entry["fetched_at"] > max_age):
+            return None
+        return entry["dimension"]
+    
+    def store(self, url: str, model: str, dimension: int, source: str):
+        self.data["servers"].setdefault(url.rstrip("/"), {})[model] = {
+            "dimension": dimension, "source": source, "fetched_at": time.time()
+        }
+    
+    def refresh(
+        self,
+        url: str,
+        verify_ssl: bool = False,
+        timeout: int = 30,
+        models: Optional[List[dict]] = None
+    ) -> int:
+        """
+        Cache the dimension of every embedding model the server lists; returns how many.
+        
+        models: The server's embedding_model_info, if the caller already listed
+            them (saves a models.list call)
+        """
+        if models is None:
+            models = get_available_embedding_models(url, verify_ssl=verify_ssl, timeout=timeout)
+        count = 0
+        for model in models:
+            if isinstance(model["dimension"], int):
+                self.store(url, model["identifier"], model["dimension"], "metadata")
+                count += 1
+        return count
+    
+    def probe(self, url: str, model: str, verify_ssl: bool = False, timeout: int = 30) -> int:
+        """Embed EMBEDDING_PROBE_TEXT once and cache the length of the vector."""
+        client = OpenAI(
+            base_url=f"{url}/v1",
+            api_key="fake-api-key",
+            http_client=get_http_client(timeout=timeout, verify_ssl=verify_ssl)
+        )
+        response = client.embeddings.create(model=model, input=[EMBEDDING_PROBE_TEXT])
+        dimension = len(response.data[0].embedding)
+        self.store(url, model, dimension, "probe")
+        return dimension
+    
+    def resolve(
+        self,
+        url: str,
+        model: str,
+        expected: Optional[int] = None,
+        verify_ssl: bool = False,
+        timeout: int = 30,
+        log: Callable[[str], None] = print,
+        models: Optional[List[dict]] = None
+    ) -> int:
+        """
+        Embedding dimension of a model on a server (see the class docstring).
+        
+        Args:
+            url: Llama Stack URL
+            model: Embedding model identifier
+            expected: Explicitly configured dimension, checked against the server
+            verify_ssl: Whether to verify SSL certificates
+            timeout: Timeout in seconds for the metadata and probe calls
+            log: Progress messages
+            models: The server's embedding models (embedding_model_info), when
+                already listed by the caller
+        
+        Returns:
+            The embedding dimension (expected, when given and not contradicted)
+        
+        Raises:
+            ValueError: If expected differs from the server's dimension, or no
+                dimension is configured and the server can't provide one
+        """
+        dimension = self.lookup(url, model, max_age=self.ttl)
+        source = "cached"
+        
+        if dimension is None:
+            try:
+                self.refresh(url, verify_ssl=verify_ssl, timeout=timeout, models=models)
+            except Exception as e:
+                dimension = self.lookup(url, model) or EMBEDDING_DIMENSIONS.get(model)
+                if expected is None and dimension is None:
+                    raise ValueError(
+                        f"Can't determine the embedding dimension of '{model}': server unreachable ({e}) "
+                        "and the model isn't cached or known. Set embedding_dimension explicitly."
+                    ) from e
+                log(f"⚠️  Could not read model metadata ({str(e)[:80]}); using "
+                    f"{'configured' if expected is not None else 'cached/known'} dimension")
+                return expected if expected is not None else dimension
+            
+            dimension = self.lookup(url, model)
+            source = "server metadata"
+            if dimension is None:
+                try:
+                    dimension = self.probe(url, model, verify_ssl=verify_ssl, timeout=timeout)
+                except Exception as e:
+                    if expected is not None:
+                        log(f"⚠️  Could not probe '{model}' ({str(e)[:80]}); using configured dimension {expected}")
+                        return expected
+                    raise ValueError(
+                        f"Embedding model '{model}' has no dimension metadata and a probe embedding failed: {e}"
+                    ) from e
+                source = "probe embedding"
+            try:
+                self.save()
+            except OSError as e:
+                # A cache: the dimension is resolved, so don't fail the upload over it
+                log(f"⚠️  Could not save the model registry to {self.path} ({e}); continuing without disk cache")
+        
+        if expected is not None and expected != dimension:
+            raise ValueError(
+                f"Configured embedding_dimension {expected} doesn't match '{model}' on the server "
+                f"({dimension}, from {source}); the collection would reject every insert"
+            )
+        log(f"📐 Embedding dimension of '{model}': {dimension} ({source})")
+        return dimension
+
+
+def resolve_embedding_dimension(
+    config,
+    log: Callable[[str], None] = print,
+    models: Optional[List[dict]] = None
+) -> int:
+    """
+    Resolve (or check) config.embedding_dimension with the config's model registry.
+    
+    Works with MilvusUploadConfig and MilvusLocalChunkingConfig; the resolved
+    dimension is stored back in the config. models are the server's embedding
+    models (embedding_model_info), if the caller has already listed them.
+    """
+    registry = EmbeddingModelRegistry(config.model_registry_path, ttl=config.model_registry_ttl)
+    config.embedding_dimension = registry.resolve(
+        config.llama_stack_url,
+        config.embedding_model,
+        expected=config.embedding_dimension,
+        verify_ssl=config.verify_ssl,
+        timeout=min(config.timeout, 30),
+        log=log,
+        models=models
+    )
+    return config.embedding_dimension
+
+
+# =============================================================================
+# FILE UPLOAD (SERVER-SIDE CHUNKING)
+# =============================================================================
+
+def upload_files(
+    openai_client: OpenAI,
+    file_paths: List[Path],
+    max_workers: int = 4,
+    max_retries: int = 3,
+    verbose: bool = True,
+    resilience: Optional[ResilienceLayer] = None,
+    allow_partial: bool = False
+) -> List[str]:
+    """
+    Upload files concurrently with files.create.
+    
+    Every upload runs to completion first; if any file failed, the upload then
+    raises with all the failures instead of returning a partial set.
+    
+    Args:
+        openai_client: OpenAI-compatible client
+        file_paths: Files to upload
+        max_workers: Number of concurrent uploads
+        max_retries: Retries per file (jittered exponential backoff)
+        verbose: Print progress messages
+        resilience: Shared rate/concurrency limits and retry policy (default:
+            max_retries retries, adaptive concurrency up to max_workers)
+        allow_partial: Return the files that uploaded instead of raising when
+            some failed
     
-    # Insert in batches (or one by one if batch_size=1)
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i:i + batch_size]
-        
-        # Format chunks for vector_io.insert
-        formatted_chunks = []
-        for chunk in batch:
-            formatted_chunks.append({
-                "content": chunk["content"],
-                "metadata": {
-                    "document_id": chunk.get("chunk_id", f"chunk_{i}"),
-                    **chunk.get("metadata", {})
-                }
-            })
+    Returns:
+        File IDs of the successfully uploaded files, in file_paths order
+    
+    Raises:
+        RuntimeError: If any file failed to upload (unless allow_partial)
+    """
+    resilience = resilience or ResilienceLayer(max_retries=max_retries, max_concurrency=max_workers)
+    
+    def upload(file_path: Path) -> str:
+        def create():
+            with open(file_path, "rb") as f:
+                return openai_client.files.create(file=f, purpose="assistants").id
+        return resilience.call(create)
+    
+    file_ids = [None] * len(file_paths)
+    failures = []  # (file_path, exception)
+    uploaded_bytes = 0
+    start_time = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(upload, path): i for i, path in enumerate(file_paths)}
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            file_path = file_paths[i]
+            try:
+                file_ids[i] = future.result()
+                uploaded_bytes += file_path.stat().st_size
+                if verbose:
+                    print(f"  ✓ [{done_count}/{len(file_paths)}] {file_path.name} → {file_ids[i]}")
+            except Exception as e:
+                failures.append((file_path, e))
+                if verbose:
+                    print(f"  ❌ [{done_count}/{len(file_paths)}] {file_path.name}: {str(e)[:100]}")
+    
+    elapsed = max(time.perf_counter() - start_time, 1e-9)
+    uploaded = [file_id for file_id in file_ids if file_id is not None]
+    if verbose:
+        print(
+            f"  ⏱️  {len(uploaded)} files in {elapsed:.1f}s "
+            f"({len(uploaded) / elapsed:.1f} files/sec, {uploaded_bytes / elapsed / 1024:.1f} KB/sec)"
+        )
+        if resilience.stats["retries"] or resilience.stats["overloaded"]:
+            print(f"  🔁 {resilience.describe()}")
+    
+    if failures and not allow_partial:
+        names = ", ".join(file_path.name for file_path, _ in failures[:10])
+        more = f" (+{len(failures) - 10} more)" if len(failures) > 10 else ""
+        raise RuntimeError(
+            f"{len(failures)}/{len(file_paths)} files failed to upload: {names}{more}. "
+            f"First error: {failures[0][1]}"
+        ) from failures[0][1]
+    
+    return uploaded
+
+
+# =============================================================================
+# CHUNK INSERTION (LOCAL CHUNKING)
+# =============================================================================
+
+def format_chunk_for_insert(chunk: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """Convert a {chunk_id, content, metadata} chunk to the vector_io.insert format."""
+    return {
+        "content": chunk["content"],
+        "metadata": {
+            "document_id": chunk.get("chunk_id", f"chunk_{index}"),
+            **chunk.get("metadata", {})
+        }
+    }
+
+
+def estimate_payload_bytes(formatted_chunk: Dict[str, Any]) -> int:
+    """Approximate JSON request body size of one formatted chunk."""
+    return len(json.dumps(formatted_chunk, default=str).encode("utf-8"))
+
+
+class InsertBatcher:
+    """
+    Incrementally format chunks and group them into insert batches.
+    
+    A batch is closed when it reaches batch_size chunks or when adding the next
+    chunk would exceed max_batch_bytes of payload (if set). A single chunk
+    larger than the budget is sent on its own. Closed batches are returned as
+    tuples of (index of the first chunk in the batch, formatted chunks).
+    """
+    
+    def __init__(self, batch_size: int = 1, max_batch_bytes: Optional[int] = None):
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.index = 0
+        self.first_index = 0
+        self.batch = []
+        self.batch_bytes = 0
+    
+    def add(self, chunk: Dict[str, Any]) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """Add one chunk; returns the batches it closed (zero, one or two)."""
+        closed = []
+        formatted = format_chunk_for_insert(chunk, self.index)
+        size = estimate_payload_bytes(formatted) if self.max_batch_bytes else 0
+        
+        if self.batch and self.max_batch_bytes and self.batch_bytes + size > self.max_batch_bytes:
+            closed.extend(self.flush())
+        
+        if not self.batch:
+            self.first_index = self.index
+        self.batch.append(formatted)
+        self.batch_bytes += size
+        self.index += 1
         
+        if len(self.batch) >= self.batch_size:
+            closed.extend(self.flush())
+        return closed
+    
+    def flush(self) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """Close the current batch, if any."""
+        if not self.batch:
+            return []
+        closed = [(self.first_index, self.batch)]
+        self.batch = []
+        self.batch_bytes = 0
+        return closed
+
+
+def iter_insert_batches(
+    chunks: Iterable[Dict[str, Any]],
+    batch_size: int = 1,
+    max_batch_bytes: Optional[int] = None
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Format chunks and group them into insert batches (see InsertBatcher).
+    
+    Yields:
+        Tuples of (index of the first chunk in the batch, formatted chunks)
+    """
+    batcher = InsertBatcher(batch_size=batch_size, max_batch_bytes=max_batch_bytes)
+    for chunk in chunks:
+        yield from batcher.add(chunk)
+    yield from batcher.flush()
+
+
+# One-by-one inserts print a progress line every this many completed chunks
+INSERT_PROGRESS_INTERVAL = 100
+# Request transports of vector_io.insert (see BulkInsertTransport)
+INSERT_TRANSPORTS = ("sdk", "bulk")
+# Request body compression of the bulk transport: Content-Encoding -> default level
+# ("identity" = uncompressed). Low levels: a batch with embeddings is mostly float
+# text, and higher gzip levels cost many times the encoding time for a few percent
+# smaller bodies.
+INSERT_COMPRESSION_LEVELS = {"identity": None, "gzip": 1, "zstd": 3}
+# JSON encoders of bulk insert bodies
+JSON_ENCODERS = ("orjson", "json")
+DEFAULT_JSON_ENCODER = "orjson" if ORJSON_AVAILABLE else "json"
+
+
+def encode_json(value: Any, encoder: str = DEFAULT_JSON_ENCODER) -> bytes:
+    """Compact UTF-8 JSON of a request body (orjson is several times faster than json)."""
+    if encoder == "orjson":
+        if not ORJSON_AVAILABLE:
+            raise RuntimeError("orjson is required for the orjson encoder. Install with: pip install orjson")
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    if encoder != "json":
+        raise ValueError(f"Unknown JSON encoder '{encoder}'. Use one of: {', '.join(JSON_ENCODERS)}")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def compress_body(body: bytes, compression: Optional[str], level: Optional[int] = None) -> bytes:
+    """Compress a request body with gzip or zstd ("identity" or None = unchanged)."""
+    if compression in (None, "identity"):
+        return body
+    if compression not in INSERT_COMPRESSION_LEVELS:
+        raise ValueError(f"Unknown compression '{compression}'. Use one of: {', '.join(INSERT_COMPRESSION_LEVELS)}")
+    level = INSERT_COMPRESSION_LEVELS[compression] if level is None else level
+    if compression == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("zstandard is required for zstd compression. Install with: pip install zstandard")
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+def accepted_request_encodings(http_client: httpx.Client, url: str) -> List[str]:
+    """
+    Request body encodings a server advertises for a URL.
+    
+    Sends OPTIONS and reads the Accept-Encoding response header (RFC 7694),
+    whatever the status: a server that doesn't handle OPTIONS may still
+    advertise them. Encodings with q=0 are left out.
+    
+    Returns:
+        Lowercased encodings, empty if the server advertises none
+    """
+    response = http_client.options(url)
+    encodings = []
+    for item in response.headers.get("Accept-Encoding", "").split(","):
+        encoding, _, params = item.partition(";")
+        name, _, quality = params.replace(" ", "").partition("=")
         try:
-            llama_client.vector_io.insert(
+            accepted = float(quality) > 0 if name.lower() == "q" else True
+        except ValueError:
+            accepted = True
+        if encoding.strip() and accepted:
+            encodings.append(encoding.strip().lower())
+    return encodings
+
+
+def check_request_encoding(http_client: httpx.Client, base_url: str, compression: str):
+    """
+    Refuse a compressed insert transport unless the server accepts it.
+    
+    A server that can't decode the body rejects every insert, or worse
+    reads it as garbage, so this runs before the vector store is created.
+    
+    Raises:
+        RuntimeError: If the insert endpoint doesn't advertise the encoding
+    """
+    url = f"{base_url.rstrip('/')}/v1/vector-io/insert"
+    encodings = accepted_request_encodings(http_client, url)
+    if compression not in encodings and "*" not in encodings:
+        raise RuntimeError(
+            f"{url} doesn't advertise {compression} request bodies "
+            f"(Accept-Encoding: {', '.join(encodings) or 'none'}). Upload uncompressed "
+            f"(insert_compression='identity'), or have the server or its route decode {compression} "
+            f"and send Accept-Encoding"
+        )
+
+
+class BulkInsertTransport:
+    """
+    Send vector_io.insert requests as pre-encoded, optionally compressed bodies.
+    
+    llama_stack_client runs every chunk (embedding included) through its
+    request transform and then stdlib json, which dominates the client CPU of
+    large batches. This transport encodes the body once (with orjson by
+    default when installed), optionally compresses it with gzip or zstd, and posts it over
+    the shared connection pool. The body stays a plain vector_io.insert
+    request, so each chunk carries its own copy of the document metadata.
+    
+    Compressed bodies carry a Content-Encoding header; the server, or the
+    route in front of it, has to decode it (see check_request_encoding).
+    Safe to share between threads.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        http_client: httpx.Client,
+        compression: Optional[str] = "identity",
+        compression_level: Optional[int] = None,
+        encoder: str = DEFAULT_JSON_ENCODER
+    ):
+        compression = compression or "identity"
+        if encoder not in JSON_ENCODERS:
+            raise ValueError(f"Unknown JSON encoder '{encoder}'. Use one of: {', '.join(JSON_ENCODERS)}")
+        if encoder == "orjson" and not ORJSON_AVAILABLE:
+            raise RuntimeError("orjson is required for the orjson encoder. Install with: pip install orjson")
+        if compression not in INSERT_COMPRESSION_LEVELS:
+            raise ValueError(f"Unknown compression '{compression}'. Use one of: {', '.join(INSERT_COMPRESSION_LEVELS)}")
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is required for zstd compression. Install with: pip install zstandard")
+        self.url = f"{base_url.rstrip('/')}/v1/vector-io/insert"
+        self.http_client = http_client
+        self.compression = compression
+        self.compression_level = compression_level
+        self.encoder = encoder
+        self.headers = {"Content-Type": "application/json", "Accept": "*/*"}
+        if compression != "identity":
+            self.headers["Content-Encoding"] = compression
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "chunks": 0, "raw_bytes": 0, "sent_bytes": 0, "encode_seconds": 0.0}
+    
+    def encode(self, vector_store_id: str, batch: List[Dict[str, Any]]) -> Tuple[bytes, int]:
+        """Request body of one insert, and its size before compression."""
+        body = encode_json({"vector_db_id": vector_store_id, "chunks": batch}, self.encoder)
+        return compress_body(body, self.compression, self.compression_level), len(body)
+    
+    def insert(self, vector_store_id: str, batch: List[Dict[str, Any]]):
+        """
+        Insert one batch of formatted chunks.
+        
+        Raises:
+            httpx.HTTPStatusError: If the server rejects the request
+        """
+        start = time.perf_counter()
+        body, raw_bytes = self.encode(vector_store_id, batch)
+        encode_seconds = time.perf_counter() - start
+        
+        response = self.http_client.post(self.url, content=body, headers=self.headers)
+        response.raise_for_status()
+        
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["chunks"] += len(batch)
+            self.stats["raw_bytes"] += raw_bytes
+            self.stats["sent_bytes"] += len(body)
+            self.stats["encode_seconds"] += encode_seconds
+    
+    def describe(self) -> str:
+        """One-line summary of the bytes sent and the encoding time."""
+        stats = self.stats
+        sent = f"{stats['sent_bytes'] / (1024 * 1024):.2f} MB sent"
+        if self.compression != "identity":
+            saved = 1 - stats["sent_bytes"] / stats["raw_bytes"] if stats["raw_bytes"] else 0.0
+            sent += f" ({self.compression}, {stats['raw_bytes'] / (1024 * 1024):.2f} MB raw, {saved:.0%} saved)"
+        return f"Bulk insert: {self.encoder}, {sent}, {stats['encode_seconds'] * 1000:.0f} ms encoding"
+
+
+def insert_chunks_with_vector_io(
+    llama_client,  # LlamaStackClient
+    vector_store_id: str,
+    chunks: Iterable[Dict[str, Any]],
+    batch_size: int = 1,
+    verbose: bool = False,
+    max_in_flight: int = 1,
+    max_batch_bytes: Optional[int] = None,
+    on_batch_inserted: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    prepare_batch: Optional[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = None,
+    resilience: Optional[ResilienceLayer] = None,
+    transport: Optional[BulkInsertTransport] = None
+) -> int:
+    """
+    Insert pre-processed chunks using vector_io.insert.
+    
+    Chunks may be a list or any iterable (e.g. a generator from
+    iter_chunk_document); they are consumed one batch at a time. With
+    max_in_flight > 1, up to that many batches are sent concurrently over a
+    thread pool while the next batches are being prepared.
+    
+    Args:
+        llama_client: Llama Stack client
+        vector_store_id: ID of the vector store
+        chunks: Chunks with format {chunk_id, content, metadata}
+        batch_size: Max chunks per insert request (1 = one by one, safer)
+        verbose: Show detailed progress
+        max_in_flight: Number of insert requests kept in flight
+        max_batch_bytes: Payload budget per request; batches are cut earlier
+            than batch_size when they would exceed it (None = no budget)
+        on_batch_inserted: Called with each acknowledged batch of formatted
+            chunks (from the calling thread, in completion order)
+        prepare_batch: Called on each formatted batch in the worker thread right
+            before it is sent (e.g. to attach precomputed embeddings)
+        resilience: Shared rate/concurrency limits and retry policy for the
+            insert requests (default: 3 retries, adaptive concurrency up to
+            max_in_flight)
+        transport: Send the requests pre-encoded (and compressed) instead of
+            through llama_stack_client
+        
+    Returns:
+        Number of chunks inserted
+    
+    Raises:
+        RuntimeError: If any batch still failed after its retries (the
+            acknowledged batches stay inserted)
+    """
+    if not LLAMA_STACK_CLIENT_AVAILABLE:
+        raise RuntimeError("llama_stack_client is required for local chunking. Install with: pip install llama-stack-client")
+    
+    total_chunks = len(chunks) if hasattr(chunks, "__len__") else None
+    total_inserted = 0
+    total_failed = 0
+    first_error = None
+    next_progress = INSERT_PROGRESS_INTERVAL
+    start_time = time.perf_counter()
+    resilience = resilience or ResilienceLayer(max_concurrency=max_in_flight)
+    
+    def send(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if prepare_batch:
+            batch = prepare_batch(batch)
+        if transport:
+            resilience.call(lambda: transport.insert(vector_store_id, batch))
+        else:
+            resilience.call(lambda: llama_client.vector_io.insert(
                 vector_db_id=vector_store_id,
-                chunks=formatted_chunks
-            )
+                chunks=batch
+            ))
+        return batch
+    
+    def collect(future, batch_number: int, i: int, batch_len: int):
+        nonlocal total_inserted, total_failed, first_error, next_progress
+        try:
+            batch = future.result()
             total_inserted += len(batch)
+            if on_batch_inserted:
+                on_batch_inserted(batch)
             
             if verbose or batch_size > 1:
-                print(f"   ✅ Batch {i//batch_size + 1}: {len(batch)} chunks inserted")
-            elif (i + 1) % 100 == 0 or i == len(chunks) - 1:
-                print(f"   📊 Progress: {total_inserted}/{len(chunks)} inserted, {total_failed} errors")
+                print(f"   ✅ Batch {batch_number}: {batch_len} chunks inserted")
             
         except Exception as e:
-            total_failed += len(batch)
+            total_failed += batch_len
+            first_error = first_error or e
             if verbose:
                 print(f"   ❌ Error in chunk {i}: {str(e)[:100]}...")
+        
+        # One-by-one inserts: a progress line every INSERT_PROGRESS_INTERVAL completed chunks
+        completed = total_inserted + total_failed
+        if not verbose and batch_size == 1 and (completed >= next_progress or completed == total_chunks):
+            next_progress = (completed // INSERT_PROGRESS_INTERVAL + 1) * INSERT_PROGRESS_INTERVAL
+            progress = f"{total_inserted}/{total_chunks}" if total_chunks is not None else f"{total_inserted}"
+            rate = total_inserted / max(time.perf_counter() - start_time, 1e-9)
+            print(f"   📊 Progress: {progress} inserted, {total_failed} errors ({rate:.1f} chunks/sec)")
     
+    # Insert in batches, keeping up to max_in_flight requests pending
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+        pending = {}
+        batches = iter_insert_batches(chunks, batch_size=batch_size, max_batch_bytes=max_batch_bytes)
+        for batch_number, (i, batch) in enumerate(batches, start=1):
+            pending[executor.submit(send, batch)] = (batch_number, i, len(batch))
+            
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: pending[f][0]):
+                    collect(future, *pending.pop(future))
+        
+        for future in sorted(pending, key=lambda f: pending[f][0]):
+            collect(future, *pending[future])
+    
+    elapsed = time.perf_counter() - start_time
     print(f"   ✅ Total inserted: {total_inserted}")
     if total_failed > 0:
         print(f"   ⚠️  Total failed: {total_failed}")
+    print(f"   ⏱️  Throughput: {total_inserted / max(elapsed, 1e-9):.1f} chunks/sec ({elapsed:.1f}s)")
+    if resilience.stats["retries"] or resilience.stats["overloaded"]:
+        print(f"   🔁 {resilience.describe()}")
+    if transport:
+        print(f"   📦 {transport.describe()}")
     
+    if total_failed:
+        raise RuntimeError(
+            f"{total_failed}/{total_inserted + total_failed} chunks failed to insert into '{vector_store_id}' "
+            f"after retries. First error: {first_error}"
+        )
     return total_inserted
 
 
@@ -530,7 +2922,8 @@ def verify_insertion(
     llama_client,  # LlamaStackClient
     vector_store_id: str,
     query: str = "test",
-    verbose: bool = True
+    verbose: bool = True,
+    sparse_index: Optional["SparseIndex"] = None
 ) -> int:
     """
     Verify that chunks were inserted correctly.
@@ -540,14 +2933,26 @@ def verify_insertion(
         vector_store_id: ID of the vector store
         query: Query to test retrieval
         verbose: Print progress messages
+        sparse_index: BM25 index of the store; runs a hybrid (RRF) query instead
     
     Returns:
         Number of chunks retrieved
     """
     if verbose:
-        print(f"\n🔍 Verifying insertion with query: '{query}'")
+        print(f"\n🔍 Verifying insertion with {'hybrid ' if sparse_index else ''}query: '{query}'")
     
     try:
+        if sparse_index:
+            fused = hybrid_search(llama_client, vector_store_id, sparse_index, query)
+            if verbose:
+                print(f"   ✅ Hybrid query returned {len(fused)} chunks")
+                for result in fused:
+                    print(
+                        f"      {result['score']:.4f}  dense #{result['dense_rank'] or '-'}  "
+                        f"sparse #{result['sparse_rank'] or '-'}  {result['chunk_id']}"
+                    )
+            return len(fused)
+        
         results = llama_client.vector_io.query(
             vector_db_id=vector_store_id,
             query=query,
@@ -567,10 +2972,343 @@ def verify_insertion(
         
         return chunk_count
         
-    except Exception as e:
-        if verbose:
-            print(f"   ❌ Error verifying: {e}")
-        return 0
+    except Exception as e:
+        if verbose:
+            print(f"   ❌ Error verifying: {e}")
+        return 0
+
+
+# =============================================================================
+# EMBEDDING CACHE
+# =============================================================================
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (embedding model, SHA-256 of chunk text).
+    
+    Backed by SQLite with vectors stored as float32 blobs. Entries track when
+    they were last used and the least recently used ones are evicted once the
+    cache grows beyond max_entries. Safe to share between threads.
+    """
+    
+    def __init__(self, path: str, max_entries: int = 1_000_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL, PRIMARY KEY (model, text_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._evict()
+        self._conn.commit()
+    
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings for texts; None where missing. Hits are marked as used."""
+        hashes = [self.text_hash(text) for text in texts]
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), 500):  # Stay below SQLite's variable limit
+                part = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(part))})",
+                    [model, *part]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, text_hash) for text_hash in found]
+                )
+                self._conn.commit()
+        return [array("f", found[h]).tolist() if h in found else None for h in hashes]
+    
+    def put_many(self, model: str, texts: List[str], embeddings: List[List[float]]):
+        """Store embeddings, evicting least recently used entries if needed."""
+        now = time.time()
+        rows = [
+            (model, self.text_hash(text), array("f", embedding).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+    
+    def sample_vectors(self, model: str, limit: int) -> List[array]:
+        """Up to limit cached vectors of a model, in (effectively random) text hash order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE model = ? ORDER BY text_hash LIMIT ?", (model, limit)
+            ).fetchall()
+        return [array("f", vector) for (vector,) in rows]
+    
+    def _evict(self):
+        """Drop least recently used entries beyond max_entries (caller commits)."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def attach_cached_embeddings(
+    openai_client: OpenAI,
+    cache: EmbeddingCache,
+    embedding_model: str,
+    embedding_dimension: int,
+    batch: List[Dict[str, Any]],
+    stats: Optional[Dict[str, int]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Attach an "embedding" to every formatted chunk of a vector_io.insert batch.
+    
+    Cache hits are reused; misses are embedded with one embeddings.create call
+    and stored, so the server never has to embed the batch itself.
+    
+    Raises:
+        ValueError: If the model returns vectors of a different dimension
+    """
+    texts = [chunk["content"] for chunk in batch]
+    embeddings = cache.get_many(embedding_model, texts)
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    
+    if missing:
+        response = openai_client.embeddings.create(model=embedding_model, input=[texts[i] for i in missing])
+        computed = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        if computed and len(computed[0]) != embedding_dimension:
+            raise ValueError(
+                f"Embedding model '{embedding_model}' returned {len(computed[0])}-dim vectors, "
+                f"expected {embedding_dimension}"
+            )
+        cache.put_many(embedding_model, [texts[i] for i in missing], computed)
+        for i, embedding in zip(missing, computed):
+            embeddings[i] = embedding
+    
+    if stats is not None:
+        stats["embedding_cache_hits"] += len(batch) - len(missing)
+        stats["embedding_cache_misses"] += len(missing)
+    
+    return [{**chunk, "embedding": embedding} for chunk, embedding in zip(batch, embeddings)]
+
+
+# =============================================================================
+# ASYNC PIPELINE
+# =============================================================================
+
+_PIPELINE_END = object()  # Sentinel closing a stage's output queue
+
+
+class PipelineStageStats:
+    """Items processed, busy time and input queue depth of one pipeline stage."""
+    
+    def __init__(self, name: str, queue: Optional[asyncio.Queue] = None):
+        self.name = name
+        self.queue = queue  # Input queue (None for the source stage)
+        self.items = 0
+        self.busy = 0.0  # Seconds spent in the stage's work function
+        self.max_depth = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self.start = time.perf_counter()
+    
+    def sample_depth(self):
+        if self.queue is not None:
+            depth = self.queue.qsize()
+            self.max_depth = max(self.max_depth, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+    
+    def throughput(self) -> float:
+        return self.items / max(time.perf_counter() - self.start, 1e-9)
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "items_per_sec": round(self.throughput(), 2),
+            "busy_seconds": round(self.busy, 3),
+            "avg_queue_depth": round(self.depth_total / self.depth_samples, 2) if self.depth_samples else 0,
+            "max_queue_depth": self.max_depth,
+        }
+    
+    def __str__(self) -> str:
+        queue = f", queue {self.queue.qsize()}/{self.queue.maxsize}" if self.queue is not None else ""
+        return f"{self.name} {self.items} ({self.throughput():.1f}/s{queue})"
+
+
+async def _iter_queue(queue: asyncio.Queue, stats: PipelineStageStats):
+    """Async iterator over a stage's input queue, up to the end sentinel."""
+    while True:
+        stats.sample_depth()
+        item = await queue.get()
+        if item is _PIPELINE_END:
+            return
+        yield item
+
+
+async def pipeline_source(
+    items: Iterable[Any],
+    output: asyncio.Queue,
+    stats: PipelineStageStats,
+    executor: Optional[Executor] = None
+):
+    """
+    Feed a blocking iterable (e.g. a document reader) into a pipeline queue.
+    
+    Each next() runs in `executor` (default: the loop's thread pool), so slow
+    reads don't block the other stages.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        item = await loop.run_in_executor(executor, next, iterator, _PIPELINE_END)
+        stats.busy += time.perf_counter() - start
+        if item is _PIPELINE_END:
+            break
+        stats.items += 1
+        await output.put(item)
+    await output.put(_PIPELINE_END)
+
+
+async def pipeline_map(
+    func: Callable[[Any], Any],
+    input: asyncio.Queue,
+    output: Optional[asyncio.Queue],
+    stats: PipelineStageStats,
+    concurrency: int = 1,
+    executor: Optional[Executor] = None,
+    ordered: bool = True,
+    on_result: Optional[Callable[[Any], None]] = None
+):
+    """
+    Apply `func` to every item of a queue in an executor.
+    
+    Up to `concurrency` calls are in flight; the stage stops taking input
+    while they are, and blocks on a full output queue, so backpressure
+    propagates upstream.
+    
+    Args:
+        func: Work function (must be picklable for process pools)
+        input: Queue of input items
+        output: Queue for results (None = results are only passed to on_result)
+        stats: Stats of this stage
+        concurrency: Max calls in flight
+        executor: Thread or process pool (default: the loop's thread pool)
+        ordered: Emit results in input order (False = completion order)
+        on_result: Called on the event loop with each result
+    """
+    loop = asyncio.get_running_loop()
+    
+    async def run(item):
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(executor, func, item)
+        finally:
+            stats.busy += time.perf_counter() - start
+    
+    async def emit(task):
+        result = await task
+        stats.items += 1
+        if on_result:
+            on_result(result)
+        if output is not None:
+            await output.put(result)
+    
+    in_flight = deque()
+    try:
+        async for item in _iter_queue(input, stats):
+            in_flight.append(asyncio.ensure_future(run(item)))
+            while len(in_flight) >= max(1, concurrency):
+                if ordered:
+                    await emit(in_flight.popleft())
+                else:
+                    done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        in_flight.remove(task)
+                        await emit(task)
+        
+        while in_flight:
+            await emit(in_flight.popleft())
+    finally:
+        for task in in_flight:
+            task.cancel()
+    
+    if output is not None:
+        await output.put(_PIPELINE_END)
+
+
+async def pipeline_transform(
+    func: Callable[[Any], List[Any]],
+    input: asyncio.Queue,
+    output: asyncio.Queue,
+    stats: PipelineStageStats,
+    flush: Optional[Callable[[], List[Any]]] = None
+):
+    """
+    Apply a cheap, stateful `func` on the event loop.
+    
+    `func` returns a list of outputs for each input item (e.g. the batches a
+    document's chunks closed); `flush` returns the outputs left at the end.
+    """
+    async for item in _iter_queue(input, stats):
+        start = time.perf_counter()
+        results = func(item)
+        stats.busy += time.perf_counter() - start
+        stats.items += 1
+        for result in results:
+            await output.put(result)
+    for result in (flush() if flush else []):
+        await output.put(result)
+    await output.put(_PIPELINE_END)
+
+
+async def run_pipeline(
+    stages: List[Awaitable],
+    stage_stats: List[PipelineStageStats],
+    report_interval: Optional[float] = None
+):
+    """
+    Run pipeline stage coroutines concurrently until all of them finish.
+    
+    If a stage fails, the others are cancelled and the error is re-raised.
+    Every `report_interval` seconds the throughput and input queue depth of
+    each stage is printed.
+    """
+    async def report():
+        while True:
+            await asyncio.sleep(report_interval)
+            print("   📈 " + " | ".join(str(stats) for stats in stage_stats))
+    
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    if report_interval:
+        tasks.append(asyncio.ensure_future(report()))
+    try:
+        pending = set(tasks[:len(stages)])
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()  # Re-raise the first stage error
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 
 # =============================================================================
@@ -581,23 +3319,26 @@ def upload_documents_to_milvus(config: MilvusUploadConfig) -> str:
     """
     Upload documents from a folder to Milvus using Llama Stack.
     Uses SERVER-SIDE chunking via file upload + file_batches API.
+    With config.manifest_path, only new or changed files are uploaded into the
+    manifest's store (see IngestionManifest).
     
     Args:
         config: MilvusUploadConfig with all upload settings
         
     Returns:
-        ID of the vector store created in Milvus
+        ID of the vector store created (or updated) in Milvus
         
     Raises:
         FileNotFoundError: If documents directory doesn't exist
         ValueError: If no documents found or upload fails
+        RuntimeError: If a replaced or removed document file can't be deleted
     """
     def log(msg: str):
         if config.verbose:
             print(msg)
     
     # Initialize OpenAI-compatible client
-    http_client = httpx.Client(verify=config.verify_ssl, timeout=config.timeout)
+    http_client = get_http_client(timeout=config.timeout, verify_ssl=config.verify_ssl)
     client = OpenAI(
         base_url=f"{config.llama_stack_url}/v1",
         api_key="fake-api-key",  # Llama Stack doesn't require a real API key
@@ -606,8 +3347,10 @@ def upload_documents_to_milvus(config: MilvusUploadConfig) -> str:
     
     # Validate embedding model
     log(f"🔍 Checking embedding model '{config.embedding_model}'...")
+    server_models = None  # Reused by the dimension lookup below
     try:
         models = client.models.list()
+        server_models = embedding_model_info(models.data)
         available_models = [m.identifier for m in models.data if hasattr(m, 'identifier')]
         embedding_models = [m for m in models.data if hasattr(m, 'model_type') and m.model_type == 'embedding']
         
@@ -633,6 +3376,9 @@ def upload_documents_to_milvus(config: MilvusUploadConfig) -> str:
         log(f"⚠️  Could not verify embedding model: {e}")
         log("Proceeding anyway...")
     
+    # Resolve (or check) the embedding dimension before anything is uploaded
+    resolve_embedding_dimension(config, log, models=server_models)
+    
     # Verify documents directory
     docs_path = Path(config.documents_dir)
     if not docs_path.exists():
@@ -644,48 +3390,109 @@ def upload_documents_to_milvus(config: MilvusUploadConfig) -> str:
     
     log(f"📁 Found {len(doc_files)} documents in {config.documents_dir}")
     
+    resilience = ResilienceLayer(
+        max_retries=config.upload_retries,
+        requests_per_second=config.max_requests_per_second,
+        max_concurrency=config.upload_workers
+    )
+    
+    # Incremental mode: only new or changed files are uploaded, after the
+    # files they replace (and those of removed documents) are deleted
+    manifest = _load_upload_manifest(config) if config.manifest_path else None
+    vector_store_id = config.vector_store_id or (manifest.data["vector_store_id"] if manifest else None)
+    if manifest:
+        file_hashes = {f.name: file_content_hash(f) for f in doc_files}
+        changed, removed = manifest.changes(file_hashes)
+        log(f"♻️  Manifest: {len(doc_files) - len(changed)} unchanged, {len(changed)} new or changed, "
+            f"{len(removed)} removed")
+        if vector_store_id:
+            replaced = [name for name in changed if manifest.file_id(name)]
+            _delete_document_files(client, vector_store_id, manifest, replaced + removed, resilience, log)
+        changed = set(changed)
+        doc_files = [f for f in doc_files if f.name in changed]
+        if not doc_files:
+            manifest.save()
+            log(f"\n✓ Vector store {vector_store_id} is up to date")
+            return vector_store_id
+    
     # Upload files
-    log("\n📤 Uploading files...")
-    file_ids = []
-    for doc_file in doc_files:
-        log(f"  - Uploading: {doc_file.name}")
-        with open(doc_file, "rb") as f:
-            file_obj = client.files.create(file=f, purpose="assistants")
-            file_ids.append(file_obj.id)
-            log(f"    ✓ File ID: {file_obj.id}")
+    log(f"\n📤 Uploading files ({config.upload_workers} workers)...")
+    file_ids = upload_files(
+        client,
+        doc_files,
+        max_workers=config.upload_workers,
+        max_retries=config.upload_retries,
+        verbose=config.verbose,
+        resilience=resilience,
+        allow_partial=config.allow_partial_upload
+    )
     
     if not file_ids:
         raise ValueError("Could not upload any file")
     
-    log(f"\n✓ {len(file_ids)} files uploaded successfully")
-    
-    # Create vector store
-    log("\n🗄️  Creating Milvus vector store...")
-    vector_store_name = config.vector_store_name or f"milvus_collection_{Path.cwd().name}"
-    
-    log(f"Using embedding model: {config.embedding_model}")
-    log(f"Embedding dimension: {config.embedding_dimension}")
+    log(f"\n✓ {len(file_ids)}/{len(doc_files)} files uploaded successfully")
     
-    vector_store = client.vector_stores.create(
-        name=vector_store_name,
-        extra_body={
-            "embedding_model": config.embedding_model,
-            "embedding_dimension": config.embedding_dimension,
-            "provider_id": config.provider_id
-        }
-    )
-    
-    vector_store_id = vector_store.id
-    log(f"✓ Vector store created: {vector_store_name}")
-    log(f"✓ Vector Store ID: {vector_store_id}")
+    if vector_store_id:
+        log(f"\n🗄️  Updating existing vector store: {vector_store_id}")
+    else:
+        # Create vector store
+        log("\n🗄️  Creating Milvus vector store...")
+        vector_store_name = config.vector_store_name or f"milvus_collection_{Path.cwd().name}"
+        
+        log(f"Using embedding model: {config.embedding_model}")
+        log(f"Embedding dimension: {config.embedding_dimension}")
+        
+        index_options = vector_index_options(
+            config.index_type, config.index_params, config.metric_type, config.embedding_dimension, config.quantization
+        )
+        if index_options:
+            log(f"Vector index (requested): {describe_vector_index(index_options)}")
+        
+        vector_store = client.vector_stores.create(
+            name=vector_store_name,
+            extra_body={
+                "embedding_model": config.embedding_model,
+                "embedding_dimension": config.embedding_dimension,
+                "provider_id": config.provider_id,
+                **index_options
+            }
+        )
+        
+        vector_store_id = vector_store.id
+        log(f"✓ Vector store created: {vector_store_name}")
+        log(f"✓ Vector Store ID: {vector_store_id}")
+        if index_options:
+            read_back_vector_index(
+                client, vector_store_id, index_options,
+                verbose=config.verbose, require_verified=config.quantization is not None
+            )
     
-    # Associate files to vector store
+    # Associate all files to the vector store in a single batch
     log("\n🔗 Indexing documents...")
-    client.vector_stores.file_batches.create_and_poll(
+    file_batch = client.vector_stores.file_batches.create_and_poll(
         vector_store_id=vector_store_id,
         file_ids=file_ids
     )
     
+    if manifest:
+        # Files that failed to index are deleted by the next run, which uploads their documents again
+        failed_ids = set()
+        if file_batch.file_counts.failed:
+            failed_ids = {
+                f.id for f in client.vector_stores.file_batches.list_files(
+                    file_batch.id, vector_store_id=vector_store_id, filter="failed"
+                )
+            }
+            log(f"⚠️  {len(failed_ids)} files failed to index; they are uploaded again on the next run")
+        manifest.data["vector_store_id"] = vector_store_id
+        manifest.data["embedding_model"] = config.embedding_model
+        for path, file_id in zip(doc_files, file_ids):
+            if file_id in failed_ids:
+                manifest.data["pending_deletions"].append(file_id)
+            else:
+                manifest.set_document(path.name, file_hashes[path.name], file_id)
+        manifest.save()
+    
     log(f"✓ {len(file_ids)} documents indexed")
     log(f"\n{'='*60}")
     log(f"✅ UPLOAD COMPLETED")
@@ -696,17 +3503,553 @@ def upload_documents_to_milvus(config: MilvusUploadConfig) -> str:
     return vector_store_id
 
 
+def _load_upload_manifest(config: MilvusUploadConfig) -> IngestionManifest:
+    """
+    Load the manifest of incremental mode.
+    
+    Raises:
+        ValueError: If the manifest was built for another model or store
+    """
+    manifest = IngestionManifest.load(Path(config.manifest_path))
+    if manifest.data["embedding_model"] not in (None, config.embedding_model):
+        raise ValueError(
+            f"Manifest was built with embedding model '{manifest.data['embedding_model']}', "
+            f"not '{config.embedding_model}'. Use a new manifest for a new model."
+        )
+    if config.vector_store_id and manifest.data["vector_store_id"] not in (None, config.vector_store_id):
+        raise ValueError(
+            f"Manifest belongs to vector store '{manifest.data['vector_store_id']}', not '{config.vector_store_id}'"
+        )
+    return manifest
+
+
+def _delete_document_files(
+    openai_client: OpenAI,
+    vector_store_id: str,
+    manifest: IngestionManifest,
+    names: List[str],
+    resilience: ResilienceLayer,
+    log: Callable[[str], None]
+):
+    """
+    Delete the vector store files of replaced and removed documents.
+    
+    Deletions left over from previous runs go first. Nothing is uploaded until
+    all of them succeed, so a document is never stored twice: a failed
+    deletion stops the upload, and the file IDs not yet deleted are kept as
+    pending_deletions in the saved manifest for the next run.
+    
+    Raises:
+        RuntimeError: If a file could not be deleted
+    """
+    pending = manifest.data["pending_deletions"]
+    for name in names:
+        file_id = manifest.remove_document(name)
+        if file_id and file_id not in pending:
+            pending.append(file_id)
+    
+    deleted = 0
+    while pending:
+        try:
+            resilience.call(partial(delete_document_file, openai_client, vector_store_id, pending[0]))
+        except Exception as e:
+            manifest.save()
+            raise RuntimeError(
+                f"Could not delete {len(pending)} replaced or removed document files from '{vector_store_id}'; "
+                f"they are kept in the manifest and deleted first on the next run: {e}"
+            ) from e
+        pending.pop(0)
+        deleted += 1
+    if deleted:
+        log(f"🗑️  Deleted {deleted} replaced or removed document files")
+
+
+def _iter_config_documents(config: MilvusLocalChunkingConfig, log: Callable[[str], None]) -> Iterator[Dict]:
+    """Stream the documents of config.json_file or config.documents_dir (at least one)."""
+    if config.json_file:
+        log(f"\n📂 Loading from JSON: {config.json_file}")
+        documents = iter_documents_from_json(Path(config.json_file))
+    else:
+        log(f"\n📂 Loading from directory: {config.documents_dir}")
+        docs_path = Path(config.documents_dir)
+        if not docs_path.exists():
+            raise FileNotFoundError(f"Directory does not exist: {config.documents_dir}")
+        documents = iter_documents_from_directory(
+            docs_path,
+            extensions=config.file_extensions,
+            verbose=config.verbose,
+            recursive=config.recursive,
+            workers=config.read_workers,
+            min_size=config.min_file_size,
+            max_size=config.max_file_size,
+            modified_after=config.modified_after
+        )
+    
+    first_document = next(documents, None)
+    if first_document is None:
+        raise ValueError("No documents found")
+    return itertools.chain([first_document], documents)
+
+
+def _local_chunking_options(config: MilvusLocalChunkingConfig) -> Dict[str, Any]:
+    """Keyword arguments for chunk_document_batch (also hashed into document hashes)."""
+    chunking = {
+        "chunk_size": config.chunk_size,
+        "chunk_overlap": config.chunk_overlap,
+        "max_chunk_chars": config.max_chunk_chars,
+    }
+    if config.max_chunk_tokens:
+        chunking.update(
+            max_chunk_tokens=config.max_chunk_tokens,
+            chunk_overlap_tokens=config.chunk_overlap_tokens,
+            tokenizer_name=config.tokenizer_name or config.embedding_model,
+        )
+    if config.structure_aware:
+        chunking["structure_aware"] = True
+    return chunking
+
+
+def _log_local_chunking_banner(config: MilvusLocalChunkingConfig, log: Callable[[str], None]):
+    """Print the settings of a local chunking upload."""
+    log("=" * 70)
+    log("📚 UPLOAD DOCUMENTS TO MILVUS WITH LOCAL CHUNKING")
+    log("=" * 70)
+    log(f"   URL: {config.llama_stack_url}")
+    log(f"   Embedding Model: {config.embedding_model}")
+    log(f"   Embedding Dimension: {config.embedding_dimension or 'auto-detect'}")
+    log(f"   Chunk Size: {config.chunk_size} characters")
+    log(f"   Chunk Overlap: {config.chunk_overlap} characters")
+    log(f"   Max Chunk Chars: {config.max_chunk_chars} (hard limit)")
+    if config.max_chunk_tokens:
+        log(f"   Token Budget: {config.max_chunk_tokens} tokens, {config.chunk_overlap_tokens} overlap "
+            f"(tokenizer: {config.tokenizer_name or config.embedding_model}; replaces character settings)")
+    if config.structure_aware:
+        log("   Structure-Aware: Markdown/RST sections, code blocks, tables and lists kept whole")
+    if config.chunk_workers > 1:
+        log(f"   Chunk Workers: {config.chunk_workers} processes")
+    if config.dedup:
+        log(f"   Dedup: exact + MinHash/LSH near-duplicates (Jaccard >= {config.dedup_threshold})")
+    if config.pipeline:
+        log(f"   Async Pipeline: queues of {config.pipeline_queue_size}, "
+            f"{config.embed_concurrency} embed / {config.insert_concurrency} insert in flight")
+    if not config.json_file and (config.recursive or config.read_workers > 1):
+        log(f"   Directory Scan: {'recursive' if config.recursive else 'top level'}, "
+            f"{config.read_workers} reader threads")
+    log(f"   Batch Size: {config.batch_size}")
+    if config.insert_concurrency > 1 or config.max_batch_bytes:
+        log(f"   Insert Concurrency: {config.insert_concurrency} batches in flight")
+        log(f"   Max Batch Bytes: {config.max_batch_bytes or 'unlimited'}")
+    if config.insert_transport == "bulk":
+        log(f"   Insert Transport: bulk ({DEFAULT_JSON_ENCODER}, "
+            f"{'uncompressed' if config.insert_compression == 'identity' else config.insert_compression})")
+    if config.embedding_cache_path:
+        log(f"   Embedding Cache: {config.embedding_cache_path}")
+    if config.resume:
+        log(f"   Resume: {config.vector_store_id} (checkpoints in {config.checkpoint_dir})")
+    if config.index_type or config.metric_type or config.quantization:
+        index_options = vector_index_options(
+            config.index_type, config.index_params, config.metric_type, quantization=config.quantization
+        )
+        log(f"   Vector Index (requested): {describe_vector_index(index_options)}")
+    if not config.verify_ssl:
+        log("   ⚠️  SSL verification disabled (default)")
+
+
+class _LocalChunkingRun:
+    """
+    State of one local chunking upload into a vector store.
+    
+    Picks the chunks to send (skipping what the checkpoint journal already
+    holds), sends insert batches (embedded client-side with an embedding
+    cache), and records each acknowledged batch in the journal and the
+    sparse index.
+    """
+    
+    def __init__(
+        self,
+        config: MilvusLocalChunkingConfig,
+        llama_client,  # LlamaStackClient
+        openai_client: OpenAI,
+        vector_store_id: str,
+        log: Callable[[str], None]
+    ):
+        self.config = config
+        self.llama_client = llama_client
+        self.openai_client = openai_client
+        self.vector_store_id = vector_store_id
+        self.log = log
+        self.chunking = _local_chunking_options(config)
+        self.stats = {
+            "documents": 0, "chunks": 0, "chars": 0, "min": None, "max": 0,
+            "embedding_cache_hits": 0, "embedding_cache_misses": 0, "resumed_chunks": 0,
+        }
+        self._stats_lock = threading.Lock()
+        self.stage_stats: List[PipelineStageStats] = []
+        
+        # Shared by the embedding and insert requests sent to the server
+        concurrent_requests = config.insert_concurrency
+        if config.pipeline and config.embedding_cache_path:
+            concurrent_requests += config.embed_concurrency
+        self.resilience = ResilienceLayer(
+            max_retries=config.insert_retries,
+            requests_per_second=config.max_requests_per_second,
+            max_concurrency=concurrent_requests
+        )
+        
+        # Bulk transport: pre-encoded (and compressed) insert bodies over the shared pool
+        self.transport = None
+        if config.insert_transport == "bulk":
+            self.transport = BulkInsertTransport(
+                config.llama_stack_url,
+                get_http_client(timeout=config.timeout, verify_ssl=config.verify_ssl),
+                compression=config.insert_compression
+            )
+        
+        self.embedding_cache = None
+        if config.embedding_cache_path:
+            self.embedding_cache = EmbeddingCache(config.embedding_cache_path, config.embedding_cache_max_entries)
+        # Client-side embedding before each insert (only with an embedding cache)
+        self.prepare_batch = self.embed_batch if self.embedding_cache else None
+        
+        # Duplicates are dropped before embedding
+        self.deduplicator = None
+        if config.dedup:
+            self.deduplicator = ChunkDeduplicator(
+                threshold=config.dedup_threshold, merge_window=config.dedup_merge_window
+            )
+        self.journal = self._open_journal()
+        self.sparse_index = self._open_sparse_index()
+    
+    def _open_journal(self) -> Optional[CheckpointJournal]:
+        """Checkpoint journal: acknowledged chunks survive a crash, and --resume skips them."""
+        config = self.config
+        if not config.checkpoint_dir:
+            return None
+        journal_path = CheckpointJournal.path_for(Path(config.checkpoint_dir), self.vector_store_id)
+        journal_header = {
+            "vector_store_id": self.vector_store_id,
+            "embedding_model": config.embedding_model,
+            "chunking": self.chunking,
+        }
+        if config.resume:
+            journal = CheckpointJournal.resume(journal_path, journal_header)
+            self.log(f"   ⏯️  Resuming: {len(journal.acknowledged)} chunks already acknowledged ({journal_path})")
+        else:
+            journal = CheckpointJournal.create(journal_path, journal_header)
+            self.log(f"   📓 Checkpoint journal: {journal_path}")
+        return journal
+    
+    def _open_sparse_index(self) -> Optional[SparseIndex]:
+        """Hybrid mode: acknowledged chunks are also indexed for BM25 next to the store."""
+        if not self.config.sparse_index_dir:
+            return None
+        sparse_index = SparseIndex(
+            SparseIndex.path_for(Path(self.config.sparse_index_dir), self.vector_store_id), self.vector_store_id
+        )
+        self.log(f"   🔤 Sparse (BM25) index: {sparse_index.path}")
+        # Resumed chunks are not sent again, so they can't be indexed now
+        stored_chunks = len(self.journal.acknowledged) if self.journal else 0
+        if stored_chunks and not sparse_index.stats()["chunks"]:
+            sparse_index.close()
+            raise ValueError(
+                f"Sparse index {sparse_index.path} is empty but vector store '{self.vector_store_id}' already holds "
+                f"{stored_chunks} chunks from earlier runs. Build the sparse index with the store: "
+                "upload into a new vector store."
+            )
+        return sparse_index
+    
+    def record_inserted(self, batch: List[Dict[str, Any]]):
+        """Record an acknowledged batch in the journal and the sparse index."""
+        if self.journal:
+            self.journal.record(batch)
+        if self.sparse_index:
+            self.sparse_index.add_chunks(batch)
+    
+    def close(self):
+        """Save the dedup back-references, close the cache and journal."""
+        if self.deduplicator and self.config.dedup_references_path:
+            self.deduplicator.save_back_references(Path(self.config.dedup_references_path))
+        if self.embedding_cache:
+            self.embedding_cache.close()
+        if self.journal:
+            self.journal.close()
+    
+    def new_chunks(self, doc_id: str, doc_chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Chunks of one document to insert (on resume, only those not yet acknowledged)."""
+        journal, stats = self.journal, self.stats
+        doc_count = 0
+        for chunk in doc_chunks:
+            doc_count += 1
+            if journal and journal.is_acknowledged(chunk):
+                stats["resumed_chunks"] += 1
+                continue
+            
+            size = len(chunk["content"])
+            stats["chars"] += size
+            stats["min"] = size if stats["min"] is None else min(stats["min"], size)
+            stats["max"] = max(stats["max"], size)
+            stats["chunks"] += 1
+            yield chunk
+        stats["documents"] += 1
+        self.log(f"   📄 {doc_id}: {doc_count} chunks")
+    
+    def deduplicated(self, chunks: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+        """Chunks without the duplicates of earlier ones (with config.dedup)."""
+        return self.deduplicator.deduplicate(chunks) if self.deduplicator else chunks
+    
+    def chunk_stream(self, documents: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
+        """LOCAL chunking of the documents, streamed straight into the insert stage."""
+        chunks = (
+            chunk
+            for doc, doc_chunks in iter_chunked_documents(
+                documents,
+                workers=self.config.chunk_workers,
+                **self.chunking
+            )
+            for chunk in self.new_chunks(doc["document_id"], doc_chunks)
+        )
+        return self.deduplicated(chunks)
+    
+    def embed_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach cached (or freshly computed) embeddings to a batch."""
+        def embed():
+            batch_stats = {"embedding_cache_hits": 0, "embedding_cache_misses": 0}
+            return attach_cached_embeddings(
+                self.openai_client, self.embedding_cache, self.config.embedding_model,
+                self.config.embedding_dimension, batch, batch_stats
+            ), batch_stats
+        
+        batch, batch_stats = self.resilience.call(embed)
+        with self._stats_lock:
+            for key, value in batch_stats.items():
+                self.stats[key] += value
+        return batch
+    
+    def insert_batch(self, batch: List[Dict[str, Any]]):
+        """Send one batch to the store."""
+        if self.transport:
+            self.resilience.call(lambda: self.transport.insert(self.vector_store_id, batch))
+        else:
+            self.resilience.call(
+                lambda: self.llama_client.vector_io.insert(vector_db_id=self.vector_store_id, chunks=batch)
+            )
+    
+    def insert_streaming(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """Pull chunks through the stages one after another (see insert_chunks_with_vector_io)."""
+        config = self.config
+        return insert_chunks_with_vector_io(
+            self.llama_client,
+            self.vector_store_id,
+            self.chunk_stream(documents),
+            batch_size=config.batch_size,
+            verbose=config.verbose,
+            max_in_flight=config.insert_concurrency,
+            max_batch_bytes=config.max_batch_bytes,
+            on_batch_inserted=self.record_inserted if self.journal or self.sparse_index else None,
+            prepare_batch=self.prepare_batch,
+            resilience=self.resilience,
+            transport=self.transport
+        )
+    
+    async def insert_with_pipeline(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """Load, chunk, embed and insert as concurrent stages over bounded queues."""
+        config = self.config
+        queues = [asyncio.Queue(maxsize=config.pipeline_queue_size) for _ in range(4)]
+        loaded, chunked, batched, embedded = queues
+        counts = {"inserted": 0, "failed": 0}
+        errors = []
+        batcher = InsertBatcher(batch_size=config.batch_size, max_batch_bytes=config.max_batch_bytes)
+        prepare_batch = self.prepare_batch
+        
+        def batch_document(item) -> List[Tuple[List[Dict[str, Any]], Optional[Exception]]]:
+            doc_id, doc_chunks = item
+            batches = []
+            for chunk in self.new_chunks(doc_id, doc_chunks):
+                # Dedup holds kept chunks back across documents (see ChunkDeduplicator.push)
+                for kept in (self.deduplicator.push(chunk) if self.deduplicator else (chunk,)):
+                    batches.extend(batcher.add(kept))
+            return [(batch, None) for _, batch in batches]
+        
+        def flush_batches():
+            batches = []
+            for kept in (self.deduplicator.flush() if self.deduplicator else ()):
+                batches.extend(batcher.add(kept))
+            batches.extend(batcher.flush())
+            return [(batch, None) for _, batch in batches]
+        
+        def embed(item):
+            batch, error = item
+            if error is None:
+                try:
+                    batch = prepare_batch(batch)
+                except Exception as e:
+                    error = e
+            return batch, error
+        
+        def insert(item):
+            batch, error = item
+            if error is None:
+                try:
+                    self.insert_batch(batch)
+                except Exception as e:
+                    error = e
+            return batch, error
+        
+        def collect(item):
+            batch, error = item
+            if error is not None:
+                counts["failed"] += len(batch)
+                errors.append(error)
+                self.log(f"   ❌ Error in batch of {len(batch)} chunks: {str(error)[:100]}...")
+                return
+            counts["inserted"] += len(batch)
+            self.record_inserted(batch)
+        
+        load_stats = PipelineStageStats("load")
+        chunk_stats = PipelineStageStats("chunk", loaded)
+        batch_stats = PipelineStageStats("batch", chunked)
+        embed_stats = PipelineStageStats("embed", batched) if prepare_batch else None
+        insert_stats = PipelineStageStats("insert", embedded if prepare_batch else batched)
+        self.stage_stats = [st for st in (load_stats, chunk_stats, batch_stats, embed_stats, insert_stats) if st]
+        
+        # A single chunk worker chunks in this process (on a thread, off the event loop)
+        chunk_pool = (
+            ProcessPoolExecutor(max_workers=config.chunk_workers) if config.chunk_workers > 1
+            else ThreadPoolExecutor(max_workers=1)
+        )
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=1) as load_pool, chunk_pool, \
+                ThreadPoolExecutor(max_workers=max(1, config.embed_concurrency)) as embed_pool, \
+                ThreadPoolExecutor(max_workers=max(1, config.insert_concurrency)) as insert_pool:
+            stages = [
+                pipeline_source(documents, loaded, load_stats, executor=load_pool),
+                pipeline_map(
+                    partial(_chunk_pipeline_document, chunk_options=self.chunking),
+                    loaded, chunked, chunk_stats,
+                    concurrency=config.chunk_workers, executor=chunk_pool
+                ),
+                pipeline_transform(batch_document, chunked, batched, batch_stats, flush=flush_batches),
+            ]
+            if prepare_batch:
+                stages.append(pipeline_map(
+                    embed, batched, embedded, embed_stats,
+                    concurrency=config.embed_concurrency, executor=embed_pool, ordered=False
+                ))
+            stages.append(pipeline_map(
+                insert, embedded if prepare_batch else batched, None, insert_stats,
+                concurrency=config.insert_concurrency, executor=insert_pool, ordered=False,
+                on_result=collect
+            ))
+            await run_pipeline(
+                stages,
+                self.stage_stats,
+                report_interval=config.pipeline_report_interval if config.verbose else None
+            )
+        
+        elapsed = time.perf_counter() - start_time
+        print(f"   ✅ Total inserted: {counts['inserted']}")
+        if counts["failed"] > 0:
+            print(f"   ⚠️  Total failed: {counts['failed']}")
+        print(f"   ⏱️  Throughput: {counts['inserted'] / max(elapsed, 1e-9):.1f} chunks/sec ({elapsed:.1f}s)")
+        if self.resilience.stats["retries"] or self.resilience.stats["overloaded"]:
+            print(f"   🔁 {self.resilience.describe()}")
+        if self.transport:
+            print(f"   📦 {self.transport.describe()}")
+        for stage in self.stage_stats:
+            summary = stage.summary()
+            self.log(
+                f"   📈 {stage.name:<6} {summary['items']:>7} items {summary['items_per_sec']:>9.1f}/s  "
+                f"busy {summary['busy_seconds']:.1f}s  queue avg {summary['avg_queue_depth']:.1f} "
+                f"max {summary['max_queue_depth']}"
+            )
+        if counts["failed"]:
+            raise RuntimeError(
+                f"{counts['failed']}/{counts['inserted'] + counts['failed']} chunks failed to insert into "
+                f"'{self.vector_store_id}' after retries. First error: {errors[0]}"
+            )
+        return counts["inserted"]
+    
+    def log_summary(self, sparse_stats: Optional[Dict[str, Any]]):
+        """Print the chunk, dedup, cache, resume and sparse index counts."""
+        stats, log = self.stats, self.log
+        log(f"\n   📊 Total chunks generated: {stats['chunks']}")
+        if self.deduplicator:
+            dedup_stats = self.deduplicator.stats
+            log(
+                f"   🧹 Dedup: {dedup_stats['exact_duplicates']} exact + {dedup_stats['near_duplicates']} near duplicates "
+                f"dropped ({dedup_stats['chars_saved']} characters), {dedup_stats['kept']} kept"
+            )
+            if self.config.dedup_references_path:
+                log(f"   🧹 Duplicate back-references: {self.config.dedup_references_path}")
+        if self.embedding_cache:
+            log(f"   🧠 Embedding cache: {stats['embedding_cache_hits']} hits, {stats['embedding_cache_misses']} misses")
+        if self.journal and self.config.resume:
+            log(f"   ⏯️  Resumed: {stats['resumed_chunks']} already acknowledged chunks skipped")
+        if sparse_stats:
+            log(
+                f"   🔤 Sparse index: {sparse_stats['chunks']} chunks, {sparse_stats['terms']} terms, "
+                f"{sparse_stats['avg_chunk_terms']} terms per chunk"
+            )
+        
+        # Show chunk statistics
+        if stats["chunks"]:
+            log(f"   📏 Average size: {stats['chars'] // stats['chunks']} characters")
+            log(f"   📏 Min size: {stats['min']} characters")
+            log(f"   📏 Max size: {stats['max']} characters")
+    
+    def result(self, vector_store_name: str, inserted: int, sparse_stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Result dict of upload_documents_with_local_chunking."""
+        config, stats = self.config, self.stats
+        return {
+            "vector_store_id": self.vector_store_id,
+            "store_name": vector_store_name,
+            "documents_count": stats["documents"],
+            "chunks_count": inserted,
+            "chunk_size": config.chunk_size,
+            "chunk_overlap": config.chunk_overlap,
+            "embedding_model": config.embedding_model,
+            "embedding_dimension": config.embedding_dimension,
+            **({
+                "dedup": dict(self.deduplicator.stats),
+                **({"dedup_references_path": config.dedup_references_path} if config.dedup_references_path else {}),
+            } if self.deduplicator else {}),
+            **({
+                "insert_transport": dict(self.transport.stats, compression=config.insert_compression),
+            } if self.transport else {}),
+            **({
+                "sparse_index_path": str(self.sparse_index.path),
+                "sparse_index": sparse_stats,
+            } if self.sparse_index else {}),
+            **({
+                "checkpoint_path": str(self.journal.path),
+                "resumed_chunks": stats["resumed_chunks"],
+            } if self.journal else {}),
+            **({
+                "pipeline_stages": {stage.name: stage.summary() for stage in self.stage_stats},
+            } if config.pipeline else {}),
+            **({
+                "embedding_cache_hits": stats["embedding_cache_hits"],
+                "embedding_cache_misses": stats["embedding_cache_misses"],
+            } if self.embedding_cache else {}),
+        }
+
+
 def upload_documents_with_local_chunking(config: MilvusLocalChunkingConfig) -> Dict[str, Any]:
     """
     Upload documents to Milvus with LOCAL chunking.
     
     This function:
-    1. Reads documents from directory or JSON file
-    2. Chunks documents LOCALLY (doesn't depend on server)
-    3. Creates a vector store in Milvus
-    4. Inserts chunks using vector_io.insert
+    1. Creates a vector store in Milvus
+    2. Streams documents from directory or JSON file
+    3. Chunks documents LOCALLY (doesn't depend on server)
+    4. Inserts chunks using vector_io.insert, one batch at a time
     5. Optionally verifies the insertion
     
+    Documents, chunks and batches are streamed, so peak memory is bounded by
+    the largest document plus one insert batch, not by corpus size. With
+    config.pipeline, the stages run concurrently over bounded asyncio queues
+    (see run_pipeline) instead of being pulled one after another.
+    
     Advantages:
     - Full control over chunk size and overlap
     - Support for overlap between chunks
@@ -714,7 +4057,7 @@ def upload_documents_with_local_chunking(config: MilvusLocalChunkingConfig) -> D
     
     Args:
         config: MilvusLocalChunkingConfig with all settings
-        
+    
     Returns:
         Dict with upload results including vector_store_id, counts, etc.
     """
@@ -722,19 +4065,10 @@ def upload_documents_with_local_chunking(config: MilvusLocalChunkingConfig) -> D
         if config.verbose:
             print(msg)
     
-    # Banner
-    log("=" * 70)
-    log("📚 UPLOAD DOCUMENTS TO MILVUS WITH LOCAL CHUNKING")
-    log("=" * 70)
-    log(f"   URL: {config.llama_stack_url}")
-    log(f"   Embedding Model: {config.embedding_model}")
-    log(f"   Embedding Dimension: {config.embedding_dimension}")
-    log(f"   Chunk Size: {config.chunk_size} characters")
-    log(f"   Chunk Overlap: {config.chunk_overlap} characters")
-    log(f"   Max Chunk Chars: {config.max_chunk_chars} (hard limit)")
-    log(f"   Batch Size: {config.batch_size}")
-    if not config.verify_ssl:
-        log("   ⚠️  SSL verification disabled (default)")
+    _log_local_chunking_banner(config, log)
+    
+    # Resolve (or check) the embedding dimension before the store is created
+    resolve_embedding_dimension(config, log)
     
     # Create clients
     llama_client, openai_client = create_clients(
@@ -746,73 +4080,69 @@ def upload_documents_with_local_chunking(config: MilvusLocalChunkingConfig) -> D
     if llama_client is None:
         raise RuntimeError("llama_stack_client is required for local chunking. Install with: pip install llama-stack-client")
     
-    # Load documents
-    if config.json_file:
-        log(f"\n📂 Loading from JSON: {config.json_file}")
-        documents = load_documents_from_json(Path(config.json_file))
-    else:
-        log(f"\n📂 Loading from directory: {config.documents_dir}")
-        docs_path = Path(config.documents_dir)
-        if not docs_path.exists():
-            raise FileNotFoundError(f"Directory does not exist: {config.documents_dir}")
-        documents = load_documents_from_directory(docs_path, verbose=config.verbose)
-    
-    if not documents:
-        raise ValueError("No documents found")
-    
-    log(f"   ✅ {len(documents)} documents loaded")
-    
-    # Perform LOCAL chunking
-    log(f"\n✂️  Performing local chunking...")
-    all_chunks = []
-    for doc in documents:
-        doc_chunks = chunk_document(
-            content=doc["content"],
-            document_id=doc["document_id"],
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap,
-            metadata=doc.get("metadata", {}),
-            max_chunk_chars=config.max_chunk_chars
+    # Compressed insert bodies only if the server says it decodes them
+    if config.insert_compression != "identity":
+        check_request_encoding(
+            get_http_client(timeout=config.timeout, verify_ssl=config.verify_ssl),
+            config.llama_stack_url,
+            config.insert_compression
         )
-        log(f"   📄 {doc['document_id']}: {len(doc_chunks)} chunks")
-        all_chunks.extend(doc_chunks)
+        log(f"   ✅ Server accepts {config.insert_compression} request bodies")
     
-    log(f"\n   📊 Total chunks generated: {len(all_chunks)}")
+    # Stream documents (nothing is read until the insert stage pulls chunks)
+    documents = _iter_config_documents(config, log)
     
-    # Show chunk statistics
-    if all_chunks:
-        chunk_sizes = [len(c["content"]) for c in all_chunks]
-        log(f"   📏 Average size: {sum(chunk_sizes)//len(chunk_sizes)} characters")
-        log(f"   📏 Min size: {min(chunk_sizes)} characters")
-        log(f"   📏 Max size: {max(chunk_sizes)} characters")
+    vector_store_id = config.vector_store_id
     
     # Generate vector store name if not provided
     from datetime import datetime
     vector_store_name = config.vector_store_name or f"local_chunking_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
-    # Create vector store
-    vector_store_id = create_vector_store(
-        openai_client,
-        vector_store_name,
-        config.embedding_model,
-        config.embedding_dimension,
-        config.provider_id,
-        verbose=config.verbose
-    )
+    # Create vector store (unless updating an existing one)
+    if vector_store_id:
+        log(f"\n🗄️  Updating existing vector store: {vector_store_id}")
+    else:
+        vector_store_id = create_vector_store(
+            openai_client,
+            vector_store_name,
+            config.embedding_model,
+            config.embedding_dimension,
+            config.provider_id,
+            verbose=config.verbose,
+            index_type=config.index_type,
+            index_params=config.index_params,
+            metric_type=config.metric_type,
+            quantization=config.quantization
+        )
     
-    # Insert chunks using vector_io
-    log(f"\n📤 Inserting {len(all_chunks)} chunks...")
-    inserted = insert_chunks_with_vector_io(
-        llama_client,
-        vector_store_id,
-        all_chunks,
-        batch_size=config.batch_size,
-        verbose=config.verbose
-    )
+    run = _LocalChunkingRun(config, llama_client, openai_client, vector_store_id, log)
+    
+    log(f"\n✂️  Chunking locally and inserting ({'async pipeline' if config.pipeline else 'streaming'})...")
+    insert_start = time.perf_counter()
+    try:
+        if config.pipeline:
+            inserted = asyncio.run(run.insert_with_pipeline(documents))
+        else:
+            inserted = run.insert_streaming(documents)
+    finally:
+        run.close()
+    
+    if config.run_history_path and inserted:
+        append_run_history(
+            Path(config.run_history_path),
+            run_history_record(config, run.stats, inserted, time.perf_counter() - insert_start)
+        )
+    
+    sparse_stats = run.sparse_index.stats() if run.sparse_index else None
+    run.log_summary(sparse_stats)
     
     # Verify if query provided
     if config.verify_query:
-        verify_insertion(llama_client, vector_store_id, config.verify_query, verbose=config.verbose)
+        verify_insertion(
+            llama_client, vector_store_id, config.verify_query, verbose=config.verbose, sparse_index=run.sparse_index
+        )
+    if run.sparse_index:
+        run.sparse_index.close()
     
     # Summary
     log("\n" + "=" * 70)
@@ -820,21 +4150,243 @@ def upload_documents_with_local_chunking(config: MilvusLocalChunkingConfig) -> D
     log("=" * 70)
     log(f"   Vector Store ID: {vector_store_id}")
     log(f"   Store Name: {vector_store_name}")
-    log(f"   Documents: {len(documents)}")
+    log(f"   Documents: {run.stats['documents']}")
     log(f"   Chunks inserted: {inserted}")
     log(f"   Chunk Size: {config.chunk_size} chars")
     log(f"   Chunk Overlap: {config.chunk_overlap} chars")
     
+    return run.result(vector_store_name, inserted, sparse_stats)
+
+
+# =============================================================================
+# RUN HISTORY AND DRY-RUN PLANNING
+# =============================================================================
+
+# Rough characters per embedding token when no tokenizer is configured
+CHARS_PER_TOKEN_ESTIMATE = 4
+# Recent comparable runs whose median throughput is used for projections
+RUN_HISTORY_WINDOW = 5
+
+
+def run_history_record(
+    config: MilvusLocalChunkingConfig,
+    stats: Dict[str, Any],
+    inserted: int,
+    elapsed: float
+) -> Dict[str, Any]:
+    """Throughput record of a finished upload_documents_with_local_chunking run."""
     return {
-        "vector_store_id": vector_store_id,
-        "store_name": vector_store_name,
-        "documents_count": len(documents),
-        "chunks_count": inserted,
-        "chunk_size": config.chunk_size,
-        "chunk_overlap": config.chunk_overlap,
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "llama_stack_url": config.llama_stack_url,
+        "embedding_model": config.embedding_model,
+        "client_embeddings": bool(config.embedding_cache_path),
+        "pipeline": config.pipeline,
+        "batch_size": config.batch_size,
+        "insert_concurrency": config.insert_concurrency,
+        "documents": stats["documents"],
+        "chunks": inserted,
+        "chars": stats["chars"],
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(inserted / max(elapsed, 1e-9), 3),
+    }
+
+
+def append_run_history(path: Path, record: Dict[str, Any]):
+    """Append one run record to a JSON Lines history file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_run_history(path: Path) -> List[Dict[str, Any]]:
+    """Run records of a history file, oldest first (unreadable lines are skipped)."""
+    if not path.exists():
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("chunks_per_sec"):
+                records.append(record)
+    return records
+
+
+def estimate_throughput(
+    history: List[Dict[str, Any]],
+    config: MilvusLocalChunkingConfig
+) -> Optional[Dict[str, Any]]:
+    """
+    Median chunks/sec of the most recent runs comparable to config.
+    
+    Runs with the same server, model, embedding mode and insert settings are
+    preferred; the match is relaxed step by step when there are none.
+    
+    Returns:
+        Dict with chunks_per_sec, runs and basis, or None without history
+    """
+    wanted = {
+        "llama_stack_url": config.llama_stack_url,
         "embedding_model": config.embedding_model,
-        "embedding_dimension": config.embedding_dimension,
+        "client_embeddings": bool(config.embedding_cache_path),
+        "pipeline": config.pipeline,
+        "batch_size": config.batch_size,
+        "insert_concurrency": config.insert_concurrency,
+    }
+    tiers = [
+        (list(wanted), "same server, model and insert settings"),
+        (["llama_stack_url", "embedding_model", "client_embeddings"], "same server and model"),
+        (["embedding_model"], "same embedding model"),
+        ([], "all recorded runs"),
+    ]
+    for keys, basis in tiers:
+        runs = [r for r in history if all(r.get(key) == wanted[key] for key in keys)][-RUN_HISTORY_WINDOW:]
+        if runs:
+            rates = sorted(r["chunks_per_sec"] for r in runs)
+            middle = len(rates) // 2
+            median = rates[middle] if len(rates) % 2 else (rates[middle - 1] + rates[middle]) / 2
+            return {"chunks_per_sec": median, "runs": len(runs), "basis": basis}
+    return None
+
+
+def format_duration(seconds: float) -> str:
+    """Human-readable duration, e.g. 2h 05m or 3m 20s."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+def plan_local_chunking(config: MilvusLocalChunkingConfig) -> Dict[str, Any]:
+    """
+    Dry run of upload_documents_with_local_chunking, without any network access.
+    
+    Streams the corpus through the loaders and the chunker exactly as a real
+    run would, including deduplication, and projects what the upload would send: chunks, embedding
+    tokens, insert requests and payload bytes. The duration is projected from
+    the median chunks/sec of comparable previous runs in
+    config.run_history_path. Chunks a resumed run would skip are not deducted.
+    
+    Token counts are exact in token mode (max_chunk_tokens, whose tokenizer
+    the chunker loads anyway) and estimated at CHARS_PER_TOKEN_ESTIMATE
+    otherwise. The tokenizer is only loaded from a local file or the Hugging
+    Face cache (see local_tokenizer_file); dedup only counts what it would drop.
+    
+    Args:
+        config: MilvusLocalChunkingConfig of the run to plan
+        
+    Returns:
+        Dict with the projected counts and duration
+    """
+    def log(msg: str):
+        if config.verbose:
+            print(msg)
+    
+    log("=" * 70)
+    log("📋 PLAN LOCAL CHUNKING UPLOAD (dry run, no network access)")
+    log("=" * 70)
+    
+    start_time = time.perf_counter()
+    documents = _iter_config_documents(config, log)
+    chunking = _local_chunking_options(config)
+    # The chunker loads the tokenizer by name, so point it at the local file:
+    # from_pretrained would download it.
+    chunk_options = chunking
+    tokenizer = None
+    if config.max_chunk_tokens:
+        tokenizer_file = str(local_tokenizer_file(chunking["tokenizer_name"]))
+        chunk_options = {**chunking, "tokenizer_name": tokenizer_file}
+        tokenizer = get_tokenizer(tokenizer_file)
+    deduplicator = ChunkDeduplicator(threshold=config.dedup_threshold) if config.dedup else None
+    batcher = InsertBatcher(batch_size=config.batch_size, max_batch_bytes=config.max_batch_bytes)
+    # Client-side embeddings travel in the insert payload (dimension from the cache only: no network)
+    embedding_dimension = (
+        config.embedding_dimension
+        or EmbeddingModelRegistry(config.model_registry_path).lookup(config.llama_stack_url, config.embedding_model)
+        or EMBEDDING_DIMENSIONS.get(config.embedding_model)
+    )
+    if config.embedding_cache_path and not embedding_dimension:
+        log(f"⚠️  Embedding dimension of '{config.embedding_model}' unknown offline; payload assumes 768")
+    embedding_bytes = len(json.dumps({"embedding": [-0.012345678901234567] * (embedding_dimension or 768)}))
+    
+    plan = {
+        "documents": 0, "source_chars": 0, "chunks": 0, "duplicate_chunks": 0, "chunks_to_insert": 0,
+        "chars": 0, "embedding_tokens": 0, "embedding_tokens_estimated": tokenizer is None,
+        "insert_requests": 0, "payload_bytes": 0,
     }
+    
+    def count_batches(batches: List[Tuple[int, List[Dict[str, Any]]]]):
+        for _, batch in batches:
+            texts = [formatted["content"] for formatted in batch]
+            plan["insert_requests"] += 1
+            plan["chunks_to_insert"] += len(batch)
+            plan["chars"] += sum(len(text) for text in texts)
+            plan["payload_bytes"] += sum(estimate_payload_bytes(formatted) for formatted in batch)
+            if config.embedding_cache_path:
+                plan["payload_bytes"] += embedding_bytes * len(batch)
+            if tokenizer:
+                plan["embedding_tokens"] += sum(len(encoding.ids) for encoding in tokenizer.encode_batch(texts))
+            else:
+                plan["embedding_tokens"] += sum(-(-len(text) // CHARS_PER_TOKEN_ESTIMATE) for text in texts)
+    
+    def counted_documents():
+        for doc in documents:
+            plan["source_chars"] += len(doc["content"])
+            yield doc
+    
+    log("\n✂️  Chunking locally (nothing is sent)...")
+    for doc, doc_chunks in iter_chunked_documents(counted_documents(), workers=config.chunk_workers, **chunk_options):
+        plan["documents"] += 1
+        for chunk in doc_chunks:
+            plan["chunks"] += 1
+            if deduplicator and deduplicator.add(chunk) is not None:
+                plan["duplicate_chunks"] += 1
+                continue
+            count_batches(batcher.add(chunk))
+    
+    count_batches(batcher.flush())
+    
+    plan["plan_seconds"] = round(time.perf_counter() - start_time, 3)
+    plan["embedding_requests"] = plan["insert_requests"] if config.embedding_cache_path else 0
+    
+    history = load_run_history(Path(config.run_history_path)) if config.run_history_path else []
+    throughput = estimate_throughput(history, config)
+    plan["throughput"] = throughput
+    plan["projected_seconds"] = (
+        round(plan["chunks_to_insert"] / throughput["chunks_per_sec"], 1) if throughput else None
+    )
+    
+    tokens_note = f" (estimated at {CHARS_PER_TOKEN_ESTIMATE} chars/token)" if plan["embedding_tokens_estimated"] else ""
+    log("\n" + "=" * 70)
+    log("📋 PLAN")
+    log("=" * 70)
+    log(f"   Documents to chunk: {plan['documents']}")
+    log(f"   Chunks: {plan['chunks']} generated, {plan['chunks_to_insert']} to insert")
+    if deduplicator:
+        log(f"   🧹 Duplicate chunks dropped: {plan['duplicate_chunks']}")
+    log(f"   Embedding tokens: {plan['embedding_tokens']}{tokens_note}")
+    log(f"   Insert requests: {plan['insert_requests']} (batch size {config.batch_size})")
+    if config.embedding_cache_path:
+        log(f"   Embedding requests: up to {plan['embedding_requests']} (fewer with cache hits)")
+    log(f"   Payload: {plan['payload_bytes'] / (1024 * 1024):.1f} MB"
+        f"{' (with embeddings)' if config.embedding_cache_path else ''}")
+    log(f"   Local chunking: {plan['source_chars'] / (1024 * 1024) / max(plan['plan_seconds'], 1e-9):.1f} "
+        f"M chars/sec ({plan['plan_seconds']:.1f}s)")
+    if throughput:
+        log(f"   ⏱️  Projected duration: {format_duration(plan['projected_seconds'])} at "
+            f"{throughput['chunks_per_sec']:.1f} chunks/sec (median of {throughput['runs']} runs, {throughput['basis']})")
+    elif config.run_history_path:
+        log(f"   ⚠️  No previous runs in {config.run_history_path}: run an upload once to calibrate projections")
+    else:
+        log("   ⚠️  No run history configured: set run_history_path to project the duration")
+    
+    return plan
 
 
 # =============================================================================
@@ -857,17 +4409,26 @@ def get_available_embedding_models(
     Returns:
         List of dicts with model info (identifier, dimension)
     """
-    http_client = httpx.Client(verify=verify_ssl, timeout=timeout)
+    http_client = get_http_client(timeout=timeout, verify_ssl=verify_ssl)
     client = OpenAI(
         base_url=f"{llama_stack_url}/v1",
         api_key="fake-api-key",
         http_client=http_client
     )
     
-    models = client.models.list()
+    return embedding_model_info(client.models.list().data)
+
+
+def embedding_model_info(models: Iterable[Any]) -> List[dict]:
+    """
+    Embedding models of a models.list response.
+    
+    Returns:
+        List of dicts with model info (identifier, dimension)
+    """
     embedding_models = []
     
-    for model in models.data:
+    for model in models:
         if hasattr(model, 'model_type') and model.model_type == 'embedding':
             info = {
                 "identifier": model.identifier,
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Recall-vs-latency sweep of a vector store's search parameter.
+
+Queries an existing store with each value of its index's search parameter
+(HNSW ef, IVF nprobe, DiskANN search_list), measures recall@k and client-side
+latency percentiles, and picks the value with the best recall whose p95
+latency meets a target:
+
+    python sweep_index.py --vector-store-id vs_abc123 --index-type HNSW \\
+        --queries ../rag-evaluation-ragas/dataset-base/millbrook_dataset.json --target-p95-ms 50
+
+For true recall, pass --reference-store-id: a FLAT (exact) store holding the
+same chunks. Otherwise recall is relative to the largest swept value.
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from milvus_upload import create_clients, iter_json_records, read_back_vector_index
+from index_tuning import sweep_search_params, pick_search_params, INDEX_SEARCH_PARAMS, INDEX_NOT_VERIFIED
+
+
+def load_queries(path: Path) -> List[str]:
+    """
+    Read queries from a text file (one per line) or a JSON / JSON Lines file.
+
+    JSON records are strings or objects with a "query", "question" or
+    "user_input" field (e.g. the RAGAS evaluation datasets).
+    """
+    if path.suffix.lower() not in (".json", ".jsonl"):
+        return [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+    queries = []
+    for record in iter_json_records(path):
+        if isinstance(record, dict):
+            record = record.get("query") or record.get("question") or record.get("user_input")
+        if isinstance(record, str) and record.strip():
+            queries.append(record.strip())
+    return queries
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    sweepable = [name for name, param in INDEX_SEARCH_PARAMS.items() if param]
+    parser = argparse.ArgumentParser(description="Sweep a vector store's search parameter for recall vs latency")
+    parser.add_argument(
+        "--url",
+        default=os.getenv("LLAMA_STACK_URL", "http://localhost:8321"),
+        help="Llama Stack URL (default: from LLAMA_STACK_URL env or http://localhost:8321)"
+    )
+    parser.add_argument("--vector-store-id", required=True, help="Vector store to tune")
+    parser.add_argument(
+        "--index-type",
+        type=str.upper,
+        choices=sweepable,
+        required=True,
+        help="Index type the store was created with (checked against the store when it reports its index)"
+    )
+    parser.add_argument("--queries", type=Path, help="Text file (one query per line) or JSON/JSON Lines dataset")
+    parser.add_argument("--query", action="append", default=[], help="A query (repeatable, added to --queries)")
+    parser.add_argument("--values", help="Comma-separated search parameter values (default: depends on index type)")
+    parser.add_argument("--top-k", type=int, default=5, help="Chunks retrieved per query (default: 5)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per query and value (default: 3)")
+    parser.add_argument("--reference-store-id", help="FLAT store with the same chunks, for exact recall")
+    parser.add_argument("--target-p95-ms", type=float, default=50.0, help="p95 latency target in ms (default: 50)")
+    parser.add_argument("--output", help="Save the sweep and the pick as JSON to this file")
+    parser.add_argument("--verify-ssl", action="store_true", help="Enable SSL certificate verification")
+    parser.add_argument("--timeout", type=int, default=60, help="Timeout in seconds (default: 60)")
+    args = parser.parse_args(argv)
+
+    queries = (load_queries(args.queries) if args.queries else []) + args.query
+    if not queries:
+        parser.error("No queries: pass --queries and/or --query")
+    values = [int(value) for value in args.values.split(",")] if args.values else None
+
+    llama_client, openai_client = create_clients(args.url, timeout=args.timeout, verify_ssl=args.verify_ssl)
+    if llama_client is None:
+        print("❌ llama_stack_client is required. Install with: pip install llama-stack-client", file=sys.stderr)
+        return 1
+
+    # The index type is what the store was asked for; the server may have used its default
+    try:
+        index_status = read_back_vector_index(openai_client, args.vector_store_id, {"index_type": args.index_type})
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    search_param = INDEX_SEARCH_PARAMS[args.index_type]
+    reference = args.reference_store_id or "largest swept value (relative recall)"
+    print(
+        f"🔍 Sweeping {search_param} on {args.vector_store_id} ({args.index_type}, {index_status}) "
+        f"with {len(queries)} queries"
+    )
+    print(f"   Reference: {reference}")
+
+    sweep = sweep_search_params(
+        llama_client,
+        args.vector_store_id,
+        queries,
+        args.index_type,
+        values=values,
+        top_k=args.top_k,
+        repeat=args.repeat,
+        reference_store_id=args.reference_store_id
+    )
+    pick = pick_search_params(sweep["results"], args.target_p95_ms)
+
+    if sweep["identical_results"]:
+        print(
+            f"\n⚠️  Every {search_param} value returned the same chunks: the server may be ignoring "
+            "search_params, so the sweep did not measure them"
+        )
+    if pick:
+        print(
+            f"\n✅ Pick for p95 <= {args.target_p95_ms:g} ms: search_params={json.dumps(pick['params'])} "
+            f"(recall@{args.top_k} {pick['recall']}, p95 {pick['p95_ms']} ms; {INDEX_NOT_VERIFIED})"
+        )
+    else:
+        fastest = min(sweep["results"], key=lambda result: result["p95_ms"])
+        print(
+            f"\n❌ No {search_param} value meets p95 <= {args.target_p95_ms:g} ms "
+            f"(fastest: {json.dumps(fastest['params'])} at {fastest['p95_ms']} ms). "
+            "Consider a lighter index, e.g. smaller HNSW M or IVF_PQ."
+        )
+
+    if args.output:
+        report = {
+            "vector_store_id": args.vector_store_id,
+            "index_type": args.index_type,
+            "index_type_status": index_status,
+            "top_k": args.top_k,
+            "queries": len(queries),
+            "target_p95_ms": args.target_p95_ms,
+            **sweep,
+            "pick": pick,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"💾 Results saved to {args.output}")
+
+    return 0 if pick else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
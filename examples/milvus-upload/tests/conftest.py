@@ -0,0 +1,60 @@
+"""
+Shared fixtures: fakes of the Llama Stack / OpenAI clients the upload talks to.
+
+The modules of milvus-upload import each other by name (like the scripts do),
+so the module directory is put on sys.path.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class FakeStatusError(Exception):
+    """An API error carrying an HTTP status, like openai / llama_stack_client errors."""
+    
+    def __init__(self, status_code: int, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class FakeVectorIO:
+    """
+    In-memory vector_io: insert stores chunks per store, query returns a fixed ranking.
+    
+    Set `failures` to the outcomes of the next insert calls: an exception is
+    raised, None lets the call through.
+    """
+    
+    def __init__(self):
+        self.stores: Dict[str, List[Dict[str, Any]]] = {}
+        self.insert_calls: List[List[Dict[str, Any]]] = []
+        self.query_calls: List[Dict[str, Any]] = []
+        self.failures: List[Optional[Exception]] = []
+        self.ranking: List[Dict[str, Any]] = []
+    
+    def insert(self, vector_db_id: str, chunks: List[Dict[str, Any]]):
+        self.insert_calls.append(chunks)
+        failure = self.failures.pop(0) if self.failures else None
+        if failure is not None:
+            raise failure
+        self.stores.setdefault(vector_db_id, []).extend(chunks)
+    
+    def query(self, vector_db_id: str, query: str, params: Optional[Dict[str, Any]] = None):
+        self.query_calls.append({"vector_db_id": vector_db_id, "query": query, "params": params})
+        chunks = [
+            SimpleNamespace(content=chunk["content"], metadata=chunk.get("metadata", {}))
+            for chunk in self.ranking[:(params or {}).get("max_chunks", len(self.ranking))]
+        ]
+        return SimpleNamespace(chunks=chunks, scores=[1.0 / rank for rank in range(1, len(chunks) + 1)])
+
+
+@pytest.fixture
+def llama_client():
+    return SimpleNamespace(vector_io=FakeVectorIO())
@@ -0,0 +1,135 @@
+"""Tests of the exact and near-duplicate chunk detection."""
+
+import json
+
+import pytest
+
+import chunk_dedup
+from chunk_dedup import ChunkDeduplicator
+
+WORDS = (
+    "the operator reconciles the llama stack distribution and restarts the pod when the "
+    "config map changes so that the new providers are loaded before traffic is routed to it"
+).split()
+
+
+def text(length=100, offset=0, replace=None):
+    words = [WORDS[(i + offset) % len(WORDS)] + str(i) for i in range(length)]
+    for index, word in (replace or {}).items():
+        words[index] = word
+    return " ".join(words)
+
+
+def chunk(chunk_id, content, source=None):
+    return {"chunk_id": chunk_id, "content": content, "metadata": {"source": source or f"{chunk_id}.md"}}
+
+
+def jaccard(deduplicator, first, second):
+    a, b = deduplicator.shingles(first), deduplicator.shingles(second)
+    return len(a & b) / len(a | b)
+
+
+# =============================================================================
+# THRESHOLDS
+# =============================================================================
+
+def test_exact_duplicates_ignore_whitespace():
+    deduplicator = ChunkDeduplicator()
+    assert deduplicator.add(chunk("a", "License:  Apache 2.0\n\nsee LICENSE")) is None
+    assert deduplicator.add(chunk("b", "License: Apache 2.0 see LICENSE")) == "a"
+    assert deduplicator.stats["exact_duplicates"] == 1
+
+
+def test_near_duplicate_above_the_threshold_is_dropped():
+    deduplicator = ChunkDeduplicator(threshold=0.85)
+    original = text()
+    edited = text(replace={50: "changed"})
+    assert jaccard(deduplicator, original, edited) > 0.9
+    assert deduplicator.add(chunk("a", original)) is None
+    assert deduplicator.add(chunk("b", edited)) == "a"
+    assert deduplicator.stats["near_duplicates"] == 1
+
+
+def test_near_duplicate_below_the_threshold_is_kept():
+    original = text()
+    edited = text(replace={i: f"changed{i}" for i in range(0, 100, 10)})
+    deduplicator = ChunkDeduplicator(threshold=0.85)
+    assert jaccard(deduplicator, original, edited) < 0.6
+    assert deduplicator.add(chunk("a", original)) is None
+    assert deduplicator.add(chunk("b", edited)) is None
+    
+    strict = ChunkDeduplicator(threshold=1.0)
+    assert strict.add(chunk("a", original)) is None
+    assert strict.add(chunk("b", text(replace={50: "changed"}))) is None
+
+
+def test_unrelated_texts_are_kept():
+    deduplicator = ChunkDeduplicator()
+    for i in range(20):
+        assert deduplicator.add(chunk(f"c{i}", text(offset=i * 7, length=40 + i))) is None
+    assert deduplicator.stats["kept"] == 20
+
+
+def test_similarity_estimates_the_jaccard_similarity():
+    deduplicator = ChunkDeduplicator(num_perm=256, bands=32)
+    original = text()
+    for changes in (1, 5, 20):
+        edited = text(replace={i * 4: f"changed{i}" for i in range(changes)})
+        estimate = deduplicator.similarity(deduplicator.signature(original), deduplicator.signature(edited))
+        assert estimate == pytest.approx(jaccard(deduplicator, original, edited), abs=0.1)
+
+
+def test_signatures_without_numpy_are_the_same(monkeypatch):
+    with_numpy = ChunkDeduplicator().signature(text())
+    monkeypatch.setattr(chunk_dedup, "NUMPY_AVAILABLE", False)
+    assert ChunkDeduplicator().signature(text()) == with_numpy
+    assert ChunkDeduplicator().signature("  ...  ") is None
+
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError, match="multiple of bands"):
+        ChunkDeduplicator(num_perm=100, bands=16)
+
+
+# =============================================================================
+# STREAMING (PUSH / FLUSH)
+# =============================================================================
+
+def test_push_releases_kept_chunks_with_merged_duplicates():
+    deduplicator = ChunkDeduplicator(merge_window=2)
+    boilerplate = "Copyright Red Hat. All rights reserved. Licensed under the Apache License."
+    
+    assert deduplicator.push(chunk("a_0", boilerplate, "a.md")) == []
+    assert deduplicator.push(chunk("b_0", boilerplate, "b.md")) == []
+    assert deduplicator.push(chunk("a_1", text(), "a.md")) == []
+    released = deduplicator.push(chunk("c_0", text(offset=3, length=60), "c.md"))
+    
+    assert [item["chunk_id"] for item in released] == ["a_0"]
+    assert released[0]["metadata"] == {
+        "source": "a.md",
+        "duplicate_count": 1,
+        "duplicate_sources": ["b.md"],
+        "duplicate_chunk_ids": ["b_0"],
+    }
+    
+    # a_0 already left the window: this duplicate only shows up in the back-references
+    assert deduplicator.push(chunk("d_0", boilerplate, "d.md")) == []
+    flushed = deduplicator.flush()
+    assert [item["chunk_id"] for item in flushed] == ["a_1", "c_0"]
+    assert "duplicate_count" not in flushed[0]["metadata"]
+    assert deduplicator.flush() == []
+    assert deduplicator.back_references()["a_0"]["duplicate_chunk_ids"] == ["b_0", "d_0"]
+
+
+def test_deduplicate_keeps_input_order(tmp_path):
+    chunks = [chunk(f"c{i}", text(offset=i * 5, length=30)) for i in range(6)]
+    chunks.insert(3, chunk("dup", chunks[1]["content"]))
+    deduplicator = ChunkDeduplicator(merge_window=1)
+    kept = list(deduplicator.deduplicate(chunks))
+    assert [item["chunk_id"] for item in kept] == [f"c{i}" for i in range(6)]
+    
+    path = tmp_path / "duplicates.json"
+    deduplicator.save_back_references(path)
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["stats"]["exact_duplicates"] == 1
+    assert saved["chunks"]["c1"]["duplicate_chunk_ids"] == ["dup"]
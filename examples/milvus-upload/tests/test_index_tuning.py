@@ -0,0 +1,81 @@
+"""Tests of the vector index options and their read-back check."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeStatusError
+from index_tuning import INDEX_NOT_VERIFIED, INDEX_VERIFIED, check_vector_index, vector_index_options
+from milvus_upload import read_back_vector_index
+
+HNSW = {"index_type": "HNSW", "index_params": {"M": 32, "efConstruction": 200}, "metric_type": "COSINE"}
+
+
+def store(model_extra=None, metadata=None):
+    """A vector store object as the openai client returns it (extra fields in model_extra)."""
+    return SimpleNamespace(id="vs_1", model_extra=model_extra or {}, metadata=metadata or {})
+
+
+# =============================================================================
+# OPTIONS
+# =============================================================================
+
+def test_options_merge_build_parameters_over_the_defaults():
+    assert vector_index_options("hnsw", {"M": 32}, "cosine") == HNSW
+    assert vector_index_options() == {}
+    assert vector_index_options(quantization="int8")["index_type"] == "HNSW_SQ"
+    assert vector_index_options("IVF_FLAT", quantization="pq")["index_type"] == "IVF_PQ"
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"index_type": "ANNOY"}, "Invalid index_type"),
+    ({"index_type": "HNSW", "index_params": {"nlist": 8}}, "Unknown HNSW build parameters: nlist"),
+    ({"index_params": {"M": 8}}, "requires index_type"),
+    ({"metric_type": "HAMMING"}, "Invalid metric_type"),
+    ({"index_type": "FLAT", "quantization": "int8"}, "No int8 quantized variant"),
+    ({"index_type": "IVF_PQ", "index_params": {"m": 7}, "embedding_dimension": 768}, "must divide"),
+])
+def test_options_reject_invalid_settings(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        vector_index_options(**kwargs)
+
+
+# =============================================================================
+# READ-BACK CHECK
+# =============================================================================
+
+def test_reported_index_is_verified():
+    assert check_vector_index(store(model_extra=HNSW), HNSW) == INDEX_VERIFIED
+    # Metadata values are strings; index_params may be JSON
+    metadata = {"index_type": "hnsw", "index_params": '{"M": "32", "efConstruction": 200}', "metric_type": "cosine"}
+    assert check_vector_index(store(metadata=metadata), HNSW) == INDEX_VERIFIED
+    assert check_vector_index({"id": "vs_1", **HNSW}, HNSW) == INDEX_VERIFIED
+
+
+def test_unreported_settings_are_not_verified():
+    assert check_vector_index(store(), HNSW) == INDEX_NOT_VERIFIED
+    assert check_vector_index(store(model_extra={"metric_type": "COSINE"}), HNSW) == INDEX_NOT_VERIFIED
+    assert check_vector_index(store(metadata={"index_params": "not json"}), HNSW) == INDEX_NOT_VERIFIED
+
+
+@pytest.mark.parametrize("reported", [
+    {"index_type": "IVF_FLAT"},
+    {"metric_type": "L2"},
+    {"index_params": {"M": 16, "efConstruction": 200}},
+])
+def test_other_reported_settings_raise(reported):
+    with pytest.raises(ValueError, match="did not apply the requested index"):
+        check_vector_index(store(model_extra=reported), HNSW)
+
+
+def test_read_back_requires_verification_when_asked():
+    reported = SimpleNamespace(retrieve=lambda vector_store_id: store(model_extra=HNSW))
+    assert read_back_vector_index(SimpleNamespace(vector_stores=reported), "vs_1", HNSW, verbose=False) == INDEX_VERIFIED
+    
+    def unreadable(vector_store_id):
+        raise FakeStatusError(500)
+    
+    client = SimpleNamespace(vector_stores=SimpleNamespace(retrieve=unreadable))
+    assert read_back_vector_index(client, "vs_1", HNSW, verbose=False) == INDEX_NOT_VERIFIED
+    with pytest.raises(RuntimeError):
+        read_back_vector_index(client, "vs_1", HNSW, verbose=False, require_verified=True)
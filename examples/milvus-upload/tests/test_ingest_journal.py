@@ -0,0 +1,91 @@
+"""Tests of the checkpoint journal (resumable ingestion)."""
+
+import json
+
+import pytest
+
+from conftest import FakeStatusError
+from ingest_journal import CheckpointJournal
+from milvus_upload import ResilienceLayer, insert_chunks_with_vector_io
+
+HEADER = {"vector_store_id": "vs_1", "embedding_model": "granite-embedding-125m", "chunking": {"chunk_size": 512}}
+
+
+def make_chunks(count, prefix="doc"):
+    return [
+        {"chunk_id": f"{prefix}_{i}", "content": f"chunk number {i}", "metadata": {"source": f"{prefix}.md"}}
+        for i in range(count)
+    ]
+
+
+def formatted(chunk):
+    return {"content": chunk["content"], "metadata": {"document_id": chunk["chunk_id"], **chunk["metadata"]}}
+
+
+def test_resume_reads_acknowledged_chunks(tmp_path):
+    path = CheckpointJournal.path_for(tmp_path, "vs_1")
+    chunks = make_chunks(4)
+    journal = CheckpointJournal.create(path, HEADER)
+    journal.record([formatted(chunk) for chunk in chunks[:2]])
+    journal.record([formatted(chunks[2])])
+    journal.close()
+    
+    resumed = CheckpointJournal.resume(path, HEADER)
+    assert [resumed.is_acknowledged(chunk) for chunk in chunks] == [True, True, True, False]
+    # Same chunk ID with other content (the document changed) is sent again
+    assert not resumed.is_acknowledged({**chunks[0], "content": "edited"})
+    resumed.close()
+
+
+def test_resume_ignores_a_torn_last_line(tmp_path):
+    path = CheckpointJournal.path_for(tmp_path, "vs_1")
+    chunks = make_chunks(3)
+    journal = CheckpointJournal.create(path, HEADER)
+    journal.record([formatted(chunks[0])])
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"chunks": {"doc_1": "ab')  # Interrupted mid-write
+    
+    resumed = CheckpointJournal.resume(path, HEADER)
+    assert resumed.is_acknowledged(chunks[0])
+    assert not resumed.is_acknowledged(chunks[1])
+    
+    # The torn line is compacted away, so records appended after it stay readable
+    resumed.record([formatted(chunks[2])])
+    resumed.close()
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert records == [HEADER, {"chunks": {"doc_0": resumed.acknowledged["doc_0"]}}, records[2]]
+    assert records[2]["chunks"].keys() == {"doc_2"}
+
+
+def test_resume_rejects_other_settings(tmp_path):
+    path = CheckpointJournal.path_for(tmp_path, "vs_1")
+    CheckpointJournal.create(path, HEADER).close()
+    with pytest.raises(ValueError, match="different settings"):
+        CheckpointJournal.resume(path, {**HEADER, "embedding_model": "other-model"})
+    with pytest.raises(FileNotFoundError):
+        CheckpointJournal.resume(tmp_path / "missing.jsonl", HEADER)
+
+
+def test_interrupted_upload_resumes_with_the_unacknowledged_chunks(tmp_path, llama_client):
+    path = CheckpointJournal.path_for(tmp_path, "vs_1")
+    chunks = make_chunks(6)
+    journal = CheckpointJournal.create(path, HEADER)
+    # The third batch is rejected (400 is not retried): the first two stay journaled
+    llama_client.vector_io.failures = [None, None, FakeStatusError(400)]
+    with pytest.raises(RuntimeError, match="failed to insert"):
+        insert_chunks_with_vector_io(
+            llama_client, "vs_1", chunks, batch_size=2,
+            on_batch_inserted=journal.record, resilience=ResilienceLayer(max_retries=0)
+        )
+    journal.close()
+    
+    resumed = CheckpointJournal.resume(path, HEADER)
+    remaining = [chunk for chunk in chunks if not resumed.is_acknowledged(chunk)]
+    assert [chunk["chunk_id"] for chunk in remaining] == ["doc_4", "doc_5"]
+    assert insert_chunks_with_vector_io(
+        llama_client, "vs_1", remaining, batch_size=2, on_batch_inserted=resumed.record
+    ) == 2
+    resumed.close()
+    stored = [chunk["metadata"]["document_id"] for chunk in llama_client.vector_io.stores["vs_1"]]
+    assert stored == [f"doc_{i}" for i in range(6)]
@@ -0,0 +1,147 @@
+"""Tests of the content-hash manifest (incremental re-ingestion)."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeStatusError
+from ingest_manifest import (
+    IngestionManifest, chunk_hash, content_hash, delete_document_file, file_content_hash
+)
+from milvus_upload import ResilienceLayer, _delete_document_files
+
+
+class FakeFilesAPI:
+    """files / vector_stores.files API that records deletions, raising the queued errors first."""
+    
+    def __init__(self, errors=None):
+        self.deleted = []
+        self.errors = list(errors or [])
+    
+    def delete(self, file_id, vector_store_id=None):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.deleted.append((vector_store_id, file_id))
+
+
+def fake_openai_client(store_errors=None, file_errors=None):
+    return SimpleNamespace(
+        files=FakeFilesAPI(file_errors),
+        vector_stores=SimpleNamespace(files=FakeFilesAPI(store_errors))
+    )
+
+
+# =============================================================================
+# HASHING
+# =============================================================================
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_chunk_hash_only_depends_on_content():
+    chunk = {"chunk_id": "doc_0", "content": "text", "metadata": {"file_size": 10, "total_chunks": 3}}
+    same_text = {"chunk_id": "doc_0", "content": "text", "metadata": {"file_size": 99, "total_chunks": 4}}
+    assert chunk_hash(chunk) == chunk_hash(same_text)
+    assert chunk_hash(chunk) != chunk_hash({**chunk, "content": "other text"})
+
+
+def test_file_content_hash_reads_in_blocks(tmp_path):
+    path = tmp_path / "doc.md"
+    path.write_bytes(b"x" * 10000)
+    original = file_content_hash(path)
+    assert file_content_hash(path, read_size=7) == original
+    path.write_bytes(b"x" * 9999 + b"y")
+    assert file_content_hash(path, read_size=7) != original
+
+
+# =============================================================================
+# DIFF
+# =============================================================================
+
+def test_changes_reports_new_changed_and_removed():
+    manifest = IngestionManifest("manifest.json")
+    manifest.set_document("kept.md", "h1", "file-1")
+    manifest.set_document("edited.md", "h2", "file-2")
+    manifest.set_document("deleted.md", "h3", "file-3")
+    
+    changed, removed = manifest.changes({"kept.md": "h1", "edited.md": "h2-new", "added.md": "h4"})
+    assert changed == ["added.md", "edited.md"]
+    assert removed == ["deleted.md"]
+
+
+def test_changes_of_files_on_disk(tmp_path):
+    docs = tmp_path / "documents"
+    docs.mkdir()
+    for name, text in {"a.md": "alpha", "b.md": "beta", "c.md": "gamma"}.items():
+        (docs / name).write_text(text, encoding="utf-8")
+    
+    def hashes():
+        return {path.name: file_content_hash(path) for path in sorted(docs.iterdir())}
+    
+    manifest = IngestionManifest.load(tmp_path / "manifest.json")
+    assert manifest.changes(hashes()) == (["a.md", "b.md", "c.md"], [])
+    for i, (name, hash_value) in enumerate(hashes().items()):
+        manifest.set_document(name, hash_value, f"file-{i}")
+    manifest.save()
+    
+    (docs / "b.md").write_text("beta, edited", encoding="utf-8")
+    (docs / "c.md").unlink()
+    (docs / "d.md").write_text("delta", encoding="utf-8")
+    reloaded = IngestionManifest.load(tmp_path / "manifest.json")
+    assert reloaded.changes(hashes()) == (["b.md", "d.md"], ["c.md"])
+    assert reloaded.file_id("b.md") == "file-1"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "nested" / "manifest.json"
+    manifest = IngestionManifest.load(path)
+    manifest.data["vector_store_id"] = "vs_1"
+    manifest.set_document("a.md", "h1", "file-1")
+    manifest.save()
+    
+    assert not path.with_name("manifest.json.tmp").exists()
+    reloaded = IngestionManifest.load(path)
+    assert reloaded.data == manifest.data
+    assert reloaded.remove_document("a.md") == "file-1"
+    assert reloaded.remove_document("a.md") is None
+
+
+def test_load_rejects_other_versions(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"version": 1, "documents": {}}), encoding="utf-8")
+    with pytest.raises(ValueError, match="Unsupported manifest version"):
+        IngestionManifest.load(path)
+
+
+# =============================================================================
+# DELETION
+# =============================================================================
+
+def test_delete_document_file_treats_404_as_deleted():
+    client = fake_openai_client(store_errors=[FakeStatusError(404)])
+    delete_document_file(client, "vs_1", "file-1")
+    assert client.files.deleted == [(None, "file-1")]
+    
+    client = fake_openai_client(file_errors=[FakeStatusError(500)])
+    with pytest.raises(FakeStatusError):
+        delete_document_file(client, "vs_1", "file-1")
+
+
+def test_failed_deletions_stay_pending(tmp_path):
+    manifest = IngestionManifest(tmp_path / "manifest.json")
+    manifest.set_document("a.md", "h1", "file-1")
+    manifest.set_document("b.md", "h2", "file-2")
+    client = fake_openai_client(store_errors=[FakeStatusError(403)])
+    
+    with pytest.raises(RuntimeError, match="deleted first on the next run"):
+        _delete_document_files(client, "vs_1", manifest, ["a.md", "b.md"], ResilienceLayer(max_retries=0), print)
+    saved = IngestionManifest.load(manifest.path)
+    assert saved.data["pending_deletions"] == ["file-1", "file-2"]
+    assert saved.documents == {}
+    
+    _delete_document_files(client, "vs_1", saved, [], ResilienceLayer(max_retries=0), print)
+    assert saved.data["pending_deletions"] == []
+    assert client.vector_stores.files.deleted == [("vs_1", "file-1"), ("vs_1", "file-2")]
@@ -0,0 +1,84 @@
+"""Tests of the streaming JSON / JSON Lines reader."""
+
+import json
+
+import pytest
+
+from milvus_upload import iter_json_records
+
+RECORDS = [{"id": i, "content": f"document {i} " + "x" * (i * 50)} for i in range(5)]
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+# =============================================================================
+# VALID INPUT
+# =============================================================================
+
+@pytest.mark.parametrize("read_size", [1, 7, 1 << 20])
+def test_array_in_any_read_size(tmp_path, read_size):
+    path = write(tmp_path, "docs.json", json.dumps(RECORDS, indent=2))
+    assert list(iter_json_records(path, read_size=read_size)) == RECORDS
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 1 << 20])
+def test_json_lines_in_any_read_size(tmp_path, read_size):
+    path = write(tmp_path, "docs.jsonl", "\n".join(json.dumps(record) for record in RECORDS) + "\n")
+    assert list(iter_json_records(path, read_size=read_size)) == RECORDS
+
+
+def test_pretty_printed_json_lines_and_bom(tmp_path):
+    text = "\ufeff" + "\n".join(json.dumps(record, indent=2) for record in RECORDS)
+    assert list(iter_json_records(write(tmp_path, "docs.json", text))) == RECORDS
+
+
+def test_empty_inputs(tmp_path):
+    assert list(iter_json_records(write(tmp_path, "empty.json", ""))) == []
+    assert list(iter_json_records(write(tmp_path, "blank.jsonl", "\n\n  \n"))) == []
+    assert list(iter_json_records(write(tmp_path, "array.json", " [ ] "))) == []
+
+
+def test_single_record_json_lines(tmp_path):
+    assert list(iter_json_records(write(tmp_path, "one.jsonl", '{"id": 1}\n'))) == [{"id": 1}]
+
+
+# =============================================================================
+# ERRORS
+# =============================================================================
+
+@pytest.mark.parametrize("text, message", [
+    ('[{"id": 1} {"id": 2}]', "Expected ',' or ']' after record 1"),
+    ('[{"id": 1},, {"id": 2}]', "Unexpected ',' after record 1"),
+    ('[{"id": 1},]', "Unexpected ']' after record 1"),
+    ('[, {"id": 1}]', "Unexpected ',' after record 0"),
+    ('[{"id": 1}] {"id": 2}', "Unexpected data after the JSON array"),
+    ('[{"id": 1}, {"id": 2}', "Unterminated JSON array"),
+])
+def test_malformed_arrays(tmp_path, text, message):
+    path = write(tmp_path, "docs.json", text)
+    with pytest.raises(ValueError, match=message):
+        list(iter_json_records(path, read_size=4))
+
+
+def test_json_lines_records_must_be_separated_by_newlines(tmp_path):
+    path = write(tmp_path, "docs.jsonl", '{"id": 1}\n{"id": 2} {"id": 3}\n')
+    records = iter_json_records(path)
+    assert next(records) == {"id": 1}
+    with pytest.raises(ValueError, match="separated by newlines"):
+        list(records)
+
+
+def test_single_object_json_is_rejected(tmp_path):
+    path = write(tmp_path, "docs.json", json.dumps({"documents": RECORDS}))
+    with pytest.raises(ValueError, match="a single dict"):
+        list(iter_json_records(path))
+
+
+def test_truncated_record_raises_a_decode_error(tmp_path):
+    path = write(tmp_path, "docs.jsonl", '{"id": 1}\n{"id": 2, "content": "cut')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_records(path, read_size=3))
@@ -0,0 +1,169 @@
+"""Tests of the client-side rate limiting, adaptive concurrency and retries."""
+
+import pytest
+
+import milvus_upload
+from conftest import FakeStatusError
+from milvus_upload import AIMDLimiter, ResilienceLayer, TokenBucket, is_retryable_error, retry_after_seconds
+
+
+class FakeClock:
+    """time.monotonic / time.sleep replacement: sleeping advances the clock instantly."""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(milvus_upload.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(milvus_upload.time, "sleep", clock.sleep)
+    return clock
+
+
+# =============================================================================
+# TOKEN BUCKET
+# =============================================================================
+
+def test_token_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=10, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.now == 0
+    
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.now == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_up_to_its_capacity(clock):
+    bucket = TokenBucket(rate=2)
+    assert bucket.capacity == 2
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    for _ in range(3):
+        bucket.acquire()
+    # Only `capacity` tokens were saved up, the third one is waited for
+    assert clock.now == pytest.approx(60.5)
+
+
+def test_token_bucket_rejects_a_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+# =============================================================================
+# AIMD CONCURRENCY LIMIT
+# =============================================================================
+
+def test_aimd_grows_additively_and_halves_on_overload():
+    limiter = AIMDLimiter(max_limit=8, min_limit=2)
+    with limiter.slot() as report:
+        report(True)
+    assert limiter.limit == 4
+    
+    with limiter.slot() as report:
+        report(False)
+    assert limiter.limit == pytest.approx(4.25)
+    
+    for _ in range(3):
+        with limiter.slot() as report:
+            report(True)
+    assert limiter.limit == 2  # Never below min_limit
+
+
+def test_aimd_halves_once_per_burst_of_rejections():
+    limiter = AIMDLimiter(max_limit=8)
+    slots = [limiter.slot() for _ in range(4)]
+    reports = [slot.__enter__() for slot in slots]
+    assert limiter.in_flight == 4
+    # Started before the first decrease, so only one of them shrinks the limit
+    for report in reports:
+        report(True)
+    for slot in slots:
+        slot.__exit__(None, None, None)
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_aimd_limit_never_exceeds_max_limit():
+    limiter = AIMDLimiter(max_limit=2)
+    for _ in range(10):
+        with limiter.slot() as report:
+            report(False)
+    assert limiter.limit == 2
+
+
+# =============================================================================
+# RETRIES
+# =============================================================================
+
+def test_retryable_errors():
+    assert is_retryable_error(FakeStatusError(503))
+    assert is_retryable_error(FakeStatusError(429))
+    assert not is_retryable_error(FakeStatusError(400))
+    assert is_retryable_error(ConnectionError())
+    assert not is_retryable_error(ValueError())
+
+
+def test_backoff_is_full_jitter_and_capped(monkeypatch):
+    resilience = ResilienceLayer(base_delay=1.0, max_delay=5.0)
+    bounds = []
+    monkeypatch.setattr(milvus_upload.random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+    assert [resilience.backoff(attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    assert all(low == 0 for low, _ in bounds)
+
+
+def test_backoff_follows_retry_after():
+    resilience = ResilienceLayer(max_delay=30.0)
+    assert retry_after_seconds(FakeStatusError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(FakeStatusError(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) is None
+    assert resilience.backoff(0, FakeStatusError(429, {"retry-after": "7"})) == 7.0
+    assert resilience.backoff(0, FakeStatusError(429, {"retry-after": "120"})) == 30.0
+
+
+def test_call_retries_transient_errors(clock):
+    outcomes = [FakeStatusError(503), ConnectionError(), "ok"]
+    
+    def func():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    resilience = ResilienceLayer(max_retries=3, max_concurrency=4)
+    assert resilience.call(func) == "ok"
+    assert resilience.stats == {"calls": 1, "retries": 2, "overloaded": 1}
+    assert len(clock.sleeps) == 2
+    assert resilience.limiter.limit < 4
+
+
+def test_call_gives_up(clock):
+    calls = []
+    
+    def rejected():
+        calls.append(1)
+        raise FakeStatusError(400)
+    
+    with pytest.raises(FakeStatusError):
+        ResilienceLayer(max_retries=3).call(rejected)
+    assert len(calls) == 1  # Not transient: no retry
+    
+    def unavailable():
+        calls.append(1)
+        raise FakeStatusError(502)
+    
+    calls.clear()
+    with pytest.raises(FakeStatusError):
+        ResilienceLayer(max_retries=2).call(unavailable)
+    assert len(calls) == 3
@@ -0,0 +1,178 @@
+"""Tests of the local BM25 index, reciprocal rank fusion and hybrid search."""
+
+import math
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeStatusError
+from ingest_manifest import content_hash
+from milvus_upload import delete_vector_store
+from sparse_index import (
+    BM25_B, BM25_K1, SparseIndex, hybrid_search, reciprocal_rank_fusion, retrieved_chunk_id, sparse_terms
+)
+
+CHUNKS = {
+    "pods_0": "The pod llama-stack-7d9f restarted after an OOMKilled error",
+    "pods_1": "Scale the llama stack deployment to two replicas",
+    "net_0": "The route exposes the service on port 8321",
+    "net_1": "Check the route and the service when the pod is not reachable",
+}
+
+
+def formatted(chunk_id, content):
+    return {"content": content, "metadata": {"document_id": chunk_id, "source": chunk_id.split("_")[0] + ".md"}}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SparseIndex(SparseIndex.path_for(tmp_path, "vs_1"), vector_store_id="vs_1")
+    index.add_chunks([formatted(chunk_id, content) for chunk_id, content in CHUNKS.items()])
+    yield index
+    index.close()
+
+
+def bm25(query, chunk_id):
+    """BM25 score of one chunk, computed from CHUNKS directly."""
+    lengths = {key: len(sparse_terms(text)) for key, text in CHUNKS.items()}
+    average = sum(lengths.values()) / len(lengths)
+    terms = sparse_terms(CHUNKS[chunk_id])
+    score = 0.0
+    for term in set(sparse_terms(query)):
+        df = sum(1 for text in CHUNKS.values() if term in sparse_terms(text))
+        tf = terms.count(term)
+        if not tf:
+            continue
+        idf = math.log(1 + (len(CHUNKS) - df + 0.5) / (df + 0.5))
+        score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[chunk_id] / average))
+    return score
+
+
+# =============================================================================
+# BM25
+# =============================================================================
+
+def test_sparse_terms_keep_compounds_and_their_parts():
+    assert sparse_terms("Pod llama-stack-7d9f on v0.2.12") == [
+        "pod", "llama-stack-7d9f", "llama", "stack", "7d9f", "on", "v0.2.12", "v0", "2", "12"
+    ]
+
+
+@pytest.mark.parametrize("query", ["llama-stack-7d9f", "route service", "pod restarted"])
+def test_search_scores_match_bm25(index, query):
+    results = index.search(query)
+    expected = sorted(
+        ((chunk_id, bm25(query, chunk_id)) for chunk_id in CHUNKS if bm25(query, chunk_id) > 0),
+        key=lambda item: item[1], reverse=True
+    )
+    assert [result["chunk_id"] for result in results] == [chunk_id for chunk_id, _ in expected]
+    for result, (_, score) in zip(results, expected):
+        assert result["score"] == pytest.approx(score, abs=1e-4)
+
+
+def test_exact_compound_term_ranks_first(index):
+    results = index.search("llama-stack-7d9f logs", top_k=2)
+    assert results[0]["chunk_id"] == "pods_0"
+    assert results[0]["metadata"]["source"] == "pods.md"
+    assert results[0]["content"] == CHUNKS["pods_0"]
+    assert index.search("unknown words only") == []
+
+
+def test_reinserted_chunk_replaces_its_postings(index):
+    index.add_chunks([formatted("net_0", "Nothing about networking anymore")])
+    assert "net_0" not in [result["chunk_id"] for result in index.search("port 8321")]
+    assert index.stats()["chunks"] == len(CHUNKS)
+
+
+def test_index_belongs_to_one_store(index):
+    with pytest.raises(ValueError, match="belongs to vector store 'vs_1'"):
+        SparseIndex(index.path, vector_store_id="vs_2")
+    reopened = SparseIndex(index.path)
+    assert reopened.vector_store_id == "vs_1"
+    assert reopened.stats()["chunks"] == len(CHUNKS)
+    reopened.close()
+
+
+def test_delete_removes_the_index_files(index):
+    path = index.path
+    index.close()
+    assert SparseIndex.delete(path)
+    assert not path.exists()
+    assert not SparseIndex.delete(path)
+
+
+@pytest.mark.parametrize("store_error", [None, FakeStatusError(404)])
+def test_delete_vector_store_removes_its_index(tmp_path, index, store_error):
+    deleted = []
+    
+    def delete(vector_store_id):
+        deleted.append(vector_store_id)
+        if store_error:
+            raise store_error
+    
+    index.close()
+    delete_vector_store(SimpleNamespace(vector_stores=SimpleNamespace(delete=delete)), "vs_1", str(tmp_path), verbose=False)
+    assert deleted == ["vs_1"]
+    assert not index.path.exists()
+
+
+def test_delete_vector_store_keeps_the_index_on_errors(tmp_path, index):
+    def delete(vector_store_id):
+        raise FakeStatusError(500)
+    
+    index.close()
+    with pytest.raises(FakeStatusError):
+        delete_vector_store(SimpleNamespace(vector_stores=SimpleNamespace(delete=delete)), "vs_1", str(tmp_path))
+    assert index.path.exists()
+
+
+# =============================================================================
+# RECIPROCAL RANK FUSION
+# =============================================================================
+
+def test_reciprocal_rank_fusion():
+    fused = dict(reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60))
+    assert fused["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert fused["b"] == pytest.approx(1 / 62)
+    assert fused["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert [item for item, _ in reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)] == ["a", "c", "b"]
+
+
+def test_retrieved_chunk_id_falls_back_to_the_content_hash():
+    class Chunk:
+        def __init__(self, content, metadata=None):
+            self.content = content
+            self.metadata = metadata
+    
+    assert retrieved_chunk_id(Chunk("text", {"document_id": "doc_3"})) == "doc_3"
+    assert retrieved_chunk_id(Chunk("text")) == content_hash("text")
+
+
+# =============================================================================
+# HYBRID SEARCH
+# =============================================================================
+
+def test_hybrid_search_fuses_dense_and_sparse_results(index, llama_client):
+    # The embedding misses the exact pod name; BM25 still brings it into the top-k
+    llama_client.vector_io.ranking = [
+        formatted("pods_1", CHUNKS["pods_1"]),
+        formatted("net_1", CHUNKS["net_1"]),
+        {"content": "a chunk inserted without a sparse entry", "metadata": {}},
+    ]
+    results = hybrid_search(llama_client, "vs_1", index, "llama-stack-7d9f OOMKilled", top_k=3, candidates=5)
+    
+    query = llama_client.vector_io.query_calls[0]
+    assert query["vector_db_id"] == "vs_1"
+    assert query["params"] == {"max_chunks": 5}
+    by_id = {result["chunk_id"]: result for result in results}
+    assert [result["chunk_id"] for result in results][:2] == ["pods_1", "pods_0"]
+    assert by_id["pods_0"]["dense_rank"] is None
+    assert by_id["pods_0"]["sparse_rank"] == 1
+    assert (by_id["pods_1"]["dense_rank"], by_id["pods_1"]["sparse_rank"]) == (1, 2)
+    assert by_id["pods_1"]["score"] == pytest.approx(1 / 61 + 1 / 62, abs=1e-6)
+    assert by_id["pods_1"]["content"] == CHUNKS["pods_1"]
+
+
+def test_hybrid_search_passes_search_params(index, llama_client):
+    hybrid_search(llama_client, "vs_1", index, "route", candidates=4, search_params={"ef": 64})
+    assert llama_client.vector_io.query_calls[0]["params"] == {"max_chunks": 4, "search_params": {"ef": 64}}
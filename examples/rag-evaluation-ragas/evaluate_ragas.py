@@ -20,9 +20,10 @@ import sys
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import httpx
 from llama_stack_client import LlamaStackClient
 
+from http_pool import get_http_client
+
 
 # RAGAS metrics available
 AVAILABLE_METRICS = [
@@ -338,12 +339,11 @@ def run_evaluation(
         if not results or not results.get("scores"):
             # Try one more time with separate client
             try:
-                http_client = httpx.Client(verify=False, timeout=60)
+                http_client = get_http_client(timeout=60, verify_ssl=False)
                 result_url = f"{client.base_url}/v1alpha/eval/benchmarks/{benchmark_id}/jobs/{job.job_id}/result"
                 response = http_client.get(result_url)
                 response.raise_for_status()
                 results = response.json()
-                http_client.close()
             except Exception:
                 pass
     else:
@@ -404,12 +404,11 @@ def run_evaluation(
             results = response.json()
         except Exception as e:
             print(f"⚠️  Could not get results via SDK client: {e}")
-            http_client = httpx.Client(verify=False, timeout=30)
+            http_client = get_http_client(timeout=30, verify_ssl=False)
             result_url = f"{client.base_url}/v1alpha/eval/benchmarks/{benchmark_id}/jobs/{job.job_id}/result"
             response = http_client.get(result_url)
             response.raise_for_status()
             results = response.json()
-            http_client.close()
     
     if not results.get("scores"):
         raise RuntimeError(
@@ -540,7 +539,7 @@ def evaluate_ragas(
     # Initialize client
     print("🔗 Connecting to Llama Stack...")
     print(f"   URL: {llama_stack_url}")
-    http_client_instance = httpx.Client(verify=verify_ssl, timeout=timeout)
+    http_client_instance = get_http_client(timeout=timeout, verify_ssl=verify_ssl)
     client = LlamaStackClient(
         base_url=llama_stack_url,
         http_client=http_client_instance
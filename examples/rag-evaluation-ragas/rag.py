@@ -5,16 +5,20 @@ RAG Dataset Generator for RAGAS Evaluation
 This script processes questions from a dataset, queries a RAG system using Llama Stack,
 and generates an enriched dataset with answers and contexts for RAGAS evaluation.
 
-Uses the Responses API with file_search tool.
+Uses the Responses API with file_search tool, or with --sparse-index, hybrid
+(dense + BM25) retrieval of a store uploaded with a sparse index.
 """
 
+import sys
 import json
 import argparse
 from pathlib import Path
-from typing import List, Dict, Any
-import httpx
+from typing import List, Dict, Any, Optional
 from llama_stack_client import LlamaStackClient
 
+from http_pool import get_http_client
+from sparse_index import SparseIndex, hybrid_search
+
 
 def load_dataset(dataset_path: str) -> List[Dict[str, Any]]:
     """
@@ -90,6 +94,47 @@ def query_rag_with_responses_api(
     }
 
 
+def query_rag_with_hybrid_search(
+    client: LlamaStackClient,
+    model_id: str,
+    vector_store_id: str,
+    sparse_index: SparseIndex,
+    question: str,
+    top_k: int = 5
+) -> Dict[str, Any]:
+    """
+    Query RAG system with hybrid (dense + BM25) retrieval.
+    
+    file_search only runs the server's dense search, so the chunks are
+    retrieved here (dense vector_io.query fused with the local BM25 index)
+    and passed to the model as context.
+    
+    Args:
+        client: LlamaStackClient instance
+        model_id: Model identifier to use
+        vector_store_id: Vector store ID containing documents
+        sparse_index: BM25 index written when the store was uploaded
+        question: Question to ask
+        top_k: Chunks passed as context
+        
+    Returns:
+        Dictionary with 'answer' and 'contexts' fields
+    """
+    results = hybrid_search(client, vector_store_id, sparse_index, question, top_k=top_k)
+    contexts = [str(result["content"]) for result in results]
+    context_text = "\n\n".join(f"[{i}] {context}" for i, context in enumerate(contexts, 1))
+    
+    response = client.responses.create(
+        model=model_id,
+        input=f"Answer the question using the context below.\n\nContext:\n{context_text}\n\nQuestion: {question}",
+    )
+    
+    return {
+        "answer": getattr(response, "output_text", str(response)),
+        "contexts": contexts if contexts else ["No context retrieved"]
+    }
+
+
 def generate_ragas_dataset(
     llama_stack_url: str,
     model_id: str,
@@ -97,7 +142,8 @@ def generate_ragas_dataset(
     input_dataset_path: str,
     output_dataset_path: str,
     verify_ssl: bool = False,
-    timeout: int = 300
+    timeout: int = 300,
+    sparse_index_path: Optional[str] = None
 ) -> None:
     """
     Generate RAGAS-compatible dataset with RAG answers and contexts using Responses API.
@@ -110,14 +156,17 @@ def generate_ragas_dataset(
         output_dataset_path: Path to save output dataset
         verify_ssl: Whether to verify SSL certificates
         timeout: Timeout in seconds for requests
+        sparse_index_path: Sparse index of the store (hybrid retrieval), or None for file_search
     """
     # Initialize client
-    http_client = httpx.Client(verify=verify_ssl, timeout=timeout)
+    http_client = get_http_client(timeout=timeout, verify_ssl=verify_ssl)
     client = LlamaStackClient(
         base_url=llama_stack_url,
         http_client=http_client
     )
     
+    sparse_index = SparseIndex(sparse_index_path, vector_store_id) if sparse_index_path else None
+    
     # Load input dataset
     print(f"📖 Loading dataset from: {input_dataset_path}")
     dataset = load_dataset(input_dataset_path)
@@ -126,7 +175,8 @@ def generate_ragas_dataset(
     # Process each question
     print(f"\n🤖 Processing questions using Responses API...")
     print(f"Model: {model_id}")
-    print(f"Vector Store: {vector_store_id}\n")
+    print(f"Vector Store: {vector_store_id}")
+    print(f"Retrieval: {'hybrid (dense + BM25)' if sparse_index else 'file_search'}\n")
     
     ragas_dataset = []
     
@@ -139,7 +189,10 @@ def generate_ragas_dataset(
         
         try:
             # Query RAG system using Responses API
-            result = query_rag_with_responses_api(client, model_id, vector_store_id, question)
+            if sparse_index:
+                result = query_rag_with_hybrid_search(client, model_id, vector_store_id, sparse_index, question)
+            else:
+                result = query_rag_with_responses_api(client, model_id, vector_store_id, question)
             
             # Build RAGAS entry
             ragas_entry = {
@@ -169,6 +222,9 @@ def generate_ragas_dataset(
                 "difficulty": item.get('difficulty', 'unknown')
             })
     
+    if sparse_index:
+        sparse_index.close()
+    
     # Save output dataset
     print(f"\n💾 Saving RAGAS dataset to: {output_dataset_path}")
     with open(output_dataset_path, 'w') as f:
@@ -194,6 +250,11 @@ Examples:
     --vector-store-id vs_627e6e71-8a1b-45cc-bea5-d7689e71e27b \\
     --input dataset-base/my_dataset.json \\
     --output output/my_ragas_dataset.json
+  
+  # Hybrid retrieval of a store uploaded with --sparse-index-dir output/sparse_index
+  python rag.py \\
+    --vector-store-id vs_627e6e71-8a1b-45cc-bea5-d7689e71e27b \\
+    --sparse-index output/sparse_index
         """
     )
     
@@ -222,6 +283,11 @@ Examples:
         default="output/millbrook_ragas_dataset.json",
         help="Output dataset JSON file (default: output/millbrook_ragas_dataset.json)"
     )
+    parser.add_argument(
+        "--sparse-index",
+        help="Sparse (BM25) index of the store, or its directory (--sparse-index-dir of the upload): "
+             "retrieve with hybrid search instead of file_search"
+    )
     parser.add_argument(
         "--verify-ssl",
         action="store_true",
@@ -236,6 +302,11 @@ Examples:
     
     args = parser.parse_args()
     
+    if args.sparse_index and Path(args.sparse_index).is_dir():
+        args.sparse_index = str(SparseIndex.path_for(Path(args.sparse_index), args.vector_store_id))
+    if args.sparse_index and not Path(args.sparse_index).exists():
+        parser.error(f"Sparse index not found: {args.sparse_index}")
+    
     # Create output directory if it doesn't exist
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -246,6 +317,8 @@ Examples:
     print(f"Server: {args.url}")
     print(f"Model: {args.model_id}")
     print(f"Vector Store: {args.vector_store_id}")
+    if args.sparse_index:
+        print(f"Sparse index: {args.sparse_index}")
     if not args.verify_ssl:
         print("⚠️  SSL verification: disabled")
     print("=" * 70)
@@ -258,7 +331,8 @@ Examples:
             input_dataset_path=args.input,
             output_dataset_path=args.output,
             verify_ssl=args.verify_ssl,
-            timeout=args.timeout
+            timeout=args.timeout,
+            sparse_index_path=args.sparse_index
         )
         return 0
     except FileNotFoundError as e:
@@ -272,6 +346,5 @@ Examples:
 
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())
 
@@ -5,14 +5,21 @@ Llama Stack Chatbot with RAG + MCP Tools
 Uses the Responses API which handles tool execution internally.
 No manual iteration loop needed - the API executes tools and generates
 the final response in a single call.
+
+With SPARSE_INDEX_PATH set (the sparse index written by milvus-upload.py
+--sparse-index-dir), documents are retrieved here with hybrid dense + BM25
+search and passed as context instead of the file_search tool.
 """
 
 import os
-import httpx
 import logging
+from pathlib import Path
 from dotenv import load_dotenv
 from llama_stack_client import LlamaStackClient
 
+from http_pool import get_http_client
+from sparse_index import SparseIndex, hybrid_search
+
 # Suppress httpx INFO logs
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
@@ -24,6 +31,8 @@ class LlamaStackChatbot:
         self.base_url = os.getenv("REMOTE_BASE_URL", "http://localhost:8321")
         self.model_id = os.getenv("INFERENCE_MODEL_ID", "granite32-8b")
         self.vector_store_id = os.getenv("VECTOR_STORE_ID")
+        self.sparse_index_path = os.getenv("SPARSE_INDEX_PATH")
+        self.sparse_index = None
         
         # Setup client
         self._setup_client()
@@ -50,7 +59,7 @@ Execute ALL necessary tools before providing your final answer. Do not just desc
         skip_ssl = os.getenv("SKIP_SSL_VERIFY", "False").lower() == "true"
         timeout = int(os.getenv("LLAMA_STACK_TIMEOUT", "300"))
         
-        http_client = httpx.Client(verify=not skip_ssl, timeout=timeout)
+        http_client = get_http_client(timeout=timeout, verify_ssl=not skip_ssl)
         self.client = LlamaStackClient(
             base_url=self.base_url,
             http_client=http_client
@@ -94,11 +103,22 @@ Execute ALL necessary tools before providing your final answer. Do not just desc
             print(f"⚠️  MCP setup error: {e}")
     
     def _setup_rag_tools(self):
-        """Setup RAG file_search tool"""
+        """Setup RAG file_search tool, or hybrid retrieval if SPARSE_INDEX_PATH is set"""
         if not self.vector_store_id:
             print("⚠️  No VECTOR_STORE_ID configured - RAG disabled")
             return
         
+        if self.sparse_index_path:
+            path = Path(self.sparse_index_path)
+            if path.is_dir():
+                path = SparseIndex.path_for(path, self.vector_store_id)
+            if not path.exists():
+                raise FileNotFoundError(f"Sparse index not found: {path}")
+            self.sparse_index = SparseIndex(str(path), self.vector_store_id)
+            print(f"✅ Hybrid RAG (dense + BM25) enabled with vector store: {self.vector_store_id}")
+            print(f"   Sparse index: {path}")
+            return
+        
         self.tools.append({
             "type": "file_search",
             "vector_store_ids": [self.vector_store_id]
@@ -123,12 +143,23 @@ Execute ALL necessary tools before providing your final answer. Do not just desc
             print(f"🛠️  Tools: {len(self.tools)}")
             print("=" * 60)
             
+            tool_results = []
+            model_input = message
+            if self.sparse_index:
+                # Hybrid retrieval runs here: file_search only does the server's dense search
+                print("   ⏳ RAG searching (hybrid)...")
+                results = hybrid_search(self.client, self.vector_store_id, self.sparse_index, message)
+                print(f"   📄 RAG: {len(results)} documents retrieved")
+                tool_results.extend({"tool": "hybrid_search", "result": str(r["content"])} for r in results)
+                context = "\n\n".join(f"[{i}] {r['content']}" for i, r in enumerate(results, 1))
+                model_input = f"Documentation:\n{context}\n\n{message}"
+            
             # Use streaming to keep the connection alive and avoid 504 gateway timeouts.
             # The OpenShift route has a default 30s idle timeout; streaming sends events
             # continuously so the connection never goes idle.
             stream = self.client.responses.create(
                 model=self.model_id,
-                input=message,
+                input=model_input,
                 instructions=self.instructions,
                 tools=self.tools if self.tools else None,
                 include=["file_search_call.results"],
@@ -137,7 +168,6 @@ Execute ALL necessary tools before providing your final answer. Do not just desc
             )
             
             # Collect streaming events
-            tool_results = []
             output_text_parts = []
             final_response = None
             
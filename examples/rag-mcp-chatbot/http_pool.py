@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Shared, connection-pooled HTTP client factory for the Llama Stack tools.
+
+Every tool in this repo talks to the same Llama Stack route. Instead of a new
+httpx.Client (and TLS handshake) per call, they share one pooled client per
+(timeout, verify_ssl) setting, used by both LlamaStackClient and OpenAI:
+
+    from http_pool import get_http_client
+
+    http_client = get_http_client(timeout=300, verify_ssl=False)
+    llama_client = LlamaStackClient(base_url=url, http_client=http_client)
+    openai_client = OpenAI(base_url=f"{url}/v1", api_key="fake-key", http_client=http_client)
+
+HTTP/2 is used when the h2 package is installed (pip install "httpx[http2]"),
+so concurrent requests are multiplexed over a few connections; otherwise the
+client falls back to HTTP/1.1 keep-alive.
+
+Only depends on httpx, so every example that talks to Llama Stack ships an
+identical copy next to its scripts (guardrails-simple, mcp-chatbot,
+rag-evaluation-ragas, rag-mcp-chatbot, validation) and imports it without
+the rest of milvus_upload's requirements. Change all copies together.
+"""
+
+import atexit
+import threading
+from typing import Dict, Tuple
+
+import httpx
+
+# Optional import for HTTP/2 support in httpx
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+
+# Pool sizing: enough for the upload thread pools (workers + in-flight inserts)
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 16
+# Below the OpenShift router's default 30s idle timeout, so pooled connections
+# are dropped by us before the route silently closes them
+DEFAULT_KEEPALIVE_EXPIRY = 20.0  # seconds
+
+
+# =============================================================================
+# CLIENT FACTORY
+# =============================================================================
+
+def create_http_client(
+    timeout: float = 300,
+    verify_ssl: bool = False,
+    http2: bool = True,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY
+) -> httpx.Client:
+    """
+    Create a new pooled httpx.Client.
+
+    Args:
+        timeout: Request timeout in seconds
+        verify_ssl: Whether to verify SSL certificates
+        http2: Use HTTP/2 when h2 is installed
+        max_connections: Max open connections
+        max_keepalive_connections: Max idle connections kept for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+
+    Returns:
+        httpx.Client
+    """
+    return httpx.Client(
+        verify=verify_ssl,
+        timeout=timeout,
+        http2=http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+    )
+
+
+_shared_clients: Dict[Tuple, httpx.Client] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_http_client(timeout: float = 300, verify_ssl: bool = False, **pool_options) -> httpx.Client:
+    """
+    Get the process-wide shared client for these settings (created on first use).
+
+    Args:
+        timeout: Request timeout in seconds
+        verify_ssl: Whether to verify SSL certificates
+        **pool_options: http2, max_connections, max_keepalive_connections, keepalive_expiry
+
+    Returns:
+        httpx.Client shared by every caller with the same settings
+    """
+    key = (timeout, verify_ssl, tuple(sorted(pool_options.items())))
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None or client.is_closed:
+            client = create_http_client(timeout=timeout, verify_ssl=verify_ssl, **pool_options)
+            _shared_clients[key] = client
+    return client
+
+
+def close_http_clients():
+    """Close every shared client (also done at interpreter exit)."""
+    with _shared_clients_lock:
+        for client in _shared_clients.values():
+            client.close()
+        _shared_clients.clear()
+
+
+atexit.register(close_http_clients)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Local BM25 index and hybrid (dense + sparse) search with reciprocal rank fusion.
+
+vector_io chunks have no sparse field, so hybrid mode keeps a SQLite BM25
+index of the inserted chunks next to the store, one file per store, and
+fuses it with dense vector_io.query results (see hybrid_search.py):
+
+    from sparse_index import SparseIndex, hybrid_search
+
+    index = SparseIndex(SparseIndex.path_for(Path("output/sparse_index"), vector_store_id), vector_store_id)
+    results = hybrid_search(llama_client, vector_store_id, index, "CrashLoopBackOff llama-stack-7d9f")
+
+Only depends on the standard library, so the RAG clients that query hybrid
+stores (rag-evaluation-ragas/rag.py, rag-mcp-chatbot/chatbot.py) ship an
+identical copy of this file. Change all three together.
+"""
+
+import re
+import json
+import math
+import heapq
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# =============================================================================
+# HYBRID SEARCH (SPARSE BM25 + RECIPROCAL RANK FUSION)
+# =============================================================================
+
+# BM25 term saturation and document length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant (score = sum of 1 / (k + rank))
+DEFAULT_RRF_K = 60
+# Candidates retrieved from each side before fusion
+DEFAULT_HYBRID_CANDIDATES = 20
+
+# Words, plus compounds joined by - . / : (pod names, versions, paths, error codes)
+_SPARSE_TOKEN_PATTERN = re.compile(r"\w+(?:[-./:]\w+)*")
+_SPARSE_SEPARATORS = re.compile(r"[-./:]")
+
+
+def sparse_terms(text: str) -> List[str]:
+    """
+    Lowercased terms of a text for the sparse index.
+    
+    A compound like "llama-stack-7d9f" or "v0.2.12" is kept as one term, so an
+    exact pod name or version matches strongly, and its parts are added too, so
+    "llama" still finds it.
+    """
+    terms = []
+    for token in _SPARSE_TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if _SPARSE_SEPARATORS.search(token):
+            terms.extend(_SPARSE_SEPARATORS.split(token))
+    return terms
+
+
+def retrieved_chunk_id(chunk: Any) -> str:
+    """Identity of a retrieved chunk: its chunk_id (metadata document_id), else its content hash."""
+    metadata = getattr(chunk, "metadata", None) or {}
+    chunk_id = metadata.get("document_id") if isinstance(metadata, dict) else None
+    if chunk_id:
+        return chunk_id
+    # Same hash as ingest_manifest.content_hash
+    payload = json.dumps(getattr(chunk, "content", str(chunk)), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SparseIndex:
+    """
+    Local BM25 index of the chunks inserted in a vector store.
+    
+    vector_io chunks carry only content, metadata and a dense embedding, so the
+    sparse side of hybrid search lives next to the store in SQLite, keyed by
+    the chunk_id stored as the chunks' metadata document_id, one file per
+    store (path_for). The vocabulary
+    (term -> term_id) grows as chunks are added, in the same streaming pass as
+    the insertion; each chunk is stored as a sparse vector of term frequencies.
+    Document frequencies and the average chunk length are read at query time,
+    so re-inserted chunks never leave stale BM25 weights behind.
+    
+    vector_io can't delete chunks, so a store only grows and the index with it
+    (a re-inserted chunk replaces its entry). Content is removed by deleting
+    the store together with its index (delete_vector_store in milvus_upload).
+    Safe to share between threads.
+    """
+    
+    @staticmethod
+    def path_for(index_dir: Path, vector_store_id: str) -> Path:
+        return Path(index_dir) / f"{vector_store_id}.sqlite"
+    
+    @staticmethod
+    def delete(path: Path) -> bool:
+        """Delete an index file and its WAL files; returns whether the index existed."""
+        path = Path(path)
+        existed = path.exists()
+        for suffix in ("", "-wal", "-shm"):
+            Path(str(path) + suffix).unlink(missing_ok=True)
+        return existed
+    
+    def __init__(self, path: str, vector_store_id: Optional[str] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS terms (term_id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " chunk_id TEXT PRIMARY KEY, length INTEGER NOT NULL, content TEXT NOT NULL, metadata TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term_id INTEGER NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL,"
+            " PRIMARY KEY (term_id, chunk_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id);"
+        )
+        self._vocabulary = dict(self._conn.execute("SELECT term, term_id FROM terms"))
+        
+        row = self._conn.execute("SELECT value FROM info WHERE key = 'vector_store_id'").fetchone()
+        self.vector_store_id = row[0] if row else None
+        if vector_store_id and self.vector_store_id not in (None, vector_store_id):
+            self._conn.close()
+            raise ValueError(
+                f"Sparse index {self.path} belongs to vector store '{self.vector_store_id}', not '{vector_store_id}'"
+            )
+        if vector_store_id and self.vector_store_id is None:
+            self._conn.execute("INSERT INTO info VALUES ('vector_store_id', ?)", (vector_store_id,))
+            self.vector_store_id = vector_store_id
+        self._conn.commit()
+    
+    def _term_ids(self, terms: Iterable[str]) -> Dict[str, int]:
+        """Vocabulary IDs of terms, adding unseen ones (caller holds the lock and commits)."""
+        for term in terms:
+            if term not in self._vocabulary:
+                cursor = self._conn.execute("INSERT INTO terms (term) VALUES (?)", (term,))
+                self._vocabulary[term] = cursor.lastrowid
+        return self._vocabulary
+    
+    def sparse_vector(self, text: str) -> Tuple[Dict[int, int], int]:
+        """Term frequencies of a text keyed by term_id, and its length in terms."""
+        terms = sparse_terms(text)
+        with self._lock:
+            vocabulary = self._term_ids(terms)
+        counts = {}
+        for term in terms:
+            term_id = vocabulary[term]
+            counts[term_id] = counts.get(term_id, 0) + 1
+        return counts, len(terms)
+    
+    def add_chunks(self, batch: List[Dict[str, Any]]):
+        """Index formatted vector_io chunks, replacing earlier versions of the same chunk IDs."""
+        rows = []
+        for formatted in batch:
+            chunk_id = formatted["metadata"]["document_id"]
+            counts, length = self.sparse_vector(formatted["content"])
+            rows.append((chunk_id, length, formatted["content"], formatted["metadata"], counts))
+        with self._lock:
+            self._conn.executemany("DELETE FROM postings WHERE chunk_id = ?", [(row[0],) for row in rows])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)",
+                [
+                    (chunk_id, length, content, json.dumps(metadata, default=str))
+                    for chunk_id, length, content, metadata, _ in rows
+                ]
+            )
+            self._conn.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?)",
+                [
+                    (term_id, chunk_id, tf)
+                    for chunk_id, _, _, _, counts in rows
+                    for term_id, tf in counts.items()
+                ]
+            )
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chunks, total_length = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks").fetchone()
+            (postings,) = self._conn.execute("SELECT COUNT(*) FROM postings").fetchone()
+        return {
+            "chunks": chunks,
+            "terms": len(self._vocabulary),
+            "postings": postings,
+            "avg_chunk_terms": round(total_length / chunks, 1) if chunks else 0.0,
+        }
+    
+    def search(self, query: str, top_k: int = DEFAULT_HYBRID_CANDIDATES) -> List[Dict[str, Any]]:
+        """
+        BM25 top-k of a query.
+        
+        Returns:
+            List of {chunk_id, score, content, metadata}, best first
+        """
+        term_ids = sorted({self._vocabulary[term] for term in sparse_terms(query) if term in self._vocabulary})
+        if not term_ids:
+            return []
+        placeholders = ",".join("?" * len(term_ids))
+        with self._lock:
+            chunk_count, average_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM chunks").fetchone()
+            frequencies = dict(self._conn.execute(
+                f"SELECT term_id, COUNT(*) FROM postings WHERE term_id IN ({placeholders}) GROUP BY term_id",
+                term_ids
+            ))
+            postings = self._conn.execute(
+                f"SELECT p.chunk_id, p.term_id, p.tf, c.length FROM postings p "
+                f"JOIN chunks c ON c.chunk_id = p.chunk_id WHERE p.term_id IN ({placeholders})",
+                term_ids
+            ).fetchall()
+        if not chunk_count:
+            return []
+        
+        idf = {
+            term_id: math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+            for term_id, df in frequencies.items()
+        }
+        scores = {}
+        for chunk_id, term_id, tf, length in postings:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1))
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + idf[term_id] * tf * (BM25_K1 + 1) / (tf + norm)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        
+        with self._lock:
+            stored = {
+                chunk_id: (content, metadata)
+                for chunk_id, content, metadata in self._conn.execute(
+                    f"SELECT chunk_id, content, metadata FROM chunks WHERE chunk_id IN ({','.join('?' * len(best))})",
+                    [chunk_id for chunk_id, _ in best]
+                )
+            } if best else {}
+        return [
+            {
+                "chunk_id": chunk_id,
+                "score": round(score, 4),
+                "content": stored[chunk_id][0],
+                "metadata": json.loads(stored[chunk_id][1]),
+            }
+            for chunk_id, score in best
+        ]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = DEFAULT_RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists: each ID scores sum(1 / (k + rank)), rank starting at 1."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search(
+    llama_client,  # LlamaStackClient
+    vector_store_id: str,
+    sparse_index: SparseIndex,
+    query: str,
+    top_k: int = 5,
+    candidates: int = DEFAULT_HYBRID_CANDIDATES,
+    rrf_k: int = DEFAULT_RRF_K,
+    search_params: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Dense + sparse search fused with reciprocal rank fusion (RRF).
+    
+    The dense top candidates come from vector_io.query on the store, the sparse
+    ones from the local BM25 index; chunks are matched by chunk_id and ranked
+    by their fused score. Exact keyword hits (pod names, error codes) that the
+    embedding ranks low still make the top-k.
+    
+    Args:
+        llama_client: Llama Stack client
+        vector_store_id: Store the sparse index was built for
+        sparse_index: BM25 index of the store's chunks
+        query: Query text
+        top_k: Fused results returned
+        candidates: Results retrieved from each side before fusion
+        rrf_k: RRF constant; larger values flatten the rank weights
+        search_params: Index search parameters of the dense query (e.g. {"ef": 64})
+    
+    Returns:
+        List of {chunk_id, score, content, metadata, dense_rank, sparse_rank},
+        best first; a rank is None if that side didn't retrieve the chunk
+    """
+    params = {"max_chunks": candidates}
+    if search_params:
+        params["search_params"] = search_params
+    results = llama_client.vector_io.query(vector_db_id=vector_store_id, query=query, params=params)
+    
+    found = {}
+    dense_ids = []
+    for chunk in results.chunks:
+        chunk_id = retrieved_chunk_id(chunk)
+        dense_ids.append(chunk_id)
+        found.setdefault(chunk_id, {
+            "content": getattr(chunk, "content", str(chunk)),
+            "metadata": getattr(chunk, "metadata", None) or {},
+        })
+    
+    sparse_results = sparse_index.search(query, candidates)
+    sparse_ids = []
+    for result in sparse_results:
+        sparse_ids.append(result["chunk_id"])
+        found.setdefault(result["chunk_id"], {"content": result["content"], "metadata": result["metadata"]})
+    
+    dense_ranks = {chunk_id: rank for rank, chunk_id in enumerate(dense_ids, start=1)}
+    sparse_ranks = {chunk_id: rank for rank, chunk_id in enumerate(sparse_ids, start=1)}
+    return [
+        {
+            "chunk_id": chunk_id,
+            "score": round(score, 6),
+            **found[chunk_id],
+            "dense_rank": dense_ranks.get(chunk_id),
+            "sparse_rank": sparse_ranks.get(chunk_id),
+        }
+        for chunk_id, score in reciprocal_rank_fusion([dense_ids, sparse_ids], rrf_k)[:top_k]
+    ]
@@ -10,9 +10,10 @@ import argparse
 import json
 import sys
 import ssl
-import httpx
 from datetime import datetime
 
+from http_pool import get_http_client
+
 # Import llama-stack client
 try:
     from llama_stack_client import LlamaStackClient
@@ -139,7 +140,7 @@ def main():
     }
     
     if args.skip_ssl_verify:
-        http_client = httpx.Client(verify=False, timeout=30)
+        http_client = get_http_client(timeout=30, verify_ssl=False)
         client_kwargs['http_client'] = http_client
     
     client = LlamaStackClient(**client_kwargs)
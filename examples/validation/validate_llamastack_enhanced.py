@@ -24,10 +24,11 @@ import sys
 import time
 import os
 import ssl
-import httpx
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from http_pool import get_http_client
+
 # Import llama-stack client
 try:
     from llama_stack_client import LlamaStackClient
@@ -91,10 +92,7 @@ class EnhancedLlamaStackValidator:
             ssl_context.check_hostname = False
             ssl_context.verify_mode = ssl.CERT_NONE
             
-            http_client = httpx.Client(
-                verify=False,
-                timeout=timeout
-            )
+            http_client = get_http_client(timeout=timeout, verify_ssl=False)
         else:
             http_client = None
             